@@ -1,5 +1,6 @@
 const API_BASE = 'http://localhost:5051'; // FastAPI server base
 const RESOLVE_ENDPOINT = `${API_BASE}/api/resolve_or_generate`;
+const RESOLVE_STREAM_ENDPOINT = `${API_BASE}/api/resolve_or_generate/stream`;
 const STATIC_BASE = 'http://localhost:8001/';
 
 async function loadExamples() {
@@ -52,6 +53,73 @@ function showResult(url, kind) {
   }
 }
 
+const STAGE_TEXT = {
+  registry: (d) => (d.hit ? '命中已有可视化，正在打开…' : '未命中注册表，开始生成…'),
+  spec: (d) => `已抽取规格：${d.title || d.concept}，正在生成页面…`,
+  saved: () => '页面已生成，正在登记…',
+  registered: () => '登记完成',
+};
+
+function handleResolved(data) {
+  if (data && data.kind && data.url) {
+    setStatus(data.kind === 'existing' ? '命中已有可视化' : '生成完成', 'ok');
+    showResult(data.url, data.kind);
+  } else {
+    throw new Error('接口返回缺少必要字段');
+  }
+}
+
+function showFailure(e) {
+  console.error(e);
+  setStatus('生成失败：' + e.message, 'error');
+  const hint = document.getElementById('resultHint');
+  hint.textContent = '请稍后重试，或更换描述再试';
+}
+
+async function resolveByPost(prompt) {
+  const resp = await fetch(RESOLVE_ENDPOINT, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ prompt, vizType: '自动', complexity: '中等' })
+  });
+  if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
+  handleResolved(await resp.json());
+}
+
+// SSE：逐阶段显示进度；浏览器不支持或连接未建立时退回普通 POST
+function resolveByStream(prompt) {
+  return new Promise((resolve, reject) => {
+    const params = new URLSearchParams({ prompt, vizType: '自动', complexity: '中等' });
+    const source = new EventSource(`${RESOLVE_STREAM_ENDPOINT}?${params}`);
+    let received = false;
+    source.addEventListener('stage', (ev) => {
+      received = true;
+      const data = JSON.parse(ev.data);
+      const text = STAGE_TEXT[data.stage];
+      if (text) setStatus(text(data), 'loading');
+    });
+    source.addEventListener('done', (ev) => {
+      source.close();
+      try {
+        handleResolved(JSON.parse(ev.data));
+        resolve();
+      } catch (e) {
+        reject(e);
+      }
+    });
+    source.addEventListener('error', (ev) => {
+      source.close();
+      if (ev.data) {
+        reject(new Error(JSON.parse(ev.data).detail || '生成失败'));
+      } else if (!received) {
+        resolveByPost(prompt).then(resolve, reject);
+      } else {
+        reject(new Error('连接中断'));
+      }
+    });
+  });
+}
+
 async function onGenerate() {
   const prompt = document.getElementById('prompt').value.trim();
   if (!prompt) {
@@ -60,24 +128,13 @@ async function onGenerate() {
   }
   setStatus('正在解析/生成中…', 'loading');
   try {
-    const resp = await fetch(RESOLVE_ENDPOINT, {
-      method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ prompt, vizType: '自动', complexity: '中等' })
-    });
-    if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
-    const data = await resp.json();
-    if (data && data.kind && data.url) {
-      setStatus(data.kind === 'existing' ? '命中已有可视化' : '生成完成', 'ok');
-      showResult(data.url, data.kind);
+    if (window.EventSource) {
+      await resolveByStream(prompt);
     } else {
-      throw new Error('接口返回缺少必要字段');
+      await resolveByPost(prompt);
     }
   } catch (e) {
-    console.error(e);
-    setStatus('生成失败：' + e.message, 'error');
-    const hint = document.getElementById('resultHint');
-    hint.textContent = '请稍后重试，或更换描述再试';
+    showFailure(e);
   }
 }
 
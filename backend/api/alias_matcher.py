@@ -0,0 +1,101 @@
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# 同长度匹配时的字段优先级：别名 > 标题 > id
+PRIORITY_ALIAS = 3
+PRIORITY_TITLE = 2
+PRIORITY_ID = 1
+
+
+class AliasMatcher:
+    """Aho-Corasick 多模式匹配器。
+
+    对提示词单次扫描即可找出全部命中的别名/标题/id。命中冲突时按确定性规则取胜：
+    最长匹配优先，其次字段优先级（别名 > 标题 > id），最后按注册表中的先后顺序。
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, Any, int]]):
+        # 每个状态：转移表、失败指针、该状态结尾的模式（winner 下标）、最近的有输出后缀状态
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[int] = [-1]
+        self._dict_link: List[int] = [-1]
+        # winner: (pattern_len, priority, order, value)
+        self._winners: List[Tuple[int, int, int, Any]] = []
+
+        best_by_pattern: Dict[str, Tuple[int, int, Any]] = {}
+        for order, (pattern, value, priority) in enumerate(patterns):
+            if not pattern:
+                continue
+            current = best_by_pattern.get(pattern)
+            if current is None or (priority, -order) > (current[0], -current[1]):
+                best_by_pattern[pattern] = (priority, order, value)
+
+        for pattern, (priority, order, value) in best_by_pattern.items():
+            state = 0
+            for ch in pattern:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(-1)
+                    self._dict_link.append(-1)
+                state = nxt
+            self._out[state] = len(self._winners)
+            self._winners.append((len(pattern), priority, order, value))
+
+        self._build_links()
+
+    def __len__(self) -> int:
+        return len(self._winners)
+
+    def _build_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                fs = self._fail[nxt]
+                self._dict_link[nxt] = fs if self._out[fs] >= 0 else self._dict_link[fs]
+                queue.append(nxt)
+
+    def iter_matches(self, text: str):
+        """逐个产出 (结束位置, winner) 二元组。"""
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            s = state if self._out[state] >= 0 else self._dict_link[state]
+            while s > 0:
+                yield i, self._winners[self._out[s]]
+                s = self._dict_link[s]
+
+    def best(self, text: str) -> Optional[Any]:
+        best: Optional[Tuple[int, int, int, Any]] = None
+        for _, winner in self.iter_matches(text):
+            if best is None or (winner[0], winner[1], -winner[2]) > (best[0], best[1], -best[2]):
+                best = winner
+        return best[3] if best is not None else None
+
+
+def concept_patterns(concepts: Iterable[Dict[str, Any]], normalize: Callable[[str], str]):
+    """把注册表条目展开为 (归一化模式, 条目下标, 优先级) 序列。
+
+    匹配值取条目在 ``concepts`` 中的下标，调用方据此取回当前快照中的条目。
+    """
+    for i, entry in enumerate(concepts):
+        for alias in entry.get("aliases") or []:
+            yield normalize(str(alias)), i, PRIORITY_ALIAS
+        yield normalize(str(entry.get("title", ""))), i, PRIORITY_TITLE
+        yield normalize(str(entry.get("id", ""))), i, PRIORITY_ID
+
+
+def build_concept_matcher(concepts: Iterable[Dict[str, Any]], normalize: Callable[[str], str]) -> AliasMatcher:
+    return AliasMatcher(concept_patterns(concepts, normalize))
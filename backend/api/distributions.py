@@ -0,0 +1,214 @@
+"""向量化的分布计算：PMF / PDF / CDF 与各阶矩。
+
+所有函数按 numpy 广播规则一次性求值，参数与支撑集可组成网格::
+
+    k = np.arange(31)
+    lam = np.arange(0.5, 15.05, 0.1)
+    pmf = poisson_pmf(k, lam[:, None])      # 形状 (len(lam), 31)，每行对应一个 λ
+
+概率在对数空间计算（gammaln / betaln），大参数不溢出。scipy 可用时使用
+scipy.special；否则退回纯 numpy 实现（沙箱回退代码在无 scipy 环境下也依赖本模块）。
+"""
+import math
+from typing import Dict
+
+import numpy as np
+
+try:
+    from scipy import special as _special
+except ImportError:  # 仅 numpy 的环境
+    _special = None
+
+# Lanczos 近似系数（g = 7），scipy 不可用时用于 gammaln
+_LANCZOS = np.array([
+    0.99999999999980993, 676.5203681218851, -1259.1392167224028, 771.32342877765313,
+    -176.61502916214059, 12.507343278686905, -0.13857109526572012, 9.9843695780195716e-6,
+    1.5056327351493116e-7,
+])
+
+
+def _asfloat(x) -> np.ndarray:
+    return np.asarray(x, dtype=float)
+
+
+def gammaln(x) -> np.ndarray:
+    """log|Γ(x)|。"""
+    x = _asfloat(x)
+    if _special is not None:
+        return _special.gammaln(x)
+    # 反射公式处理 x < 0.5，其余走 Lanczos
+    reflect = x < 0.5
+    z = np.where(reflect, 1.0 - x, x) - 1.0
+    series = _LANCZOS[0] + np.sum(_LANCZOS[1:] / (z[..., None] + np.arange(1, 9)), axis=-1)
+    t = z + 7.5
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lg = 0.5 * math.log(2 * math.pi) + (z + 0.5) * np.log(t) - t + np.log(series)
+        return np.where(reflect, np.log(np.pi / np.abs(np.sin(np.pi * x))) - lg, lg)
+
+
+def betaln(a, b) -> np.ndarray:
+    """log B(a, b)。"""
+    if _special is not None:
+        return _special.betaln(a, b)
+    return gammaln(a) + gammaln(b) - gammaln(_asfloat(a) + _asfloat(b))
+
+
+def _xlogy(x, y) -> np.ndarray:
+    """x·log(y)，x = 0 时为 0。"""
+    if _special is not None:
+        return _special.xlogy(x, y)
+    x, y = np.broadcast_arrays(_asfloat(x), _asfloat(y))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(x == 0, 0.0, x * np.log(y))
+
+
+def _xlog1py(x, y) -> np.ndarray:
+    """x·log(1 + y)，x = 0 时为 0。"""
+    if _special is not None:
+        return _special.xlog1py(x, y)
+    x, y = np.broadcast_arrays(_asfloat(x), _asfloat(y))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(x == 0, 0.0, x * np.log1p(y))
+
+
+def _discrete_cdf(logpmf, k, *params) -> np.ndarray:
+    """无 scipy 时的离散 CDF：在新增的末轴上对 0..max(k) 的 PMF 求和。"""
+    k = np.floor(_asfloat(k))
+    j = np.arange(int(max(np.max(k), 0)) + 1)
+    terms = np.exp(logpmf(j, *(_asfloat(p)[..., None] for p in params)))
+    return np.where(j <= k[..., None], terms, 0.0).sum(axis=-1)
+
+
+# --- 泊松 ---
+
+def poisson_logpmf(k, lam) -> np.ndarray:
+    k = _asfloat(k)
+    logp = _xlogy(k, lam) - _asfloat(lam) - gammaln(k + 1)
+    return np.where((k >= 0) & (k == np.floor(k)), logp, -np.inf)
+
+
+def poisson_pmf(k, lam) -> np.ndarray:
+    return np.exp(poisson_logpmf(k, lam))
+
+
+def poisson_cdf(k, lam) -> np.ndarray:
+    if _special is not None:
+        k = np.floor(_asfloat(k))
+        return np.where(k < 0, 0.0, _special.pdtr(np.maximum(k, 0), lam))
+    return _discrete_cdf(poisson_logpmf, k, lam)
+
+
+def poisson_support(lam: float) -> int:
+    """覆盖到 λ + 6√λ 的最大 k（至少 24），尾部概率可忽略。"""
+    return int(max(24, math.ceil(lam + 6 * math.sqrt(lam))))
+
+
+# --- 二项 ---
+
+def binom_logpmf(k, n, p) -> np.ndarray:
+    k, n = _asfloat(k), _asfloat(n)
+    logc = gammaln(n + 1) - gammaln(k + 1) - gammaln(n - k + 1)
+    with np.errstate(invalid="ignore"):
+        logp = logc + _xlogy(k, p) + _xlog1py(n - k, -_asfloat(p))
+    return np.where((k >= 0) & (k <= n) & (k == np.floor(k)), logp, -np.inf)
+
+
+def binom_pmf(k, n, p) -> np.ndarray:
+    return np.exp(binom_logpmf(k, n, p))
+
+
+def binom_cdf(k, n, p) -> np.ndarray:
+    if _special is not None:
+        # P(X <= k) = I_{1-p}(n - k, k + 1)，k >= n 时为 1
+        k, n = np.floor(_asfloat(k)), _asfloat(n)
+        kc = np.clip(k, 0, np.maximum(n - 1, 0))
+        with np.errstate(invalid="ignore"):
+            tail = _special.betainc(n - kc, kc + 1, 1 - _asfloat(p))
+        return np.where(k < 0, 0.0, np.where(k >= n, 1.0, tail))
+    return _discrete_cdf(binom_logpmf, k, n, p)
+
+
+# --- 正态 ---
+
+def normal_logpdf(x, mu=0.0, sigma=1.0) -> np.ndarray:
+    sigma = _asfloat(sigma)
+    return -0.5 * ((_asfloat(x) - mu) / sigma) ** 2 - np.log(sigma) - 0.5 * math.log(2 * math.pi)
+
+
+def normal_pdf(x, mu=0.0, sigma=1.0) -> np.ndarray:
+    return np.exp(normal_logpdf(x, mu, sigma))
+
+
+def normal_cdf(x, mu=0.0, sigma=1.0) -> np.ndarray:
+    z = (_asfloat(x) - mu) / _asfloat(sigma)
+    if _special is not None:
+        return _special.ndtr(z)
+    return 0.5 * (1.0 + np.vectorize(math.erf, otypes=[float])(z / math.sqrt(2)))
+
+
+# --- Beta ---
+
+def beta_logpdf(x, a, b) -> np.ndarray:
+    """x 超出 [0, 1] 时为 -inf；a 或 b < 1 时端点为 +inf。"""
+    x, a, b = _asfloat(x), _asfloat(a), _asfloat(b)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        logp = _xlogy(a - 1, x) + _xlog1py(b - 1, -x) - betaln(a, b)
+    return np.where((x >= 0) & (x <= 1), logp, -np.inf)
+
+
+def beta_pdf(x, a, b) -> np.ndarray:
+    return np.exp(beta_logpdf(x, a, b))
+
+
+def beta_cdf(x, a, b) -> np.ndarray:
+    if _special is None:
+        raise RuntimeError("beta_cdf 需要 scipy")
+    return _special.betainc(a, b, np.clip(_asfloat(x), 0.0, 1.0))
+
+
+# --- 指数 ---
+
+def expon_pdf(x, lam=1.0) -> np.ndarray:
+    x, lam = _asfloat(x), _asfloat(lam)
+    return np.where(x >= 0, lam * np.exp(-lam * np.maximum(x, 0)), 0.0)
+
+
+def expon_cdf(x, lam=1.0) -> np.ndarray:
+    x, lam = _asfloat(x), _asfloat(lam)
+    return np.where(x >= 0, -np.expm1(-lam * np.maximum(x, 0)), 0.0)
+
+
+# --- 矩 ---
+
+def moments(dist: str, **params) -> Dict[str, np.ndarray]:
+    """均值、方差、标准差、偏度与超额峰度；参数可为数组，结果按广播形状返回。
+
+    ``dist`` 取 poisson(lam) / binom(n, p) / normal(mu, sigma) / beta(a, b) / expon(lam)。
+    """
+    if dist == "poisson":
+        lam = _asfloat(params["lam"])
+        mean, var = lam, lam
+        skew, kurt = 1 / np.sqrt(lam), 1 / lam
+    elif dist == "binom":
+        n, p = _asfloat(params["n"]), _asfloat(params["p"])
+        mean, var = n * p, n * p * (1 - p)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            skew = (1 - 2 * p) / np.sqrt(var)
+            kurt = (1 - 6 * p * (1 - p)) / var
+    elif dist == "normal":
+        mu, sigma = _asfloat(params.get("mu", 0.0)), _asfloat(params.get("sigma", 1.0))
+        mean, var = mu + 0 * sigma, sigma ** 2 + 0 * mu
+        skew = kurt = np.zeros_like(mean)
+    elif dist == "beta":
+        a, b = _asfloat(params["a"]), _asfloat(params["b"])
+        s = a + b
+        mean, var = a / s, a * b / (s ** 2 * (s + 1))
+        skew = 2 * (b - a) * np.sqrt(s + 1) / ((s + 2) * np.sqrt(a * b))
+        kurt = 6 * ((a - b) ** 2 * (s + 1) - a * b * (s + 2)) / (a * b * (s + 2) * (s + 3))
+    elif dist == "expon":
+        lam = _asfloat(params.get("lam", 1.0))
+        mean, var = 1 / lam, 1 / lam ** 2
+        skew, kurt = np.full_like(lam, 2.0), np.full_like(lam, 6.0)
+    else:
+        raise ValueError(f"不支持的分布: {dist}")
+    return {"mean": mean, "var": var, "std": np.sqrt(var), "skew": skew, "kurt": kurt}
@@ -0,0 +1,320 @@
+"""生成图的服务端降采样：执行代码之后、序列化之前按 trace 类型把点数压到预算以内。
+
+质量门槛只要求“点数 > 3”，对上限不做约束；一段生成 1000 万点散点图的代码会产出上百 MB
+的 HTML，浏览器直接卡死。这里在序列化前逐个 trace 检查点数，超出预算时：
+
+- 折线（scatter/scattergl 且 mode 含 lines，或未指定 mode）：LTTB（Largest-Triangle-Three-Buckets，
+  保留视觉形状）或 min-max（每桶保留最小、最大值，峰值不丢）；
+- 散点（mode 只有 markers / text）：密度分箱分层抽样，把绘图区划为网格，每个有点的格子保底
+  1 个点（离群点不丢），其余预算按格内点数成比例分配（密集区与稀疏区的相对密度不变）；
+- 曲面与网格（surface / heatmap / contour 的二维 z）：行列等距重采样，保留首末行列；
+
+同一 trace 中与点一一对应的数组（text、customdata、marker.color、marker.size 等）随之取同样的下标。
+预算由 ``FIGURE_MAX_LINE_POINTS`` / ``FIGURE_MAX_SCATTER_POINTS`` / ``FIGURE_MAX_SURFACE_CELLS``
+配置；降采样记录写入 ``layout.meta.downsample``（页面可据此提示），同时作为统计返回。
+
+与 ``typed_arrays`` 一样只处理 ``data`` 与 ``frames[].data``；其他 trace 类型原样保留。
+"""
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.api.typed_arrays import _as_numeric, _is_typed_spec, decode_array
+from backend.config import (
+    FIGURE_LINE_METHOD,
+    FIGURE_MAX_LINE_POINTS,
+    FIGURE_MAX_SCATTER_POINTS,
+    FIGURE_MAX_SURFACE_CELLS,
+)
+
+_LINE_TYPES = ("scatter", "scattergl")
+_GRID_TYPES = ("surface", "heatmap", "heatmapgl", "contour")
+# 其中的数组与点一一对应（marker.color、error_y.array 等）
+_POINT_GROUPS = ("marker", "line", "error_x", "error_y")
+
+
+# --- 一维：折线 ---
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets：返回保留点的下标（含首末点，升序）。"""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = x.astype(float)
+    y = y.astype(float)
+    # 中间 n-2 个点均分为 n_out-2 个桶
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # 下一个桶的平均点（最后一个桶取末点）
+        if i + 2 < len(edges):
+            nlo, nhi = edges[i + 1], edges[i + 2]
+            cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        # 与上一保留点、下一桶平均点构成三角形面积最大的点
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def minmax(y: np.ndarray, n_out: int) -> np.ndarray:
+    """min-max 抽取：按下标等分为 ``(n_out - 2) // 2`` 个桶，每桶保留最小值与最大值（NaN 忽略；
+    全为 NaN 的桶保留一个 NaN，折线的断点不丢）。返回升序下标，含首末点。"""
+    n = len(y)
+    buckets = max(1, (n_out - 2) // 2)  # 首末点另计
+    if n <= n_out:
+        return np.arange(n)
+    size = math.ceil(n / buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y.astype(float)
+    grid = padded.reshape(buckets, size)
+    missing = np.isnan(grid)
+    starts = np.arange(buckets) * size
+    lo = np.argmin(np.where(missing, np.inf, grid), axis=1)
+    hi = np.argmax(np.where(missing, -np.inf, grid), axis=1)
+    idx = np.concatenate([[0, n - 1], starts + lo, starts + hi])
+    return np.unique(idx[idx < n])
+
+
+# --- 二维：散点与网格 ---
+
+def density_bins(x: np.ndarray, y: np.ndarray, budget: int, seed: int = 0) -> Tuple[np.ndarray, int]:
+    """密度分箱分层抽样：``g × g`` 网格（g² ≤ budget / 4）中每个有点的格子先保留 1 个点，
+    剩余预算按各格点数（减去保底的 1 个）成比例分配，格内随机抽取。
+
+    保底的 1 个点保证离群点不丢；按比例分配保证密集区与稀疏区的相对密度不变
+    （每格只留一个点会把密集区画得和离群点一样稀）。网格只占预算的四分之一，
+    至少四分之三的预算用于按比例分配。随机数种子固定，同一输入结果不变（渲染缓存可复用）。
+
+    返回 (升序下标, g)。非有限值的点（plotly 本就不绘制）丢弃。
+    """
+    g = max(1, int(math.isqrt(max(1, budget // 4))))
+    finite = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+    n = len(finite)
+    if n <= budget:
+        return finite, g
+    xs, ys = x[finite].astype(float), y[finite].astype(float)
+
+    def cell(v: np.ndarray) -> np.ndarray:
+        lo, hi = v.min(), v.max()
+        if hi <= lo:
+            return np.zeros(len(v), dtype=np.int64)
+        return np.minimum(((v - lo) / (hi - lo) * g).astype(np.int64), g - 1)
+
+    keys = cell(xs) * g + cell(ys)
+    # 按 (格子, 随机数) 排序：同一格内的先后次序随机，取前 quota 个即为格内随机抽样
+    order = np.lexsort((np.random.default_rng(seed).random(n), keys))
+    _, starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+    extra = budget - len(counts)
+    quota = 1 + ((counts - 1) * extra) // (n - len(counts))  # 不超过 counts，总数不超过 budget
+    rank = np.arange(n) - np.repeat(starts, counts)
+    keep = order[rank < np.repeat(quota, counts)]
+    return np.sort(finite[keep]), g
+
+
+def grid_shape(rows: int, cols: int, budget: int) -> Tuple[int, int]:
+    """按原宽高比取不超过 ``budget`` 个格点的行列数（每轴至少 2，且不超过原长度）。
+
+    先定短轴，长轴再用满剩余预算。"""
+    short, long = min(rows, cols), max(rows, cols)
+    s = min(short, max(2, int(math.sqrt(budget * short / long))))
+    n = min(long, max(2, budget // s))
+    return (s, n) if rows <= cols else (n, s)
+
+
+def grid_indices(n: int, count: int) -> np.ndarray:
+    """长度 n 的轴等距取 ``count`` 个下标，含首末。"""
+    return np.unique(np.linspace(0, n - 1, min(n, count)).round().astype(np.int64))
+
+
+# --- trace 改写 ---
+
+def _points(value: Any) -> Any:
+    """一维数组（列表、ndarray，类型化数组解码为 ndarray）；不是数组时返回 None。"""
+    if _is_typed_spec(value):
+        return decode_array(value)
+    if isinstance(value, (np.ndarray, list, tuple)):
+        return value
+    return None
+
+
+def _take(value: Any, idx: np.ndarray, n: int) -> Any:
+    """长度为 n 的数组按下标取值，其余原样返回。"""
+    arr = _points(value)
+    if arr is None or len(arr) != n:
+        return value
+    if isinstance(arr, np.ndarray):
+        return arr[idx]
+    return [arr[i] for i in idx]
+
+
+def _point_axis(trace: Dict[str, Any], key: str, n: int) -> np.ndarray:
+    """x / y 的数值坐标；缺省时按 x0/dx 推算，非数值（日期、类别）时用下标代替。"""
+    value = trace.get(key)
+    if value is None:
+        start, step = trace.get(key + "0", 0), trace.get("d" + key, 1)
+        if not all(isinstance(v, (int, float)) for v in (start, step)):
+            return np.arange(n, dtype=float)
+        return start + step * np.arange(n, dtype=float)
+    arr = _as_numeric(value)
+    if arr is None or arr.ndim != 1:
+        return np.arange(n, dtype=float)
+    return arr.astype(float)
+
+
+def _decoded(trace: Dict[str, Any]) -> Dict[str, Any]:
+    """类型化数组（plotly 6 中的 numpy 数组）解码为 ndarray，后续取长度、取下标不再重复解码。"""
+    out = {}
+    for key, value in trace.items():
+        if _is_typed_spec(value):
+            value = decode_array(value)
+        elif isinstance(value, dict) and key in _POINT_GROUPS:
+            value = {k: decode_array(v) if _is_typed_spec(v) else v for k, v in value.items()}
+        out[key] = value
+    return out
+
+
+def _reduce_points(trace: Dict[str, Any], idx: np.ndarray, n: int) -> Dict[str, Any]:
+    """保留 ``idx`` 对应的点：顶层与 marker / line / error_x / error_y 中长度为 n 的数组一并取下标。"""
+    out = dict(trace)
+    for axis in ("x", "y"):
+        if out.get(axis) is None:
+            # 隐式坐标改为显式，取样后位置不变
+            out[axis] = _point_axis(trace, axis, n)
+            out.pop(axis + "0", None)
+            out.pop("d" + axis, None)
+    out.pop("selectedpoints", None)  # 下标指向原数组，取样后失效
+    for key, value in list(out.items()):
+        if isinstance(value, dict) and key in _POINT_GROUPS:
+            out[key] = {k: _take(v, idx, n) for k, v in value.items()}
+        elif not isinstance(value, dict) or _is_typed_spec(value):
+            out[key] = _take(value, idx, n)
+    return out
+
+
+def _trace_kind(trace: Dict[str, Any]) -> Optional[str]:
+    ttype = trace.get("type") or "scatter"
+    if ttype in _GRID_TYPES:
+        return "surface"
+    if ttype not in _LINE_TYPES:
+        return None
+    mode = trace.get("mode")
+    # plotly.js 未指定 mode 时点数 ≥ 20 即画成折线；超出预算的 trace 都在此列
+    if mode is None or "lines" in mode:
+        return "line"
+    return "scatter"
+
+
+class Downsampler:
+    def __init__(
+        self,
+        line_points: int = FIGURE_MAX_LINE_POINTS,
+        scatter_points: int = FIGURE_MAX_SCATTER_POINTS,
+        surface_cells: int = FIGURE_MAX_SURFACE_CELLS,
+        line_method: str = FIGURE_LINE_METHOD,
+    ):
+        if line_method not in ("lttb", "minmax"):
+            raise ValueError(f"未知的折线降采样方法: {line_method}")
+        self.line_points = line_points
+        self.scatter_points = scatter_points
+        self.surface_cells = surface_cells
+        self.line_method = line_method
+        self.reduced: List[Dict[str, Any]] = []
+
+    def trace(self, trace: Dict[str, Any], where: str) -> Dict[str, Any]:
+        kind = _trace_kind(trace)
+        if kind == "surface":
+            return self._grid(trace, where)
+        if kind is None:
+            return trace
+        original, trace = trace, _decoded(trace)
+        points = _points(trace.get("y") if trace.get("y") is not None else trace.get("x"))
+        n = len(points) if points is not None else 0
+        budget = self.line_points if kind == "line" else self.scatter_points
+        if n <= budget:
+            return original
+        xs, ys = _point_axis(trace, "x", n), _point_axis(trace, "y", n)
+        record: Dict[str, Any] = {"trace": where, "kind": kind, "points_before": n}
+        if kind == "scatter":
+            idx, g = density_bins(xs, ys, budget)
+            record.update(method="density_bins", bins=g)
+        elif self.line_method == "lttb" and np.isfinite(ys).all() and np.isfinite(xs).all():
+            idx = lttb(xs, ys, budget)
+            record["method"] = "lttb"
+        else:
+            # 含断点（NaN / None）的折线用 min-max：LTTB 的三角形面积在断点处无定义
+            idx = minmax(ys, budget)
+            record["method"] = "minmax"
+        record["points_after"] = int(len(idx))
+        self.reduced.append(record)
+        return _reduce_points(trace, idx, n)
+
+    def _grid(self, trace: Dict[str, Any], where: str) -> Dict[str, Any]:
+        z = _as_numeric(trace.get("z"))
+        if z is None or z.ndim != 2 or z.size <= self.surface_cells:
+            return trace
+        rows, cols = z.shape
+        r, c = grid_shape(rows, cols, self.surface_cells)
+        ri, ci = grid_indices(rows, r), grid_indices(cols, c)
+        out = dict(trace)
+        for key, value in trace.items():
+            arr = _as_numeric(value) if key in ("x", "y", "z", "surfacecolor", "customdata") else None
+            # 类别轴、文字标注等非数值数组
+            if arr is None and isinstance(value, (list, tuple)) and key in ("x", "y", "text", "hovertext"):
+                arr = np.asarray(value, dtype=object)
+            if arr is None:
+                continue
+            if arr.shape == (rows, cols):
+                out[key] = arr[np.ix_(ri, ci)]
+            elif arr.ndim == 1 and key == "x" and len(arr) == cols:
+                out[key] = arr[ci]
+            elif arr.ndim == 1 and key == "y" and len(arr) == rows:
+                out[key] = arr[ri]
+            if isinstance(out[key], np.ndarray) and out[key].dtype == object:
+                out[key] = out[key].tolist()
+        self.reduced.append({
+            "trace": where, "kind": "surface", "method": "resample",
+            "points_before": int(z.size), "points_after": int(len(ri) * len(ci)),
+            "shape_before": [rows, cols], "shape_after": [int(len(ri)), int(len(ci))],
+        })
+        return out
+
+
+def downsample_figure(fig: Any, **budgets: Any) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """对 Figure（或 figure 字典）中超出预算的 trace 降采样。
+
+    返回 ``(figure 字典, 记录)``；每条记录含 trace 位置、类型、方法与前后点数，
+    有降采样时同样写入 ``layout.meta.downsample``。``budgets`` 可覆盖各类预算与折线方法。
+    """
+    data = fig.to_plotly_json() if hasattr(fig, "to_plotly_json") else dict(fig)
+    sampler = Downsampler(**budgets)
+    out = dict(data)
+    traces = data.get("data") or []
+    out["data"] = [sampler.trace(t, f"data[{i}]") for i, t in enumerate(traces)]
+    if data.get("frames"):
+        base_types = [t.get("type") for t in traces]
+        frames = []
+        for fi, frame in enumerate(data["frames"]):
+            targets = frame.get("traces") or range(len(frame.get("data") or []))
+            reduced = []
+            for j, (t, target) in enumerate(zip(frame.get("data") or [], targets)):
+                # 帧中的 trace 常省略 type，沿用它所更新的 trace 的类型
+                if "type" not in t and isinstance(target, int) and target < len(base_types) and base_types[target]:
+                    t = {**t, "type": base_types[target]}
+                reduced.append(sampler.trace(t, f"frames[{fi}].data[{j}]"))
+            frames.append({**frame, "data": reduced})
+        out["frames"] = frames
+
+    if sampler.reduced:
+        layout = dict(out.get("layout") or {})
+        meta = layout.get("meta")
+        if meta is None or isinstance(meta, dict):
+            layout["meta"] = {**(meta or {}), "downsample": sampler.reduced}
+            out["layout"] = layout
+    return out, sampler.reduced
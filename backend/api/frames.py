@@ -0,0 +1,121 @@
+"""参数网格滑块：整组帧一次计算、一次编码，滑块按下标切换数据。
+
+Plotly 原生滑块的每个 step 都携带一份完整的 restyle 数据，N 帧即 N 份重复的 trace JSON。
+这里改为：
+
+- 帧数据用一次向量化调用算成二维数组（行 = 参数取值，列 = 支撑集），
+  例如 ``binom_pmf(k, n, p_values[:, None])``；
+- 整个网格写入 ``layout.meta.frame_slider``，只序列化一次（6 位有效数字）；
+- 滑块的 step 用 ``method="skip"``，不带数据；页面中的 ``FRAME_SLIDER_SCRIPT``
+  监听 ``plotly_sliderchange``，按下标取出对应行，合并为一次 ``Plotly.update``。
+
+用法::
+
+    slider = FrameSlider([f"p={p:.2f}" for p in ps]).grid(0, pmf_grid, x=k)
+    slider.attach(fig, active=9, currentvalue={"prefix": "p = "})
+    fig.write_html(path, post_script=FRAME_SLIDER_SCRIPT)
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from backend.api.precompute import _compact
+
+# 作为 write_html / to_html 的 post_script；{plot_id} 由 plotly 替换
+FRAME_SLIDER_SCRIPT = """
+(function () {
+  const gd = document.getElementById('{plot_id}');
+  const F = gd.layout.meta && gd.layout.meta.frame_slider;
+  if (!F) return;
+  gd.on('plotly_sliderchange', function (e) {
+    const i = e.slider.active;
+    // 汇总成一次 Plotly.update：各属性按 traces 顺序对齐，缺省项为 undefined（跳过）
+    const traces = [], data = {};
+    function set(trace, attr, value) {
+      let k = traces.indexOf(trace);
+      if (k < 0) k = traces.push(trace) - 1;
+      (data[attr] = data[attr] || [])[k] = value;
+    }
+    F.grids.forEach(function (g) {
+      const n = g.len ? g.len[i] : g.y[i].length;
+      set(g.trace, 'y', g.y[i].slice(0, n));
+      if (g.x) set(g.trace, 'x', g.x.slice(0, n));
+    });
+    F.values.forEach(function (v) { set(v.trace, v.attr, v.frames[i]); });
+    Object.keys(data).forEach(function (attr) {
+      for (let k = 0; k < traces.length; k++) if (!(k in data[attr])) data[attr][k] = undefined;
+    });
+    Plotly.update(gd, data, F.layout ? F.layout[i] : {}, traces);
+  });
+})();
+"""
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class FrameSlider:
+    """按帧下标切换数据的滑块。"""
+
+    def __init__(self, labels: Sequence[str]):
+        self.labels = list(labels)
+        self._grids: List[Dict[str, Any]] = []
+        self._values: List[Dict[str, Any]] = []
+        self._layout: Optional[List[Dict[str, Any]]] = None
+
+    def _check(self, frames: int) -> None:
+        if frames != len(self.labels):
+            raise ValueError(f"帧数 {frames} 与滑块刻度数 {len(self.labels)} 不一致")
+
+    def grid(
+        self,
+        trace: int,
+        y: np.ndarray,
+        x: Optional[Sequence[float]] = None,
+        lengths: Optional[Sequence[int]] = None,
+    ) -> "FrameSlider":
+        """二维网格：第 i 帧把 ``trace`` 的 y 换成 ``y[i]``。
+
+        ``x`` 为各帧共用的横轴；``lengths`` 给出每帧的有效长度（支撑集随参数变化时，
+        如二项分布的 n 扫描，网格按最大支撑集计算，前端截取前 ``lengths[i]`` 个点）。
+        """
+        y = np.asarray(y, dtype=float)
+        if y.ndim != 2:
+            raise ValueError("y 必须为二维数组（帧 × 点）")
+        self._check(y.shape[0])
+        entry: Dict[str, Any] = {"trace": trace, "y": [_compact(row) for row in y]}
+        if x is not None:
+            entry["x"] = _plain(np.asarray(x))
+        if lengths is not None:
+            self._check(len(lengths))
+            entry["len"] = [int(n) for n in lengths]
+        self._grids.append(entry)
+        return self
+
+    def values(self, trace: int, attr: str, frames: Sequence[Any]) -> "FrameSlider":
+        """逐帧的小数据（如期望值线坐标、统计文字）：第 i 帧把 ``trace.attr`` 设为 ``frames[i]``。"""
+        self._check(len(frames))
+        self._values.append({"trace": trace, "attr": attr, "frames": _plain(list(frames))})
+        return self
+
+    def layout(self, frames: Sequence[Dict[str, Any]]) -> "FrameSlider":
+        """逐帧的 relayout 参数（如标题）。"""
+        self._check(len(frames))
+        self._layout = [dict(f) for f in frames]
+        return self
+
+    def attach(self, fig: Any, active: int = 0, **slider_opts: Any) -> Any:
+        """写入 ``layout.meta.frame_slider`` 与滑块配置；调用方负责让第 ``active`` 帧作为初始数据。"""
+        meta = fig.layout.meta
+        meta = dict(meta) if isinstance(meta, dict) else {}
+        meta["frame_slider"] = {"grids": self._grids, "values": self._values, "layout": self._layout}
+        steps = [dict(method="skip", label=label, args=[None]) for label in self.labels]
+        fig.update_layout(meta=meta, sliders=[dict(active=active, steps=steps, **slider_opts)])
+        return fig
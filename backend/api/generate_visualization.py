@@ -1,15 +1,14 @@
 import os
-import time
 from typing import Any, Dict, List
 
+from backend.api.runtime_bundle import fingerprint as runtime_fingerprint, script_tag
+from backend.api.singleflight import generation_flight
+from backend.api.specs import content_addressed_name, spec_hash, write_if_absent
+from backend.api.static_assets import precompress
 from backend.config import ALLOWED_CHARTS, ALLOWED_LIBS, GENERATED_DIR
 
 # --- Utilities ---
 
-def _timestamp() -> str:
-    return time.strftime("%Y%m%d_%H%M%S")
-
-
 def _slugify(text: str) -> str:
     import re
     text = re.sub(r"\s+", "_", text.strip().lower())
@@ -77,64 +76,137 @@ def _validate_spec(spec: Dict[str, Any]) -> None:
 
 # --- HTML build ---
 
+# 模板变更（页面结构）时递增，使旧的内容寻址文件不再被复用
+TEMPLATE_VERSION = "basic/3"
+
+
+def _template_key() -> str:
+    """参与内容哈希的模板标识：模板版本 + 当前引用的前端运行时。"""
+    return f"{TEMPLATE_VERSION};{runtime_fingerprint()}"
+
+
+# 滑块改动参数时的浏览器端重算共用片段
+_JS_LGAMMA = """
+        function lgamma(z) {
+          // Lanczos 近似的对数形式
+          if (z < 0.5) return Math.log(Math.PI / Math.abs(Math.sin(Math.PI * z))) - lgamma(1 - z);
+          const p = [0.99999999999980993, 676.5203681218851, -1259.1392167224028, 771.32342877765313, -176.61502916214059, 12.507343278686905, -0.13857109526572012, 9.9843695780195716e-6, 1.5056327351493116e-7];
+          z -= 1;
+          let x = p[0];
+          for (let i = 1; i < 9; i++) x += p[i] / (z + i);
+          const t = z + 7.5;
+          return 0.5 * Math.log(2 * Math.PI) + (z + 0.5) * Math.log(t) - t + Math.log(x);
+        }"""
+
+_JS_BIND = """
+        function bindSliders(ids, redraw) {
+          const read = () => Object.fromEntries(ids.map(id => [id, parseFloat(document.getElementById(id).value)]));
+          ids.forEach(id => document.getElementById(id).addEventListener('input', e => {
+            document.getElementById(id + '_val').textContent = e.target.value;
+            redraw(read());
+          }));
+        }"""
+
+
+def _slider(pid: str, label: str, lo: float, hi: float, step: float, value: float) -> str:
+    return (
+        f'<label>{label} <input type="range" id="{pid}" min="{lo:g}" max="{hi:g}" step="{step:g}" value="{value:g}">'
+        f' <span id="{pid}_val">{value:g}</span></label>'
+    )
+
+
 def _build_html_from_spec(spec: Dict[str, Any]) -> str:
     """Return a complete HTML file content with CDN imports and Plotly code."""
+    from backend.api import precompute  # numpy/scipy 首次渲染时才导入，不拖慢启动
+
     title = spec.get("title", spec.get("concept", "可视化"))
     chart = spec["chart_type"]
     params = spec.get("params", {})
     plot_code = ""
+    controls = ""
 
     if chart == "pdf" and spec.get("concept") == "normal_distribution":
-        mu = params.get("mu", 0)
-        sigma = params.get("sigma", 1)
+        mu = float(params.get("mu", 0))
+        sigma = float(params.get("sigma", 1)) or 1.0
+        data = precompute.normal_pdf(mu, sigma)
+        controls = _slider("mu", "μ", mu - 2 * sigma, mu + 2 * sigma, sigma / 20, mu) + \
+            _slider("sigma", "σ", sigma / 4, sigma * 2, sigma / 20, sigma)
         plot_code = f"""
-        const mu = {mu};
-        const sigma = {sigma};
-        const xs = Array.from({{length:401}}, (_,i)=>-4+ i*0.02);
-        const ys = xs.map(x => (1/Math.sqrt(2*Math.PI)/sigma) * Math.exp(-0.5*Math.pow((x-mu)/sigma,2)) );
-        Plotly.newPlot('viz', [{{x: xs, y: ys, type: 'scatter', mode:'lines', name:'PDF'}}], {{title: '{title}'}});
+        const DATA = {precompute.to_json(data)};
+        const xs = Array.from({{length: DATA.n}}, (_, i) => DATA.x0 + i * DATA.dx);
+        Plotly.newPlot('viz', [{{x: xs, y: DATA.y, type: 'scatter', mode:'lines', name:'PDF'}}], {{title: '{title}'}});
+        // 仅滑块改动参数时在浏览器重算
+        function pdf(mu, sigma) {{
+          const c = Math.log(sigma) + 0.5 * Math.log(2 * Math.PI);
+          return xs.map(x => Math.exp(-0.5 * Math.pow((x - mu) / sigma, 2) - c));
+        }}
+        {_JS_BIND}
+        bindSliders(['mu', 'sigma'], v => Plotly.restyle('viz', {{y: [pdf(v.mu, v.sigma)]}}));
         """
     elif spec.get("concept") == "beta_distribution":
-        a = params.get("alpha", 2)
-        b = params.get("beta", 5)
+        a = float(params.get("alpha", 2))
+        b = float(params.get("beta", 5))
+        data = precompute.beta_pdf(a, b)
+        top = max(10.0, 2 * a, 2 * b)
+        controls = _slider("alpha", "α", 0.5, top, 0.1, a) + _slider("beta", "β", 0.5, top, 0.1, b)
         plot_code = f"""
-        const alpha = {a};
-        const beta = {b};
-        function betaPDF(x, a, b) {{
-          function gamma(z) {{
-            // Lanczos approximation
-            const g = 7;
-            const p = [0.99999999999980993, 676.5203681218851, -1259.1392167224028, 771.32342877765313, -176.61502916214059, 12.507343278686905, -0.13857109526572012, 9.9843695780195716e-6, 1.5056327351493116e-7];
-            if(z < 0.5) return Math.PI / (Math.sin(Math.PI*z) * gamma(1-z));
-            z -= 1;
-            let x = p[0];
-            for(let i=1; i<g+2; i++) x += p[i]/(z+i);
-            const t = z + g + 0.5;
-            return Math.sqrt(2*Math.PI) * Math.pow(t, z+0.5) * Math.exp(-t) * x;
-          }}
-          const B = gamma(a)*gamma(b)/gamma(a+b);
-          return Math.pow(x, a-1) * Math.pow(1-x, b-1) / B;
+        const DATA = {precompute.to_json(data)};
+        const xs = Array.from({{length: DATA.n}}, (_, i) => DATA.x0 + i * DATA.dx);
+        Plotly.newPlot('viz', [{{x: xs, y: DATA.y, type:'scatter', mode:'lines', name:'PDF'}}], {{title: '{title}'}});
+        // 仅滑块改动参数时在浏览器重算（对数空间，避免 Γ 溢出）
+        {_JS_LGAMMA}
+        function betaPDF(a, b) {{
+          const lb = lgamma(a) + lgamma(b) - lgamma(a + b);
+          return xs.map(x => {{
+            const v = Math.exp((a === 1 ? 0 : (a - 1) * Math.log(x)) + (b === 1 ? 0 : (b - 1) * Math.log1p(-x)) - lb);
+            return isFinite(v) ? v : null;
+          }});
         }}
-        const xs = Array.from({{length:401}}, (_,i)=> i/400);
-        const ys = xs.map(x => betaPDF(x, alpha, beta));
-        Plotly.newPlot('viz', [{{x: xs, y: ys, type:'scatter', mode:'lines', name:'PDF'}}], {{title: '{title}'}});
+        {_JS_BIND}
+        bindSliders(['alpha', 'beta'], v => Plotly.restyle('viz', {{y: [betaPDF(v.alpha, v.beta)]}}));
         """
     elif spec.get("concept") == "poisson_distribution":
-        lam = params.get("lambda", 4)
+        lam = float(params.get("lambda", 4))
+        top = max(20.0, 2 * lam)
+        # k 的范围按滑块上限取，拖动时柱子数量不变
+        data = precompute.poisson_pmf(lam, precompute.poisson_support(top))
+        controls = _slider("lambda", "λ", 0.5, top, 0.5, lam)
+        plot_code = f"""
+        const DATA = {precompute.to_json(data)};
+        const ks = Array.from({{length: DATA.n}}, (_, i) => i);
+        Plotly.newPlot('viz', [{{x: ks, y: DATA.y, type:'bar', name:'PMF'}}], {{title: '{title}'}});
+        // 仅滑块改动参数时在浏览器重算：log k! 累加表 + 对数空间 PMF，λ 很大也不溢出
+        const logFact = ks.reduce((acc, k) => {{ acc.push(k ? acc[k - 1] + Math.log(k) : 0); return acc; }}, []);
+        function pmf(lam) {{ return ks.map(k => Math.exp((k ? k * Math.log(lam) : 0) - lam - logFact[k])); }}
+        {_JS_BIND}
+        bindSliders(['lambda'], v => Plotly.restyle('viz', {{y: [pmf(v.lambda)]}}));
+        """
+    elif spec.get("concept") == "binomial_distribution":
+        n = max(1, int(params.get("n", 20)))
+        prob = min(max(float(params.get("p", 0.4)), 0.01), 0.99)
+        top = max(50, 2 * n)
+        # k 的范围按 n 的滑块上限取，拖动时柱子数量不变（k > n 处为 0）
+        data = precompute.binomial_pmf(n, prob, top)
+        controls = _slider("n", "n", 1, top, 1, n) + _slider("p", "p", 0.01, 0.99, 0.01, prob)
         plot_code = f"""
-        const lambda = {lam};
-        const ks = Array.from({{length:25}}, (_,i)=>i);
-        function pmf(k, lam) {{
-          function fact(n){{return n<=1?1:n*fact(n-1);}}
-          return Math.pow(lam, k) * Math.exp(-lam) / fact(k);
+        const DATA = {precompute.to_json(data)};
+        const ks = Array.from({{length: DATA.n}}, (_, i) => i);
+        Plotly.newPlot('viz', [{{x: ks, y: DATA.y, type:'bar', name:'PMF'}}], {{title: '{title}'}});
+        // 仅滑块改动参数时在浏览器重算：log k! 累加表 + 对数空间 PMF，n 很大也不溢出
+        const logFact = ks.reduce((acc, k) => {{ acc.push(k ? acc[k - 1] + Math.log(k) : 0); return acc; }}, []);
+        function pmf(n, p) {{
+          return ks.map(k => k > n ? 0 : Math.exp(logFact[n] - logFact[k] - logFact[n - k] + k * Math.log(p) + (n - k) * Math.log1p(-p)));
         }}
-        const ys = ks.map(k => pmf(k, lambda));
-        Plotly.newPlot('viz', [{{x: ks, y: ys, type:'bar', name:'PMF'}}], {{title: '{title}'}});
+        {_JS_BIND}
+        bindSliders(['n', 'p'], v => Plotly.restyle('viz', {{y: [pmf(v.n, v.p)]}}));
         """
     else:
         # Generic line placeholder for supported chart types
         plot_code = "Plotly.newPlot('viz', [{y:[0,1,0,1], type:'scatter'}], {title: '可视化'});"
 
+    if controls:
+        controls = f'<div class="controls">{controls}</div>'
+
     html = f"""
 <!DOCTYPE html>
 <html lang="zh-CN">
@@ -142,13 +214,16 @@ def _build_html_from_spec(spec: Dict[str, Any]) -> str:
   <meta charset="UTF-8" />
   <meta name="viewport" content="width=device-width, initial-scale=1.0" />
   <title>{title}</title>
-  <script src="https://cdnjs.cloudflare.com/ajax/libs/plotly.js/2.26.0/plotly.min.js"></script>
+  {script_tag("plotly", GENERATED_DIR)}
   <style>
     body {{ margin:0; font-family: system-ui, -apple-system, Segoe UI, Roboto; background:#f7fafc; }}
-    #viz {{ width: 100%; height: 90vh; }}
+    #viz {{ width: 100%; height: 85vh; }}
+    .controls {{ display:flex; gap:24px; padding:12px 16px; font-size:14px; }}
+    .controls label {{ display:flex; align-items:center; gap:8px; }}
   </style>
 </head>
 <body>
+  {controls}
   <div id="viz"></div>
   <script>
     {plot_code}
@@ -170,13 +245,21 @@ def generate_from_prompt(prompt: str, viz_type: str = "自动", complexity: str
         raise RuntimeError("无法抽取规格：请更换描述或配置生成模型")
     _validate_spec(spec)
 
-    html = _build_html_from_spec(spec)
-
-    os.makedirs(GENERATED_DIR, exist_ok=True)
     cid = spec.get("concept") or _slugify(prompt)
-    fname = f"viz_{_slugify(cid)}_{_timestamp()}.html"
-    fpath = os.path.join(GENERATED_DIR, fname)
-    with open(fpath, "w", encoding="utf-8") as f:
-        f.write(html)
+    # 不同提示词抽取出同一规格时，并发请求共享一次构建与写盘
+    digest = spec_hash(spec, _template_key())
+    fname = generation_flight.do(f"spec:{__name__}:{digest}", _render_to_file, spec, digest)
+
+    return {"id": cid, "title": spec.get("title", cid), "url": f"app/modules/ai_visualizer/generated/{fname}", "aliases": [prompt], "spec_hash": digest}
+
 
-    return {"id": cid, "title": spec.get("title", cid), "url": f"app/modules/ai_visualizer/generated/{fname}", "aliases": [prompt]}
\ No newline at end of file
+def _render_to_file(spec: Dict[str, Any], digest: str) -> str:
+    # 文件名由规格 + 模板版本的哈希决定：已存在即为同一内容，直接复用，不再构建与写盘
+    fname = content_addressed_name(_slugify(str(spec.get("concept") or "viz")), digest)
+    fpath = os.path.join(GENERATED_DIR, fname)
+    if os.path.exists(fpath):
+        return fname
+    html = _build_html_from_spec(spec)
+    if write_if_absent(fpath, html):
+        precompress(fpath)
+    return fname
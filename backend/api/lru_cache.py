@@ -0,0 +1,89 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from backend.api.specs import atomic_write
+
+logger = logging.getLogger("app")
+
+
+class LRUCache:
+    """线程安全的字符串 LRU 缓存，带命中/未命中计数。
+
+    给定 ``persist_dir`` 时每个条目另存为 ``<persist_dir>/<key><suffix>``：内存淘汰或
+    进程重启后仍可从磁盘取回（计为 ``disk_hits``）。key 须为可作文件名的字符串（如内容哈希）。
+    """
+
+    def __init__(self, maxsize: int = 128, persist_dir: Optional[str] = None, suffix: str = ".html"):
+        self.maxsize = maxsize
+        self.persist_dir = persist_dir or None
+        self.suffix = suffix
+        self._data: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.persist_dir, key + self.suffix)
+
+    def _remember(self, key: str, value: str) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+        if self.persist_dir:
+            try:
+                with open(self._disk_path(key), "r", encoding="utf-8") as f:
+                    value = f.read()
+            except OSError:
+                value = None
+            if value is not None:
+                with self._lock:
+                    self._remember(key, value)
+                    self.hits += 1
+                    self.disk_hits += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, value: str) -> None:
+        with self._lock:
+            self._remember(key, value)
+        if self.persist_dir:
+            try:
+                atomic_write(self._disk_path(key), value)
+            except OSError:
+                logger.warning("缓存落盘失败: %s", key, exc_info=True)
+
+    def clear(self) -> None:
+        """清空内存层（磁盘层保留）与计数。"""
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.disk_hits = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
@@ -0,0 +1,139 @@
+"""/app 静态页面的内存缓存：按字节数计量的 LRU。
+
+热门页面（正态、二项、泊松等）命中时直接从内存返回响应体与响应头，不再 stat / open / read。
+失效按源文件 mtime 判断，但同一条目至多每 ``stat_interval`` 秒 stat 一次（与注册表索引的
+``REGISTRY_STAT_INTERVAL`` 同一思路），间隔内的命中不产生任何文件系统调用。
+缓存时客户端可接受、却尚未生成的更优压缩变体（如先缓存了原文件，之后才写出 .br）
+出现后同样视为失效，下次按新变体重新缓存。
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+from backend.config import STATIC_CACHE_BYTES, STATIC_CACHE_MAX_ENTRY_BYTES, STATIC_CACHE_STAT_INTERVAL
+
+
+class CachedPage:
+    __slots__ = ("body", "headers", "source", "mtime_ns", "upgrades", "checked")
+
+    def __init__(
+        self, body: bytes, headers: Dict[str, str], source: str, mtime_ns: int, upgrades: Tuple[str, ...] = ()
+    ):
+        self.body = body
+        self.headers = headers
+        self.source = source  # 用于失效判断的源文件（压缩变体对应的原文件）
+        self.mtime_ns = mtime_ns
+        self.upgrades = upgrades  # 优先于所缓存变体、缓存时尚不可用的变体路径
+        self.checked = time.monotonic()
+
+
+def _variant_ready(path: str, mtime_ns: int) -> bool:
+    """压缩变体存在且与原文件同步（precompress 写出的变体与原文件 mtime 相同）。"""
+    try:
+        return os.stat(path).st_mtime_ns == mtime_ns
+    except OSError:
+        return False
+
+
+class PageCache:
+    """线程安全；总字节数超过 ``max_bytes`` 时从最久未用的一端淘汰。"""
+
+    def __init__(
+        self,
+        max_bytes: int = STATIC_CACHE_BYTES,
+        max_entry_bytes: int = STATIC_CACHE_MAX_ENTRY_BYTES,
+        stat_interval: float = STATIC_CACHE_STAT_INTERVAL,
+    ):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes, max_bytes)
+        self.stat_interval = stat_interval
+        self._data: "OrderedDict[Hashable, CachedPage]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+        self.bytes_served = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _drop(self, key: Hashable) -> None:
+        page = self._data.pop(key, None)
+        if page is not None:
+            self._bytes -= len(page.body)
+
+    def _fresh(self, page: CachedPage) -> bool:
+        now = time.monotonic()
+        if now - page.checked < self.stat_interval:
+            return True
+        try:
+            fresh = os.stat(page.source).st_mtime_ns == page.mtime_ns
+        except OSError:
+            fresh = False
+        if fresh and any(_variant_ready(p, page.mtime_ns) for p in page.upgrades):
+            fresh = False
+        page.checked = now
+        return fresh
+
+    def get(self, key: Hashable) -> Optional[CachedPage]:
+        with self._lock:
+            page = self._data.get(key)
+            if page is not None and not self._fresh(page):
+                self._drop(key)
+                self.invalidations += 1
+                page = None
+            if page is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            self.bytes_served += len(page.body)
+            return page
+
+    def put(self, key: Hashable, page: CachedPage) -> bool:
+        """放入缓存；超过单条上限时不缓存，返回是否放入。"""
+        size = len(page.body)
+        if not self.enabled or size > self.max_entry_bytes:
+            return False
+        with self._lock:
+            self._drop(key)
+            self._data[key] = page
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, old = self._data.popitem(last=False)
+                self._bytes -= len(old.body)
+                self.evictions += 1
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.invalidations = self.evictions = self.bytes_served = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+                "bytes_served": self.bytes_served,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+# /app 挂载共用的进程级缓存
+page_cache = PageCache()
@@ -0,0 +1,57 @@
+"""模板页面的服务端数值预计算。
+
+曲线在生成页面时经 ``backend.api.distributions`` 向量化求值（对数空间），
+以紧凑 JSON 嵌入页面；浏览器只在滑块改动参数时才重算。均匀网格只记录
+``x0/dx/n``，不展开 x 数组；数值保留 6 位有效数字，非有限值记为 null（Plotly 断开）。
+"""
+import json
+import math
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from backend.api import distributions as dist
+from backend.api.distributions import poisson_support
+
+SIGNIFICANT_DIGITS = 6
+
+
+def _compact(values: np.ndarray) -> list:
+    return [float(f"{v:.{SIGNIFICANT_DIGITS}g}") if math.isfinite(v) else None for v in values.tolist()]
+
+
+def _grid_meta(lo: float, hi: float, n: int) -> Dict[str, Any]:
+    return {"x0": lo, "dx": (hi - lo) / (n - 1), "n": n}
+
+
+def normal_pdf(mu: float, sigma: float, lo: Optional[float] = None, hi: Optional[float] = None, n: int = 401) -> Dict[str, Any]:
+    """正态 PDF；默认取 mu ± 4 sigma。"""
+    lo = mu - 4 * sigma if lo is None else lo
+    hi = mu + 4 * sigma if hi is None else hi
+    y = dist.normal_pdf(np.linspace(lo, hi, n), mu, sigma)
+    return {**_grid_meta(lo, hi, n), "y": _compact(y)}
+
+
+def beta_pdf(alpha: float, beta: float, n: int = 401) -> Dict[str, Any]:
+    """Beta PDF，x ∈ [0, 1]；alpha 或 beta < 1 时端点为无穷，记为 null。"""
+    y = dist.beta_pdf(np.linspace(0.0, 1.0, n), alpha, beta)
+    return {**_grid_meta(0.0, 1.0, n), "y": _compact(y)}
+
+
+def poisson_pmf(lam: float, kmax: Optional[int] = None) -> Dict[str, Any]:
+    """泊松 PMF，k = 0..kmax；对数空间求值，λ 很大时不溢出。"""
+    kmax = poisson_support(lam) if kmax is None else kmax
+    y = dist.poisson_pmf(np.arange(kmax + 1), lam)
+    return {"x0": 0, "dx": 1, "n": kmax + 1, "y": _compact(y)}
+
+
+def binomial_pmf(n: int, p: float, kmax: Optional[int] = None) -> Dict[str, Any]:
+    """二项 PMF，k = 0..kmax（默认 n）；k > n 处为 0。"""
+    kmax = n if kmax is None else kmax
+    y = dist.binom_pmf(np.arange(kmax + 1), n, p)
+    return {"x0": 0, "dx": 1, "n": kmax + 1, "y": _compact(y)}
+
+
+def to_json(data: Dict[str, Any]) -> str:
+    """紧凑 JSON，可直接作为 JS 字面量嵌入 <script>。"""
+    return json.dumps(data, separators=(",", ":"), allow_nan=False).replace("</", "<\\/")
@@ -1,8 +1,7 @@
-import json
 import os
-import re
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
+from backend.api.registry_service import _normalize, get_registry_service, id_taken  # noqa: F401
 from backend.config import REGISTRY_PATH
 
 # Ensure parent directory exists
@@ -12,53 +11,48 @@ DEFAULT_REGISTRY: Dict[str, Any] = {
     "concepts": []
 }
 
+# 所有 API 路径（/api/resolve_or_generate、/api/registry 以及 backend/app 下的生成端点）
+# 都经由同一个 RegistryService 读写，共享一份内存快照与一个持久化位置。
+
 
 def load_registry() -> Dict[str, Any]:
-    if not os.path.exists(REGISTRY_PATH):
-        return DEFAULT_REGISTRY.copy()
-    with open(REGISTRY_PATH, "r", encoding="utf-8") as f:
-        try:
-            return json.load(f)
-        except Exception:
-            return DEFAULT_REGISTRY.copy()
+    return get_registry_service().registry()
 
 
 def save_registry(registry: Dict[str, Any]) -> None:
-    os.makedirs(os.path.dirname(REGISTRY_PATH), exist_ok=True)
-    with open(REGISTRY_PATH, "w", encoding="utf-8") as f:
-        json.dump(registry, f, ensure_ascii=False, indent=2)
-
-
-def _normalize(text: str) -> str:
-    return re.sub(r"\s+", "", text.lower())
+    get_registry_service().save(registry)
 
 
 def lookup(prompt: str) -> Optional[Dict[str, Any]]:
     """Simple alias/keyword lookup. Returns matching concept entry or None."""
-    p = _normalize(prompt)
-    registry = load_registry()
-    for entry in registry.get("concepts", []):
-        title = _normalize(entry.get("title", ""))
-        if entry.get("aliases"):
-            for alias in entry["aliases"]:
-                if _normalize(alias) in p or p in _normalize(alias):
-                    return entry
-        if title and (title in p or p in title):
-            return entry
-        # also check id
-        if _normalize(entry.get("id", "")) in p:
-            return entry
-    return None
+    return get_registry_service().lookup(prompt)
+
+
+def search(q: str) -> List[Dict[str, Any]]:
+    """Filter concepts whose normalized title or alias contains ``q``."""
+    return get_registry_service().search(q)
 
 
 def upsert(entry: Dict[str, Any]) -> Dict[str, Any]:
-    registry = load_registry()
-    concepts: List[Dict[str, Any]] = registry.get("concepts", [])
-    existing_idx = next((i for i, c in enumerate(concepts) if c.get("id") == entry.get("id")), None)
-    if existing_idx is not None:
-        concepts[existing_idx] = {**concepts[existing_idx], **entry}
-    else:
-        concepts.append(entry)
-    registry["concepts"] = concepts
-    save_registry(registry)
-    return entry
\ No newline at end of file
+    """按 id 合并写入，不存在则追加。"""
+    return get_registry_service().upsert(entry)
+
+
+def add(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """仅当 id 尚未登记时追加。"""
+    return get_registry_service().add(entry)
+
+
+def upsert_many(entries: List[Dict[str, Any]]) -> int:
+    """批量 upsert，一次写入存储。"""
+    return get_registry_service().upsert_many(entries)
+
+
+def register_generated(cid: str, prompt: str, title: str, url: str, digest: str) -> Tuple[str, List[str]]:
+    """登记生成页，返回实际使用的 (id, aliases)；id 冲突与别名合并见 ``RegistryService.merge_aliases``。"""
+    return get_registry_service().merge_aliases(cid, digest, prompt, {
+        "module": "ai_visualizer",
+        "title": title,
+        "url": url,
+        "type": "generated",
+    })
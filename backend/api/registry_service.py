@@ -0,0 +1,223 @@
+import copy
+import logging
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from backend.api.alias_matcher import AliasMatcher, build_concept_matcher
+from backend.api.registry_store import apply_op, get_store
+from backend.config import (
+    REGISTRY_BACKEND,
+    REGISTRY_DB_PATH,
+    REGISTRY_DB_POOL_SIZE,
+    REGISTRY_PATH,
+    REGISTRY_STAT_INTERVAL,
+)
+
+logger = logging.getLogger("app")
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", "", text.lower())
+
+
+def id_taken(prior: Optional[Dict[str, Any]], digest: Optional[str]) -> bool:
+    """同名条目是手写页面或其他规格的生成页时不能复用该 id（调用方改用带哈希后缀的 id）。"""
+    if prior is None:
+        return False
+    return prior.get("type") != "generated" or prior.get("spec_hash") not in (None, digest)
+
+
+class RegistrySnapshot:
+    """某一时刻注册表的只读快照：条目、预归一化字段与 Aho-Corasick 匹配器。
+
+    快照创建后不再修改；写入时复制出新快照并整体替换引用，读者无需加锁。
+    """
+
+    __slots__ = ("concepts", "stamp", "_entries", "_matcher", "_by_id")
+
+    def __init__(self, concepts: List[Dict[str, Any]], stamp: Any = None):
+        self.concepts = concepts
+        self.stamp = stamp
+        # (归一化别名, 归一化标题)
+        self._entries: List[Tuple[List[str], str]] = [
+            ([_normalize(str(a)) for a in c.get("aliases") or []], _normalize(str(c.get("title", ""))))
+            for c in concepts
+        ]
+        self._matcher: AliasMatcher = build_concept_matcher(concepts, _normalize)
+        # id -> 下标；与 apply_op 一致，重复 id 取第一条
+        self._by_id: Dict[Any, int] = {}
+        for i, c in enumerate(concepts):
+            self._by_id.setdefault(c.get("id"), i)
+
+    def get(self, cid: str) -> Optional[Dict[str, Any]]:
+        idx = self._by_id.get(cid)
+        return self.concepts[idx] if idx is not None else None
+
+    def lookup(self, prompt: str) -> Optional[Dict[str, Any]]:
+        """别名/标题/id 出现在提示词中时命中，冲突按 AliasMatcher 的规则取胜。
+
+        未命中时再检查提示词是否为某个别名或标题的片段（按注册表顺序）。
+        """
+        p = _normalize(prompt)
+        hit = self._matcher.best(p)
+        if hit is not None:
+            return self.concepts[hit]
+        if not p:
+            return None
+        for concept, (aliases, title) in zip(self.concepts, self._entries):
+            if any(p in alias for alias in aliases) or p in title:
+                return concept
+        return None
+
+    def search(self, q: str) -> List[Dict[str, Any]]:
+        nq = _normalize(q)
+        return [
+            concept for concept, (aliases, title) in zip(self.concepts, self._entries)
+            if nq in title or any(nq in a for a in aliases)
+        ]
+
+
+Listener = Callable[[RegistrySnapshot], None]
+
+
+class RegistryService:
+    """进程内唯一的注册表服务。
+
+    - 持有单个内存快照，仅当底层存储的 stamp 变化时重新加载（stat 按 ``stat_interval`` 节流）；
+    - 写入先落到存储（JSON 预写日志或 SQLite），再以写时复制生成新快照；新快照沿用写前
+      基准的 stamp（整体替换时不带 stamp），下次 stat 必然不一致而从存储重载，
+      期间其他进程写入的条目不会被遮蔽；
+    - ``subscribe`` 注册变更回调，每次快照替换后调用；
+    - 所有 API 路径共享同一持久化位置，命中/未命中结果一致。
+    """
+
+    def __init__(self, store: Any, stat_interval: float = 1.0):
+        self.store = store
+        self.stat_interval = stat_interval
+        self._lock = threading.RLock()
+        self._snapshot: Optional[RegistrySnapshot] = None
+        self._checked_at = 0.0
+        self._listeners: List[Listener] = []
+
+    # --- snapshot management ---
+
+    def _swap(self, snapshot: RegistrySnapshot) -> None:
+        self._snapshot = snapshot
+        for listener in list(self._listeners):
+            try:
+                listener(snapshot)
+            except Exception:
+                logger.exception("注册表变更回调失败")
+
+    def snapshot(self, force: bool = False) -> RegistrySnapshot:
+        """返回当前快照；``force`` 跳过 stat 节流（文件未变时仍不解析）。"""
+        snap = self._snapshot
+        now = time.monotonic()
+        if snap is not None and not force and now - self._checked_at < self.stat_interval:
+            return snap
+        with self._lock:
+            self._checked_at = now
+            stamp = self.store.stamp()
+            if self._snapshot is not None and stamp == self._snapshot.stamp:
+                return self._snapshot
+            self._swap(RegistrySnapshot(self.store.load().get("concepts", []), stamp))
+            return self._snapshot
+
+    def subscribe(self, listener: Listener) -> Callable[[], None]:
+        """注册快照变更回调，返回取消订阅函数。"""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    # --- reading ---
+
+    # 读路径不复制条目：快照中的条目从不原地修改（写入时深拷贝并整体替换），
+    # 返回值与快照共享，调用方只读，需要修改时自行复制。
+
+    def registry(self) -> Dict[str, Any]:
+        return {"concepts": list(self.snapshot().concepts)}
+
+    def lookup(self, prompt: str) -> Optional[Dict[str, Any]]:
+        return self.snapshot().lookup(prompt)
+
+    def search(self, q: str) -> List[Dict[str, Any]]:
+        if hasattr(self.store, "search"):
+            return self.store.search(q)
+        return self.snapshot().search(q)
+
+    # --- writing ---
+
+    def _write(self, op: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+        entry = copy.deepcopy(entry)
+        with self._lock:
+            base = self.snapshot(force=True)
+            getattr(self.store, op)(entry)
+            registry = {"concepts": list(base.concepts)}
+            apply_op(registry, op, entry)
+            self._swap(RegistrySnapshot(registry["concepts"], base.stamp))
+        return entry
+
+    def upsert(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """按 id 合并，不存在则追加。"""
+        return self._write("upsert", entry)
+
+    def add(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """仅当 id 不存在时追加。"""
+        return self._write("add", entry)
+
+    def upsert_many(self, entries: List[Dict[str, Any]]) -> int:
+        """批量 upsert：存储只写一次，快照只替换一次。"""
+        entries = copy.deepcopy(entries)
+        with self._lock:
+            base = self.snapshot(force=True)
+            self.store.upsert_many(entries)
+            registry = {"concepts": list(base.concepts)}
+            for entry in entries:
+                apply_op(registry, "upsert", entry)
+            self._swap(RegistrySnapshot(registry["concepts"], base.stamp))
+        return len(entries)
+
+    def merge_aliases(self, cid: str, digest: str, prompt: str, entry: Dict[str, Any]) -> Tuple[str, List[str]]:
+        """登记生成页，返回实际使用的 (id, aliases)。
+
+        不覆盖手写条目与其他规格的生成页（改用 ``<id>_<哈希前 8 位>``）；同一规格已登记时
+        把 ``prompt`` 并入已有别名。读取现有条目与写入在同一把锁内完成，并发登记不会互相覆盖别名。
+        """
+        with self._lock:
+            snap = self.snapshot(force=True)
+            prior = snap.get(cid)
+            if id_taken(prior, digest):
+                cid = f"{cid}_{digest[:8]}"
+                prior = snap.get(cid)
+            aliases = list((prior or {}).get("aliases") or [])
+            if prompt not in aliases:
+                aliases.append(prompt)
+            self._write("upsert", {"id": cid, "aliases": aliases, **entry, "spec_hash": digest})
+        return cid, aliases
+
+    def save(self, registry: Dict[str, Any]) -> None:
+        """整体替换注册表。"""
+        registry = copy.deepcopy(registry)
+        with self._lock:
+            self.store.save(registry)
+            self._swap(RegistrySnapshot(registry.get("concepts", []), None))
+
+
+_service: Optional[RegistryService] = None
+_service_lock = threading.Lock()
+
+
+def get_registry_service() -> RegistryService:
+    """进程级单例；``REGISTRY_BACKEND=sqlite`` 时底层改用 SQLite 存储。"""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                if REGISTRY_BACKEND == "sqlite":
+                    from backend.api.registry_sqlite import SQLiteRegistry
+                    store = SQLiteRegistry(REGISTRY_DB_PATH, pool_size=REGISTRY_DB_POOL_SIZE)
+                else:
+                    store = get_store(REGISTRY_PATH)
+                _service = RegistryService(store, stat_interval=REGISTRY_STAT_INTERVAL)
+    return _service
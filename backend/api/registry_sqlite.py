@@ -0,0 +1,212 @@
+"""SQLite 注册表后端（可选）。
+
+通过环境变量 ``REGISTRY_BACKEND=sqlite`` 启用，对外保持与 JSON 注册表相同的
+load/search/upsert/add/append 存储接口，由 RegistryService 持有：
+
+- ``concepts`` 表按 id 建唯一索引，保存完整条目 JSON，rowid 即登记顺序；
+- ``concepts_fts`` 为 FTS5（trigram 分词）虚表，rowid 与 ``concepts`` 对应，
+  索引归一化后的标题与别名，
+  ``/api/registry?q=`` 的子串搜索不再逐条归一化；
+- 连接开启 WAL 模式并放入连接池复用；
+- ``meta.version`` 每次写入递增，作为 RegistryService 判断是否重新加载的 stamp。
+
+一次性迁移现有 registry.json::
+
+    python -m backend.api.registry_sqlite [--db 路径] [registry.json ...]
+"""
+import argparse
+import contextlib
+import json
+import os
+import queue
+import sqlite3
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from backend.api.registry_service import _normalize
+from backend.api.registry_store import get_store
+
+_SEP = "\x1f"  # 拼接多个别名时的分隔符，避免跨别名误匹配
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS concepts (
+    rid   INTEGER PRIMARY KEY,
+    id    TEXT NOT NULL UNIQUE,
+    data  TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS concepts_fts USING fts5(
+    title, aliases, tokenize = 'trigram'
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta(key, value) VALUES ('version', 0);
+"""
+
+
+class SQLiteRegistry:
+    def __init__(self, db_path: str, pool_size: int = 4):
+        self.db_path = db_path
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=pool_size)
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    # --- connection pool ---
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextlib.contextmanager
+    def _conn(self) -> Iterator[sqlite3.Connection]:
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            try:
+                self._pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    # --- reading ---
+
+    def stamp(self) -> int:
+        with self._conn() as conn:
+            return conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    def load(self) -> Dict[str, Any]:
+        with self._conn() as conn:
+            rows = conn.execute("SELECT data FROM concepts ORDER BY rid").fetchall()
+        return {"concepts": [json.loads(r[0]) for r in rows]}
+
+    def get(self, cid: str) -> Optional[Dict[str, Any]]:
+        with self._conn() as conn:
+            row = conn.execute("SELECT data FROM concepts WHERE id = ?", (cid,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def search(self, q: str, limit: int = 200) -> List[Dict[str, Any]]:
+        nq = _normalize(q)
+        with self._conn() as conn:
+            if len(nq) >= 3:
+                rows = conn.execute(
+                    "SELECT c.data FROM concepts_fts f JOIN concepts c ON c.rid = f.rowid "
+                    "WHERE concepts_fts MATCH ? ORDER BY c.rid LIMIT ?",
+                    ('"' + nq.replace('"', '""') + '"', limit),
+                ).fetchall()
+            else:
+                # trigram 无法索引少于 3 个字符的查询，退化为子串扫描
+                rows = conn.execute(
+                    "SELECT c.data FROM concepts_fts f JOIN concepts c ON c.rid = f.rowid "
+                    "WHERE instr(f.title, ?) > 0 OR instr(f.aliases, ?) > 0 ORDER BY c.rid LIMIT ?",
+                    (nq, nq, limit),
+                ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    # --- writing ---
+
+    def _write_entry(self, conn: sqlite3.Connection, entry: Dict[str, Any], op: str = "upsert") -> Dict[str, Any]:
+        cid = str(entry.get("id", ""))
+        row = conn.execute("SELECT rid, data FROM concepts WHERE id = ?", (cid,)).fetchone()
+        if row and op == "add":
+            return json.loads(row[1])
+        if row:
+            rid = row[0]
+            merged = {**json.loads(row[1]), **entry}
+            conn.execute("UPDATE concepts SET data = ? WHERE rid = ?",
+                         (json.dumps(merged, ensure_ascii=False), rid))
+            conn.execute("DELETE FROM concepts_fts WHERE rowid = ?", (rid,))
+        else:
+            merged = dict(entry)
+            rid = conn.execute(
+                "INSERT INTO concepts(id, data) VALUES (?, ?)",
+                (cid, json.dumps(merged, ensure_ascii=False)),
+            ).lastrowid
+        conn.execute(
+            "INSERT INTO concepts_fts(rowid, title, aliases) VALUES (?, ?, ?)",
+            (
+                rid,
+                _normalize(str(merged.get("title", ""))),
+                _SEP.join(_normalize(str(a)) for a in merged.get("aliases") or []),
+            ),
+        )
+        return merged
+
+    @contextlib.contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._conn() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def upsert(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        with self._transaction() as conn:
+            self._write_entry(conn, entry)
+        return entry
+
+    def add(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        with self._transaction() as conn:
+            self._write_entry(conn, entry, op="add")
+        return entry
+
+    def upsert_many(self, entries: Iterable[Dict[str, Any]]) -> int:
+        count = 0
+        with self._transaction() as conn:
+            for entry in entries:
+                self._write_entry(conn, entry)
+                count += 1
+        return count
+
+    def save(self, registry: Dict[str, Any]) -> None:
+        """整体替换注册表内容。"""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM concepts")
+            conn.execute("DELETE FROM concepts_fts")
+            for entry in registry.get("concepts", []):
+                self._write_entry(conn, entry)
+
+
+def migrate_from_json(json_paths: Iterable[str], db_path: str) -> int:
+    """把一个或多个 registry.json（含未压实的预写日志）导入 SQLite；同 id 后者覆盖前者。"""
+    db = SQLiteRegistry(db_path)
+    total = 0
+    try:
+        for path in json_paths:
+            if not os.path.exists(path):
+                continue
+            total += db.upsert_many(get_store(path).load().get("concepts", []))
+    finally:
+        db.close()
+    return total
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from backend.config import REGISTRY_DB_PATH, REGISTRY_PATH
+
+    parser = argparse.ArgumentParser(description="把 registry.json 迁移到 SQLite 注册表")
+    parser.add_argument("--db", default=REGISTRY_DB_PATH, help="目标 SQLite 文件")
+    parser.add_argument("sources", nargs="*", default=[REGISTRY_PATH], help="源 registry.json 文件")
+    args = parser.parse_args(argv)
+    n = migrate_from_json(args.sources, args.db)
+    print(f"已导入 {n} 条概念到 {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+import atexit
+import contextlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl  # POSIX 文件锁；Windows 下退化为仅进程内加锁
+except ImportError:
+    fcntl = None
+
+from backend.config import REGISTRY_FLUSH_DELAY, REGISTRY_MAX_PENDING
+
+logger = logging.getLogger("app")
+
+
+def _empty_registry() -> Dict[str, Any]:
+    return {"concepts": []}
+
+
+def apply_op(registry: Dict[str, Any], op: str, entry: Dict[str, Any]) -> None:
+    """把一条日志操作应用到内存中的注册表。
+
+    - upsert: 按 id 合并，不存在则追加
+    - add:    仅当 id 不存在时追加
+    - append: 无条件追加
+    """
+    concepts: List[Dict[str, Any]] = registry.setdefault("concepts", [])
+    if op == "append":
+        concepts.append(entry)
+        return
+    idx = next((i for i, c in enumerate(concepts) if c.get("id") == entry.get("id")), None)
+    if idx is None:
+        concepts.append(entry)
+    elif op == "upsert":
+        concepts[idx] = {**concepts[idx], **entry}
+
+
+class RegistryStore:
+    """带文件锁、原子写入与预写日志的注册表存储。
+
+    每次 upsert 只向 ``<path>.wal`` 追加一行 JSON（O(1) I/O）；一段时间内的多次
+    写入由后台定时器合并为一次压实：读取主文件、重放日志、写临时文件后
+    ``os.replace`` 原子替换，并清空日志。所有读写都在 ``<path>.lock`` 文件锁下进行，
+    多进程并发写不会丢更新，也不会产生半截文件。
+    """
+
+    def __init__(self, path: str, flush_delay: float = 0.5, max_pending: int = 256):
+        self.path = path
+        self.wal_path = path + ".wal"
+        self.lock_path = path + ".lock"
+        self.flush_delay = flush_delay
+        self.max_pending = max_pending
+        self._mutex = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        self._pending = 0
+
+    # --- locking ---
+
+    @contextlib.contextmanager
+    def _locked(self, exclusive: bool = True) -> Iterator[None]:
+        with self._mutex:
+            if fcntl is None:
+                yield
+                return
+            os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+            with open(self.lock_path, "a+") as lf:
+                fcntl.flock(lf, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lf, fcntl.LOCK_UN)
+
+    # --- reading ---
+
+    def stamp(self) -> Tuple[Optional[Tuple[int, int]], Optional[Tuple[int, int]]]:
+        """主文件与日志的 (mtime_ns, size)，任一变化即表示内容可能变化。"""
+        def _stat(p: str) -> Optional[Tuple[int, int]]:
+            try:
+                st = os.stat(p)
+            except OSError:
+                return None
+            return st.st_mtime_ns, st.st_size
+        return _stat(self.path), _stat(self.wal_path)
+
+    def _read_base(self) -> Dict[str, Any]:
+        if not os.path.exists(self.path):
+            return _empty_registry()
+        with open(self.path, "r", encoding="utf-8") as f:
+            try:
+                return json.load(f)
+            except Exception:
+                logger.warning("注册表解析失败，按空注册表处理: %s", self.path)
+                return _empty_registry()
+
+    def _replay_wal(self, registry: Dict[str, Any]) -> int:
+        if not os.path.exists(self.wal_path):
+            return 0
+        applied = 0
+        with open(self.wal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    # 崩溃留下的半行，忽略
+                    continue
+                apply_op(registry, rec.get("op", "upsert"), rec.get("entry") or {})
+                applied += 1
+        return applied
+
+    def load(self) -> Dict[str, Any]:
+        with self._locked(exclusive=False):
+            registry = self._read_base()
+            self._replay_wal(registry)
+            return registry
+
+    # --- writing ---
+
+    def _atomic_write(self, registry: Dict[str, Any]) -> None:
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".registry.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(registry, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp)
+            raise
+
+    def _append_wal(self, *records: Dict[str, Any]) -> None:
+        os.makedirs(os.path.dirname(self.wal_path), exist_ok=True)
+        line = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records).encode("utf-8")
+        with open(self.wal_path, "a+b") as f:
+            # 上次崩溃可能留下不以换行结尾的半行，先补换行再追加
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    line = b"\n" + line
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _truncate_wal(self) -> None:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.wal_path)
+
+    def save(self, registry: Dict[str, Any]) -> None:
+        """整体替换注册表（原子写入并清空日志）。"""
+        with self._locked():
+            self._atomic_write(registry)
+            self._truncate_wal()
+            self._pending = 0
+
+    def _log(self, op: str, *entries: Dict[str, Any]) -> None:
+        with self._locked():
+            self._append_wal(*({"op": op, "entry": e} for e in entries))
+            self._pending += len(entries)
+            pending = self._pending
+        if pending >= self.max_pending:
+            self.flush()
+        else:
+            self._schedule_flush()
+
+    def upsert(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        self._log("upsert", entry)
+        return entry
+
+    def add(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        self._log("add", entry)
+        return entry
+
+    def append(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        self._log("append", entry)
+        return entry
+
+    def upsert_many(self, entries: List[Dict[str, Any]]) -> int:
+        """一次追加多条 upsert（单次加锁、单次 fsync）。"""
+        if entries:
+            self._log("upsert", *entries)
+        return len(entries)
+
+    def _schedule_flush(self) -> None:
+        with self._mutex:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(self.flush_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> None:
+        """把日志压实进主文件。"""
+        with self._mutex:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        with self._locked():
+            registry = self._read_base()
+            if not self._replay_wal(registry):
+                return
+            self._atomic_write(registry)
+            self._truncate_wal()
+            self._pending = 0
+
+
+_stores: Dict[str, RegistryStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path: str) -> RegistryStore:
+    """同一路径在进程内共享一个 RegistryStore。"""
+    key = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = RegistryStore(
+                key, flush_delay=REGISTRY_FLUSH_DELAY, max_pending=REGISTRY_MAX_PENDING
+            )
+        return store
+
+
+@atexit.register
+def _flush_all() -> None:
+    for store in list(_stores.values()):
+        with contextlib.suppress(Exception):
+            store.flush()
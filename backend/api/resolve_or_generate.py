@@ -3,8 +3,9 @@ from typing import Any, Dict, Optional
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 
-from backend.api.registry_ops import lookup, upsert, load_registry
+from backend.api.registry_ops import _normalize, lookup, load_registry, register_generated, search
 from backend.api.generate_visualization import generate_from_prompt
+from backend.api.singleflight import generation_flight
 
 router = APIRouter()
 
@@ -25,28 +26,25 @@ def resolve_or_generate(req: ResolveRequest) -> Dict[str, Any]:
     if hit:
         return {"kind": "existing", "url": hit["url"], "source": "registry"}
 
+    viz_type, complexity = req.vizType or "自动", req.complexity or "中等"
+    # 同一提示词的并发请求只生成一次，其余请求等待并共享结果
+    key = f"prompt:{_normalize(p)}|{viz_type}|{complexity}"
+    return generation_flight.do(key, _generate_and_register, p, viz_type, complexity)
+
+
+def _generate_and_register(p: str, viz_type: str, complexity: str) -> Dict[str, Any]:
     try:
-        result = generate_from_prompt(p, req.vizType or "自动", req.complexity or "中等")
+        result = generate_from_prompt(p, viz_type, complexity)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    upsert({
-        "id": result["id"],
-        "aliases": result.get("aliases", [p]),
-        "module": "ai_visualizer",
-        "title": result.get("title", result["id"]),
-        "url": result["url"],
-        "type": "generated",
-    })
+    # 不覆盖同 id 的手写条目；同一规格已登记时只合并别名
+    register_generated(result["id"], p, result.get("title", result["id"]), result["url"], result["spec_hash"])
     return {"kind": "generated", "url": result["url"], "source": "generator"}
 
 
 @router.get("/api/registry")
 def get_registry(q: Optional[str] = None) -> Dict[str, Any]:
-    reg = load_registry()
     if q:
-        from backend.api.registry_ops import _normalize
-        nq = _normalize(q)
-        concepts = [c for c in reg.get("concepts", []) if nq in _normalize(c.get("title", "")) or any(nq in _normalize(a) for a in c.get("aliases", []))]
-        return {"concepts": concepts}
-    return reg
\ No newline at end of file
+        return {"concepts": search(q)}
+    return load_registry()
\ No newline at end of file
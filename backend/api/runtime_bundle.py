@@ -0,0 +1,228 @@
+"""共享前端运行时：固定版本、本地托管、文件名带内容哈希的 Plotly / Three.js。
+
+生成页面与旧页面原先各自从不同 CDN 加载不同版本的 plotly.js（cdnjs 2.26.0、cdn.plot.ly
+2.27.0 / 2.31.1、plotly.py 的 ``include_plotlyjs="cdn"``），浏览器按版本各缓存一份，断网即不可用。
+这里统一为一份运行时::
+
+    python -m backend.api.runtime_bundle build             # 写入 app/lib/runtime/ 与 manifest.json
+    python -m backend.api.runtime_bundle build --plotly-file plotly.min.js --three-file three.min.js
+    python -m backend.api.runtime_bundle migrate            # 改写 app/modules 下页面的 <script src>
+    python -m backend.api.runtime_bundle migrate --dry-run
+
+- 版本由 ``PLOTLY_JS_VERSION`` / ``THREE_JS_VERSION`` 固定。plotly.js 取 2.x 最后一版：现有页面与
+  模板都按 2.x 编写（如字符串形式的 ``title``），且 2.28 起支持类型化数组（``bdata``）；
+- 文件名为 ``<name>-<version>.<sha256 前 16 位>.min.js``，静态层据此给出 immutable 缓存；
+  构建只新增、不删除旧文件，已生成页面引用的旧运行时仍可访问；
+- 运行时来源依次为：命令行给出的本地文件、已安装 plotly 包自带且版本一致的 plotly.min.js、
+  固定版本的 CDN 地址（仅构建时联网一次）；
+- 未构建时 ``script_tag`` 退回同一固定版本的 CDN 地址，开发环境照常可用。
+"""
+import argparse
+import functools
+import hashlib
+import json
+import logging
+import os
+import re
+import urllib.request
+from typing import Any, Dict, Iterable, List, Optional
+
+from backend.api.specs import atomic_write, atomic_write_bytes
+from backend.config import PLOTLY_JS_VERSION, STATIC_APP_DIR, THREE_JS_VERSION
+
+logger = logging.getLogger("app")
+
+RUNTIME_DIR = os.path.join(STATIC_APP_DIR, "lib", "runtime")
+RUNTIME_URL = "/app/lib/runtime/"
+MANIFEST_PATH = os.path.join(RUNTIME_DIR, "manifest.json")
+
+RUNTIMES: Dict[str, Dict[str, str]] = {
+    "plotly": {"version": PLOTLY_JS_VERSION, "cdn": "https://cdn.plot.ly/plotly-{version}.min.js"},
+    "three": {"version": THREE_JS_VERSION, "cdn": "https://unpkg.com/three@{version}/build/three.min.js"},
+}
+
+# 页面中指向各运行时的 <script src>：常见 CDN 写法，以及此前迁移过的本地运行时
+_SRC_PATTERNS = {
+    "plotly": re.compile(
+        r"(?:cdn\.plot\.ly/plotly-[\d.]+(?:\.min)?\.js"
+        r"|/plotly\.js/[\d.]+/plotly(?:\.min)?\.js"
+        r"|/plotly\.js(?:-dist(?:-min)?)?@[\d.]+/(?:dist/)?plotly(?:\.min)?\.js"
+        r"|lib/runtime/plotly-[^\"'/]+\.js)$"
+    ),
+    "three": re.compile(
+        r"(?:/three@[\d.]+/build/three(?:\.min)?\.js"
+        r"|/three\.js/r?[\d.]+/three(?:\.min)?\.js"
+        r"|lib/runtime/three-[^\"'/]+\.js)$"
+    ),
+}
+_SCRIPT_TAG = re.compile(r"<script\b[^>]*>", re.I)
+_SRC_ATTR = re.compile(r"""\ssrc\s*=\s*(["'])([^"']*)\1""", re.I)
+# 指向 CDN 的 SRI 与跨域属性，换成本地文件后需去掉
+_CDN_ATTRS = re.compile(r"""\s(?:integrity|crossorigin|referrerpolicy)(?:\s*=\s*(["'])[^"']*\1)?""", re.I)
+
+
+def _bundled_plotly(version: str) -> Optional[bytes]:
+    """已安装 plotly 包自带的 plotly.min.js（版本一致时）。"""
+    try:
+        import plotly
+        from plotly.offline import get_plotlyjs_version
+    except ImportError:
+        return None
+    if get_plotlyjs_version() != version:
+        return None
+    path = os.path.join(os.path.dirname(plotly.__file__), "package_data", "plotly.min.js")
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _fetch(name: str, version: str, local_file: Optional[str], download: bool) -> bytes:
+    if local_file:
+        with open(local_file, "rb") as f:
+            return f.read()
+    if name == "plotly":
+        data = _bundled_plotly(version)
+        if data is not None:
+            return data
+    if not download:
+        raise RuntimeError(f"{name} {version}: 未提供本地文件且禁止下载")
+    url = RUNTIMES[name]["cdn"].format(version=version)
+    logger.info("下载 %s", url)
+    with urllib.request.urlopen(url, timeout=60) as rsp:
+        return rsp.read()
+
+
+def build(files: Optional[Dict[str, str]] = None, download: bool = True) -> Dict[str, Any]:
+    """写入带内容哈希的运行时文件（含 .gz / .br 变体）并更新 manifest，返回 manifest。"""
+    from backend.api.static_assets import precompress
+
+    files = files or {}
+    manifest: Dict[str, Any] = {}
+    for name, runtime in RUNTIMES.items():
+        version = runtime["version"]
+        data = _fetch(name, version, files.get(name), download)
+        if version not in data[:4096].decode("utf-8", "replace") and name == "plotly":
+            # plotly.min.js 开头的版权注释带版本号，防止拿错文件
+            raise RuntimeError(f"plotly 运行时版本与 PLOTLY_JS_VERSION={version} 不符")
+        digest = hashlib.sha256(data).hexdigest()
+        fname = f"{name}-{version}.{digest[:16]}.min.js"
+        path = os.path.join(RUNTIME_DIR, fname)
+        if not os.path.exists(path):
+            atomic_write_bytes(path, data)
+        precompress(path)
+        manifest[name] = {"version": version, "file": fname, "sha256": digest, "bytes": len(data)}
+    atomic_write(MANIFEST_PATH, json.dumps(manifest, ensure_ascii=False, indent=2))
+    _load_manifest.cache_clear()
+    return manifest
+
+
+@functools.lru_cache(maxsize=4)
+def _load_manifest(mtime_ns: int) -> Dict[str, Any]:
+    with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_manifest() -> Dict[str, Any]:
+    """已构建的运行时；未构建时为空字典。按 mtime 缓存，每次调用只 stat 一次。"""
+    try:
+        return _load_manifest(os.stat(MANIFEST_PATH).st_mtime_ns)
+    except (OSError, ValueError):
+        return {}
+
+
+def runtime_url(name: str, page_dir: Optional[str] = None) -> str:
+    """运行时地址：已构建时为本地文件（给出 ``page_dir`` 时为相对该目录的路径，
+    file:// 打开也可用；否则为 ``/app/lib/runtime/...``），未构建时为固定版本的 CDN 地址。"""
+    entry = load_manifest().get(name)
+    if entry is None:
+        return RUNTIMES[name]["cdn"].format(version=RUNTIMES[name]["version"])
+    if page_dir is None:
+        return RUNTIME_URL + entry["file"]
+    return os.path.relpath(os.path.join(RUNTIME_DIR, entry["file"]), page_dir).replace(os.sep, "/")
+
+
+def script_tag(name: str, page_dir: Optional[str] = None) -> str:
+    return f'<script src="{runtime_url(name, page_dir)}"></script>'
+
+
+def fingerprint() -> str:
+    """当前运行时的标识，计入生成页面的内容哈希：换运行时后生成页随之更新。"""
+    manifest = load_manifest()
+    if not manifest:
+        return "cdn:" + ",".join(f"{n}@{r['version']}" for n, r in sorted(RUNTIMES.items()))
+    return ",".join(manifest[n]["file"] for n in sorted(manifest))
+
+
+def rewrite_html(html: str, page_dir: str) -> str:
+    """把页面中指向 Plotly / Three.js 的 <script src> 改为本地运行时（需已构建）。"""
+    manifest = load_manifest()
+
+    def fix(tag_match: "re.Match[str]") -> str:
+        tag = tag_match.group(0)
+        src = _SRC_ATTR.search(tag)
+        if not src:
+            return tag
+        for name, pattern in _SRC_PATTERNS.items():
+            if name in manifest and pattern.search(src.group(2)):
+                url = runtime_url(name, page_dir)
+                tag = tag[: src.start()] + f' src="{url}"' + tag[src.end():]
+                return _CDN_ATTRS.sub("", tag)
+        return tag
+
+    return _SCRIPT_TAG.sub(fix, html)
+
+
+def migrate(paths: Iterable[str], dry_run: bool = False) -> List[str]:
+    """改写目录（递归）或文件中的 HTML 页面，返回发生变化的文件。"""
+    if not load_manifest():
+        raise RuntimeError("运行时尚未构建：先执行 python -m backend.api.runtime_bundle build")
+    pages: List[str] = []
+    for root in paths:
+        if os.path.isfile(root):
+            pages.append(root)
+            continue
+        for dirpath, _, filenames in os.walk(root):
+            pages.extend(os.path.join(dirpath, n) for n in filenames if n.endswith((".html", ".htm")))
+
+    from backend.api.static_assets import precompress
+
+    changed: List[str] = []
+    for page in sorted(pages):
+        with open(page, "r", encoding="utf-8") as f:
+            html = f.read()
+        new = rewrite_html(html, os.path.dirname(os.path.abspath(page)))
+        if new == html:
+            continue
+        changed.append(page)
+        if not dry_run:
+            atomic_write(page, new)
+            precompress(page)
+    return changed
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="构建并引用本地托管的 Plotly / Three.js 运行时")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_build = sub.add_parser("build", help="写入带内容哈希的运行时与 manifest")
+    p_build.add_argument("--plotly-file", help=f"本地 plotly.min.js（版本须为 {PLOTLY_JS_VERSION}）")
+    p_build.add_argument("--three-file", help=f"本地 three.min.js（{THREE_JS_VERSION}）")
+    p_build.add_argument("--no-download", action="store_true", help="不联网，缺文件即失败")
+    p_migrate = sub.add_parser("migrate", help="把页面中的 CDN 引用改为本地运行时")
+    p_migrate.add_argument("paths", nargs="*", default=[os.path.join(STATIC_APP_DIR, "modules")])
+    p_migrate.add_argument("--dry-run", action="store_true")
+    sub.add_parser("status", help="显示当前 manifest")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        files = {k: v for k, v in (("plotly", args.plotly_file), ("three", args.three_file)) if v}
+        print(json.dumps(build(files, download=not args.no_download), ensure_ascii=False, indent=2))
+    elif args.command == "migrate":
+        changed = migrate(args.paths, args.dry_run)
+        for page in changed:
+            print(("[dry-run] " if args.dry_run else "") + page)
+        print(f"{len(changed)} 个页面{'需要' if args.dry_run else '已'}改写")
+    else:
+        print(json.dumps(load_manifest() or {"status": "未构建，使用 CDN"}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
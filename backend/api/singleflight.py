@@ -0,0 +1,115 @@
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("app")
+
+StageCallback = Callable[..., None]
+
+
+class _Call:
+    __slots__ = ("event", "result", "error", "waiters", "stage_lock", "stages", "listeners")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+        # 阶段事件（仅 do_with_stages 使用）：已发生的阶段与各调用者的回调
+        self.stage_lock = threading.Lock()
+        self.stages: List[Tuple[str, Dict[str, Any]]] = []
+        self.listeners: List[StageCallback] = []
+
+    def emit(self, stage: str, **data: Any) -> None:
+        """记录阶段并转发给所有调用者；单个回调出错不影响共享工作与其他调用者。"""
+        with self.stage_lock:
+            self.stages.append((stage, data))
+            for listener in self.listeners:
+                try:
+                    listener(stage, **data)
+                except Exception:
+                    logger.exception("阶段回调失败: %s", stage)
+
+    def join(self, on_stage: StageCallback) -> None:
+        """后加入的调用者：先收到 joined，再补发已发生的阶段，之后与领头者同步收到新阶段。"""
+        with self.stage_lock:
+            self.listeners.append(on_stage)
+            try:
+                on_stage("joined", replayed=len(self.stages))
+                for stage, data in self.stages:
+                    on_stage(stage, **data)
+            except Exception:
+                logger.exception("阶段回调失败: joined")
+
+
+class SingleFlight:
+    """并发请求合并：同一 key 同时只执行一次 ``fn``，其余调用者等待并共享结果（或异常）。
+
+    仅对“正在进行中”的调用去重，完成后立即移除，不做结果缓存。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self.shared = 0  # 被合并掉的调用次数，便于观测
+
+    def _acquire(self, key: str) -> Tuple[_Call, bool]:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.shared += 1
+                return call, False
+            call = self._calls[key] = _Call()
+            return call, True
+
+    def _run(self, key: str, call: _Call, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+        return call.result
+
+    @staticmethod
+    def _wait(call: _Call) -> Any:
+        call.event.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def do(self, key: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        call, leader = self._acquire(key)
+        if not leader:
+            return self._wait(call)
+        return self._run(key, call, fn, *args, **kwargs)
+
+    def do_with_stages(
+        self, key: str, fn: Callable[..., Any], *args: Any, on_stage: Optional[StageCallback] = None
+    ) -> Any:
+        """同 ``do``，并把阶段事件扇出给每个调用者。
+
+        ``fn`` 以 ``fn(*args, emit)`` 调用，``emit(stage, **data)`` 转发给领头者与所有合并进来的
+        调用者的 ``on_stage``；后加入者先收到 ``joined`` 阶段，再补发已发生的阶段。
+        回调在共享工作的线程中执行，不应抛出（取消等需延后处理，见 ``job_queue.defer_cancel``）。
+        """
+        call, leader = self._acquire(key)
+        if not leader:
+            if on_stage is not None:
+                call.join(on_stage)
+            return self._wait(call)
+        if on_stage is not None:
+            call.listeners.append(on_stage)
+        return self._run(key, call, fn, *args, call.emit)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+# 生成链路共用的实例：resolve 端点按 "prompt:" 前缀去重，生成函数按 "spec:" 前缀去重
+generation_flight = SingleFlight()
@@ -0,0 +1,48 @@
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Dict
+
+
+def canonical_spec(spec: Dict[str, Any]) -> str:
+    """规格的规范化 JSON（键排序、紧凑分隔），语义相同的规格得到相同字符串。"""
+    return json.dumps(spec, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def spec_hash(spec: Dict[str, Any], template_version: str = "") -> str:
+    """规格 + 模板版本的内容哈希；模板升级时改版本号即可让旧页面失效。"""
+    payload = f"{template_version}\n{canonical_spec(spec)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def content_addressed_name(slug: str, digest: str) -> str:
+    return f"viz_{slug}_{digest[:16]}.html"
+
+
+def atomic_write(path: str, content: str) -> None:
+    """临时文件 + rename 原子落盘，读者不会看到半截文件。"""
+    atomic_write_bytes(path, content.encode("utf-8"))
+
+
+def atomic_write_bytes(path: str, content: bytes) -> None:
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".viz.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+
+
+def write_if_absent(path: str, content: str) -> bool:
+    """内容寻址写入：文件已存在则跳过（同名即同内容），否则原子写入。返回是否实际写入。"""
+    if os.path.exists(path):
+        return False
+    atomic_write(path, content)
+    return True
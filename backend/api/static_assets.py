@@ -0,0 +1,264 @@
+"""/app 静态目录：预压缩变体、强 ETag 与条件请求。
+
+- 构建时（``python -m backend.api.static_assets``）或页面生成后（``precompress``）为文本类
+  文件写出 ``.gz`` 与 ``.br`` 变体；变体的 mtime 与源文件一致，源文件改动后旧变体自动作废；
+- ``PrecompressedStaticFiles`` 按 ``Accept-Encoding`` 选用变体（br 优先），响应带
+  ``Vary: Accept-Encoding``；
+- ETag 为内容哈希（强校验）：文件名已带内容哈希（如生成页 ``viz_<slug>_<hash>.html``）时直接取名中的
+  哈希，否则读取文件计算并按 (路径, mtime, 大小) 缓存；不同编码的变体使用不同的 ETag；
+- 带内容哈希的文件 ``Cache-Control: public, max-age=…, immutable``，其余 ``no-cache``（每次以
+  If-None-Match 重新验证），命中时返回 304；
+- 挂载前置一层内存页面缓存（``backend.api.page_cache``）：GET 命中时直接从内存返回。
+
+brotli 为可选依赖，未安装时只生成与提供 gzip。
+"""
+import argparse
+import functools
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from backend.api.page_cache import CachedPage, PageCache, page_cache
+from backend.api.specs import atomic_write_bytes
+from backend.config import STATIC_APP_DIR, STATIC_IMMUTABLE_MAX_AGE, STATIC_PRECOMPRESS_MIN_BYTES
+
+try:
+    import brotli
+except ImportError:  # 只提供 gzip
+    brotli = None
+
+logger = logging.getLogger("app")
+
+COMPRESSIBLE: Set[str] = {".html", ".htm", ".js", ".mjs", ".css", ".json", ".svg", ".txt", ".md", ".map", ".xml", ".csv"}
+
+# 文件名末尾的内容哈希：viz_normal_distribution_0123456789abcdef.html、plotly.3f2a…e1.min.js 等
+HASHED_NAME = re.compile(r"[._-]([0-9a-f]{16,64})(?:\.min)?\.[A-Za-z0-9]+$")
+
+
+def _encoders() -> List[Tuple[str, str, Callable[[bytes], bytes]]]:
+    """(Content-Encoding, 后缀, 压缩函数)，按优先级排列。"""
+    out = []
+    if brotli is not None:
+        out.append(("br", ".br", lambda data: brotli.compress(data, quality=11)))
+    out.append(("gzip", ".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0)))
+    return out
+
+
+def _compressible(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in COMPRESSIBLE
+
+
+def precompress(path: str, force: bool = False) -> List[str]:
+    """为单个文件写出压缩变体，返回本次写出的后缀；已是最新、过小或压缩无收益时跳过。"""
+    if not _compressible(path):
+        return []
+    st = os.stat(path)
+    if st.st_size < STATIC_PRECOMPRESS_MIN_BYTES:
+        return []
+    data: Optional[bytes] = None
+    written: List[str] = []
+    for _, suffix, compress in _encoders():
+        target = path + suffix
+        if not force:
+            try:
+                if os.stat(target).st_mtime_ns == st.st_mtime_ns:
+                    continue
+            except OSError:
+                pass
+        if data is None:
+            with open(path, "rb") as f:
+                data = f.read()
+        packed = compress(data)
+        if len(packed) >= len(data):
+            continue
+        atomic_write_bytes(target, packed)
+        # 变体与源文件同 mtime：源文件被替换后 mtime 不再相等，变体即视为过期
+        os.utime(target, ns=(st.st_atime_ns, st.st_mtime_ns))
+        written.append(suffix)
+    return written
+
+
+def precompress_tree(root: str, force: bool = False) -> Dict[str, Any]:
+    """遍历目录预压缩全部文本类文件。"""
+    stats = {"files": 0, "written": 0, "bytes": 0, "compressed": {}}
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            if not _compressible(path):
+                continue
+            try:
+                written = precompress(path, force)
+            except OSError as e:
+                logger.warning("预压缩失败 %s: %s", path, e)
+                continue
+            stats["files"] += 1
+            stats["written"] += len(written)
+            stats["bytes"] += os.path.getsize(path)
+            for _, suffix, _ in _encoders():
+                variant = path + suffix
+                if os.path.exists(variant):
+                    stats["compressed"][suffix] = stats["compressed"].get(suffix, 0) + os.path.getsize(variant)
+    return stats
+
+
+@functools.lru_cache(maxsize=4096)
+def _content_digest(path: str, mtime_ns: int, size: int) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()[:32]
+
+
+def _accepted_encodings(header: str) -> Set[str]:
+    """解析 Accept-Encoding，返回 q > 0 的编码（``*`` 视为接受全部）。"""
+    accepted: Set[str] = set()
+    for part in header.split(","):
+        token, _, params = part.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0 and token.strip():
+            accepted.add(token.strip().lower())
+    if "*" in accepted:
+        accepted |= {"br", "gzip"}
+    return accepted
+
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """在 ``StaticFiles`` 之上选用预压缩变体，并改用内容哈希 ETag 与显式缓存策略。
+
+    ``cache`` 为前置的内存页面缓存（默认进程级 ``page_cache``，传 None 关闭）。缓存键为
+    请求路径 + 客户端可接受的预压缩编码；缓存后才写出的更优变体会使条目失效。只缓存完整的
+    200 GET 响应；Range 与 HEAD 请求直接走磁盘。
+    """
+
+    def __init__(self, *args: Any, cache: Optional[PageCache] = page_cache, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.cache = cache if cache is not None and cache.enabled else None
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        request_headers = Headers(scope=scope)
+        if self.cache is None or scope["method"] != "GET" or "range" in request_headers:
+            return await super().get_response(path, scope)
+
+        accepted = _accepted_encodings(request_headers.get("accept-encoding", ""))
+        key = (scope["path"], tuple(name for name, _, _ in _encoders() if name in accepted))
+        page = self.cache.get(key)
+        if page is None:
+            response = await super().get_response(path, scope)
+            if not (
+                isinstance(response, FileResponse)
+                and response.status_code == 200
+                and response.stat_result is not None
+                and response.stat_result.st_size <= self.cache.max_entry_bytes
+            ):
+                return response
+            served = os.fspath(response.path)
+            source = served
+            encoding = response.headers.get("content-encoding")
+            # 可接受但未选用、优先级更高的变体：之后出现时缓存失效
+            better: List[str] = []
+            for name, suffix, _ in _encoders():
+                if name == encoding:
+                    source = served[: -len(suffix)]
+                    break
+                if name in key[1]:
+                    better.append(suffix)
+            if not _compressible(source):
+                better = []
+            body = await anyio.to_thread.run_sync(_read, served)
+            headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+            page = CachedPage(
+                body, headers, source, response.stat_result.st_mtime_ns, tuple(source + s for s in better)
+            )
+            self.cache.put(key, page)
+        elif self.is_not_modified(Headers(page.headers), request_headers):
+            return NotModifiedResponse(page.headers)
+        return Response(page.body, headers=page.headers)
+
+    def file_response(
+        self,
+        full_path: Any,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        path = os.fspath(full_path)
+        hashed = HASHED_NAME.search(os.path.basename(path))
+        digest = hashed.group(1) if hashed else _content_digest(path, stat_result.st_mtime_ns, stat_result.st_size)
+
+        headers = {
+            "cache-control": f"public, max-age={STATIC_IMMUTABLE_MAX_AGE}, immutable" if hashed else "no-cache",
+        }
+        served_path, served_stat, encoding = path, stat_result, None
+        if _compressible(path):
+            headers["vary"] = "Accept-Encoding"
+            # Range 请求按原文件字节计算偏移，不使用压缩变体
+            accepted = set() if "range" in request_headers else _accepted_encodings(
+                request_headers.get("accept-encoding", "")
+            )
+            for name, suffix, _ in _encoders():
+                if name not in accepted:
+                    continue
+                try:
+                    st = os.stat(path + suffix)
+                except OSError:
+                    continue
+                if st.st_mtime_ns == stat_result.st_mtime_ns:
+                    served_path, served_stat, encoding = path + suffix, st, name
+                    break
+        if encoding:
+            headers["content-encoding"] = encoding
+            headers["etag"] = f'"{digest}-{encoding}"'
+        else:
+            headers["etag"] = f'"{digest}"'
+
+        response = FileResponse(
+            served_path,
+            status_code=status_code,
+            headers=headers,
+            media_type=mimetypes.guess_type(path)[0] or "application/octet-stream",
+            stat_result=served_stat,
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="为静态目录预生成 .gz / .br 变体")
+    parser.add_argument("roots", nargs="*", default=[STATIC_APP_DIR])
+    parser.add_argument("--force", action="store_true", help="忽略已有变体，全部重新压缩")
+    args = parser.parse_args(argv)
+    if brotli is None:
+        print("未安装 brotli，只生成 .gz")
+    for root in args.roots:
+        stats = precompress_tree(root, args.force)
+        sizes = ", ".join(f"{k} {v / 1024:.0f}KB" for k, v in stats["compressed"].items())
+        print(f"{root}: {stats['files']} 个文件 {stats['bytes'] / 1024:.0f}KB -> {sizes}（本次写出 {stats['written']} 个变体）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Plotly 图的类型化数组编码：数值数组写成 ``{dtype, bdata[, shape]}``（base64 二进制）。
+
+plotly.io 默认把列表逐个写成十进制文本；numpy 数组虽已编码为 base64，浮点数组却一律
+保留 float64。这里在序列化前把 trace 中的数值数组统一改写为
+plotly.js 可直接读取的类型化数组，并收窄 dtype：
+
+- 全为整数的数组取能容纳其范围的最小整型（u1 / i1 / u2 / i2 / u4 / i4）；
+- 浮点数组在 float32 往返的相对误差不超过 ``rtol`` 时存为 f4（低于 float32 最小正规数的值
+  不计），否则保留 f8；
+- 二维矩形数组（曲面的 z、customdata 等）带 ``shape``；
+- 布尔、字符串、含 None 的数组以及短于 ``min_length`` 的数组保持原样。
+
+只改写 ``data`` 与 ``frames[].data``，layout 不动。
+"""
+import argparse
+import base64
+import json
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from backend.config import FIGURE_FLOAT32_RTOL, FIGURE_TYPED_MIN_LENGTH
+
+# plotly.js 支持的整型（按字节数从小到大）
+_INT_TYPES = ("u1", "i1", "u2", "i2", "u4", "i4")
+
+
+def narrow(arr: np.ndarray, rtol: float = FIGURE_FLOAT32_RTOL) -> Optional[np.ndarray]:
+    """返回收窄后的数组；不是可编码的数值数组时返回 None。"""
+    if arr.dtype.kind not in "iuf" or arr.size == 0:
+        return None
+    finite = np.isfinite(arr) if arr.dtype.kind == "f" else None
+    if finite is None or (finite.all() and np.array_equal(arr, np.rint(arr))):
+        lo, hi = arr.min(), arr.max()
+        for code in _INT_TYPES:
+            info = np.iinfo(np.dtype(code))
+            if info.min <= lo and hi <= info.max:
+                return arr.astype("<" + code)
+        if arr.dtype.kind != "f" and not np.array_equal(arr.astype("<f8").astype(arr.dtype), arr):
+            return None  # 超出 f8 精确表示范围的 int64，保持原样
+        return arr.astype("<f8")
+    with np.errstate(over="ignore", invalid="ignore"):
+        f32 = arr.astype("<f4")
+        f64 = arr[finite].astype(float)
+        err = np.abs(f32[finite].astype(float) - f64)
+        # 低于 float32 最小正规数的值（如概率尾部 1e-80）按 0 处理，不阻止收窄
+        tiny = np.abs(f64) < np.finfo(np.float32).tiny
+        ok = np.isfinite(f32[finite]).all() and bool(np.all((err <= rtol * np.abs(f64)) | tiny))
+    return f32 if ok else arr.astype("<f8")
+
+
+def encode_array(arr: np.ndarray) -> Dict[str, Any]:
+    spec: Dict[str, Any] = {
+        "dtype": arr.dtype.str[1:],
+        "bdata": base64.b64encode(np.ascontiguousarray(arr).tobytes()).decode("ascii"),
+    }
+    if arr.ndim > 1:
+        spec["shape"] = ", ".join(str(n) for n in arr.shape)
+    return spec
+
+
+def decode_array(spec: Dict[str, Any]) -> np.ndarray:
+    """``encode_array`` 的逆过程；plotly 6 的 Figure 已把 numpy 数组存成这种形式。"""
+    dtype = "u1" if spec["dtype"] == "u1c" else spec["dtype"]
+    arr = np.frombuffer(base64.b64decode(spec["bdata"]), dtype="<" + dtype)
+    shape = spec.get("shape")
+    if shape:
+        arr = arr.reshape([int(n) for n in str(shape).split(",")])
+    return arr
+
+
+def _is_typed_spec(value: Any) -> bool:
+    return isinstance(value, dict) and "dtype" in value and "bdata" in value
+
+
+def _as_numeric(value: Any) -> Optional[np.ndarray]:
+    if _is_typed_spec(value):
+        arr = decode_array(value)
+    elif isinstance(value, np.ndarray):
+        arr = value
+    elif isinstance(value, (list, tuple)) and value:
+        try:
+            arr = np.asarray(value)
+        except ValueError:  # 不规则嵌套
+            return None
+    else:
+        return None
+    if arr.ndim not in (1, 2) or arr.dtype.kind not in "iuf":
+        return None
+    return arr
+
+
+class _Encoder:
+    def __init__(self, rtol: float, min_length: int):
+        self.rtol = rtol
+        self.min_length = min_length
+        self.arrays: Dict[str, int] = {}
+
+    def walk(self, node: Any) -> Any:
+        if isinstance(node, dict) and not _is_typed_spec(node):
+            return {k: self.walk(v) for k, v in node.items()}
+        arr = _as_numeric(node)
+        if arr is not None and arr.size >= self.min_length:
+            narrowed = narrow(arr, self.rtol)
+            if narrowed is not None:
+                key = narrowed.dtype.str[1:]
+                self.arrays[key] = self.arrays.get(key, 0) + 1
+                return encode_array(narrowed)
+        if isinstance(node, dict):
+            return node
+        if isinstance(node, (list, tuple)):
+            return [self.walk(v) for v in node]
+        return node
+
+
+def encode_figure(
+    fig: Any, rtol: float = FIGURE_FLOAT32_RTOL, min_length: int = FIGURE_TYPED_MIN_LENGTH
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """把 Figure（或 figure 字典）的数值数组改写为类型化数组。
+
+    返回 ``(figure 字典, 统计)``；统计含各 dtype 的数组个数，以及编码前后的 figure JSON 字节数
+    （编码前为 plotly.io 默认序列化的结果）。
+    """
+    import plotly.io as pio
+
+    data = fig.to_plotly_json() if hasattr(fig, "to_plotly_json") else dict(fig)
+    encoder = _Encoder(rtol, min_length)
+    out = dict(data)
+    out["data"] = [encoder.walk(t) for t in data.get("data") or []]
+    if data.get("frames"):
+        out["frames"] = [
+            {**f, "data": [encoder.walk(t) for t in f.get("data") or []]} for f in data["frames"]
+        ]
+
+    before = len(pio.to_json(data, validate=False).encode("utf-8"))
+    after = len(pio.to_json(out, validate=False).encode("utf-8"))
+    stats = {
+        "arrays": encoder.arrays,
+        "bytes_before": before,
+        "bytes_after": after,
+        "bytes_saved": before - after,
+        "ratio": round(after / before, 3) if before else 1.0,
+    }
+    return out, stats
+
+
+def main(argv: Optional[list] = None) -> None:
+    """逐个执行绘图脚本（需创建 ``fig``），打印各图编码前后的字节数。"""
+    parser = argparse.ArgumentParser(description="统计 figure 类型化数组编码节省的字节数")
+    parser.add_argument("scripts", nargs="+", help="创建 fig 的 Python 脚本")
+    parser.add_argument("--rtol", type=float, default=FIGURE_FLOAT32_RTOL)
+    args = parser.parse_args(argv)
+    for path in args.scripts:
+        with open(path, "r", encoding="utf-8") as f:
+            env: Dict[str, Any] = {"__name__": "__typed_arrays__"}
+            exec(compile(f.read(), path, "exec"), env, env)
+        if env.get("fig") is None:
+            print(f"{path}: 未创建 fig")
+            continue
+        _, stats = encode_figure(env["fig"], rtol=args.rtol)
+        print(f"{path}: {json.dumps(stats, ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    main()
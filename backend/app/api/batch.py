@@ -0,0 +1,36 @@
+from typing import Any, Dict, List, Optional, Union
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from backend.app.services.batch_generation import run_batch
+from backend.config import BATCH_MAX_ITEMS, BATCH_PARALLELISM
+
+router = APIRouter()
+
+
+class BatchRequest(BaseModel):
+    # 提示词字符串，或 {"prompt": ..., "aliases": [...]} / {"spec": {...}}
+    items: List[Union[str, Dict[str, Any]]]
+    parallelism: Optional[int] = None
+    vizType: str = "自动"
+    complexity: str = "中等"
+    skipExisting: bool = True
+    dryRun: bool = False
+
+
+@router.post("/batch_generate")
+async def batch_generate(req: BatchRequest):
+    """批量生成：按规格哈希去重、并发构建、注册表一次写入，返回逐条耗时。"""
+    if not req.items:
+        raise HTTPException(status_code=400, detail="items 不能为空")
+    if len(req.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"单次最多 {BATCH_MAX_ITEMS} 条，请分批提交或使用命令行")
+    parallelism = min(req.parallelism or BATCH_PARALLELISM, BATCH_PARALLELISM * 4)
+    try:
+        return await run_in_threadpool(
+            run_batch, req.items, parallelism, req.vizType, req.complexity, req.skipExisting, req.dryRun,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -2,16 +2,17 @@ import os
 import json
 import time
 import re
-from typing import Dict, Any
+from typing import Any, Callable, Dict, Optional, Tuple
 
-try:
-    from openai import OpenAI  # 可选：环境未配置时走本地逻辑
-except Exception:
-    OpenAI = None
+from backend.api import registry_ops
+from backend.api.runtime_bundle import fingerprint as runtime_fingerprint, script_tag
+from backend.api.singleflight import generation_flight
+from backend.api.specs import content_addressed_name, spec_hash, write_if_absent
+from backend.api.static_assets import precompress
+from backend.app.services.llm_providers import chat as provider_chat, get_provider
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 GEN_DIR = os.path.join(BASE_DIR, "app", "modules", "ai_visualizer", "generated")
-REGISTRY_PATH = os.path.join(BASE_DIR, "app", "modules", "ai_visualizer", "registry", "registry.json")
 
 SYSTEM_PROMPT_SPEC = (
     "你是交互式可视化工程师。\n"
@@ -43,33 +44,20 @@ def _slugify(text: str) -> str:
     return s.strip("_") or f"concept_{_timestamp()}"
 
 
-def _load_registry() -> Dict[str, Any]:
-    if not os.path.exists(REGISTRY_PATH):
-        return {"concepts": []}
-    with open(REGISTRY_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-
-def _save_registry(data: Dict[str, Any]) -> None:
-    os.makedirs(os.path.dirname(REGISTRY_PATH), exist_ok=True)
-    with open(REGISTRY_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
-
 def _call_openai_for_spec(prompt: str) -> Dict[str, Any]:
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key or OpenAI is None:
+    provider = get_provider("openai")
+    if not provider.configured:
         raise RuntimeError("LLM 未配置，无法抽取规格")
-    client = OpenAI(api_key=api_key)
-    rsp = client.chat.completions.create(
-        model=os.getenv("OPENAI_MODEL", "gpt-4o"),
-        messages=[
+    # 共享的保活客户端，带超时、并发上限与重试
+    content = provider_chat(
+        "openai",
+        [
             {"role": "system", "content": SYSTEM_PROMPT_SPEC},
             {"role": "user", "content": prompt},
         ],
+        model=os.getenv("OPENAI_MODEL", "gpt-4o"),
         temperature=float(os.getenv("LLM_TEMPERATURE", "0.2")),
     )
-    content = rsp.choices[0].message.content
     try:
         return json.loads(content)
     except Exception:
@@ -88,6 +76,18 @@ def _validate_spec(spec: Dict[str, Any]) -> None:
         raise ValueError("library 必须为 plotly 或 three.js")
 
 
+# 参与内容哈希；_build_html_from_spec 或 _plotly_js/_three_js 改动后需递增
+TEMPLATE_VERSION = "ai_visualizer/3"
+
+
+def spec_digest(spec: Dict[str, Any]) -> str:
+    """规格的内容哈希，决定生成页文件名；交互生成与批量预热都经此计算，才能互相复用。
+
+    参与哈希的模板标识为模板版本 + 当前引用的前端运行时（换运行时后生成页随之更新）。
+    """
+    return spec_hash(spec, f"{TEMPLATE_VERSION};{runtime_fingerprint()}")
+
+
 def _build_html_from_spec(spec: Dict[str, Any]) -> str:
     title = spec.get("title", "AI Visualization")
     library = spec.get("library", "plotly").lower()
@@ -127,13 +127,15 @@ def _plotly_js(spec: Dict[str, Any]) -> str:
     sigma = float(params.get("sigma", 1)) if float(params.get("sigma", 1)) != 0 else 1.0
 
     if chart_type == "pdf" and spec.get("concept") == "normal_distribution":
+        from backend.api import precompute  # numpy/scipy 首次渲染时才导入
+
         return (
-            "<script src=\"https://cdn.plot.ly/plotly-2.31.1.min.js\"></script>"
+            script_tag("plotly", GEN_DIR) +
             "<script>" 
-            "function gaussian(x, mu, sigma){return (1/(sigma*Math.sqrt(2*Math.PI)))*Math.exp(-0.5*Math.pow((x-mu)/sigma,2));}"
-            "let mu=" + str(mu) + ", sigma=" + str(sigma) + ";"
-            "const x=[]; for(let i=-40;i<=40;i++){x.push(i/4);}"
-            "function build(){const y=x.map(v=>gaussian(v,mu,sigma));const data=[{x:x,y:y,type:'scatter',mode:'lines',line:{color:'#4A65F6'}}];"
+            # 曲线在服务端预计算后嵌入，浏览器不再逐点求值
+            "const DATA=" + precompute.to_json(precompute.normal_pdf(mu, sigma, -10.0, 10.0, 81)) + ";"
+            "const x=Array.from({length:DATA.n},(_,i)=>DATA.x0+i*DATA.dx);"
+            "function build(){const y=DATA.y;const data=[{x:x,y:y,type:'scatter',mode:'lines',line:{color:'#4A65F6'}}];"
             "const layout={title:'正态分布 PDF',xaxis:{title:'x'},yaxis:{title:'density'},template:'plotly_white'};"
             "Plotly.newPlot('viz',data,layout,{displayModeBar:true});}"
             "build();"
@@ -141,7 +143,7 @@ def _plotly_js(spec: Dict[str, Any]) -> str:
         )
     # 通用折线图兜底
     return (
-        "<script src=\"https://cdn.plot.ly/plotly-2.31.1.min.js\"></script>"
+        script_tag("plotly", GEN_DIR) +
         "<script>const x=[0,1,2,3,4,5,6,7,8,9], y=x.map(v=>Math.sin(v));"
         "Plotly.newPlot('viz',[{x:x,y:y,type:'scatter',mode:'lines',line:{color:'#6C8BFA'}}],{title:'折线图',template:'plotly_white'});" 
         "</script>"
@@ -150,7 +152,7 @@ def _plotly_js(spec: Dict[str, Any]) -> str:
 
 def _three_js(spec: Dict[str, Any]) -> str:
     return (
-        "<script src=\"https://unpkg.com/three@0.158.0/build/three.min.js\"></script>"
+        script_tag("three", GEN_DIR) +
         "<script>const scene=new THREE.Scene();const camera=new THREE.PerspectiveCamera(75,1,0.1,1000);"
         "const renderer=new THREE.WebGLRenderer();renderer.setSize(800,540);document.getElementById('viz').appendChild(renderer.domElement);"
         "const geometry=new THREE.BoxGeometry();const material=new THREE.MeshBasicMaterial({color:0x4A65F6});const cube=new THREE.Mesh(geometry,material);scene.add(cube);"
@@ -188,41 +190,61 @@ def _local_spec_from_prompt(prompt: str) -> Dict[str, Any] | None:
         return {"concept":"matrix_transform","chart_type":"scatter","library":"plotly","params":{"A":[[1,0],[0,1]]},"title":"二维矩阵变换"}
     return None
 
-def generate_from_prompt(prompt: str, viz_type: str = "自动", complexity: str = "中等") -> Dict[str, Any]:
+def generate_from_prompt(
+    prompt: str,
+    viz_type: str = "自动",
+    complexity: str = "中等",
+    on_stage: Optional[Callable[..., None]] = None,
+) -> Dict[str, Any]:
+    """``on_stage(stage, **data)`` 在每个阶段完成时调用（供 SSE 推送进度），可省略。"""
     # Step 1: 结构化规格（优先LLM，其次本地规则，不再使用demo）
+    spec, source = extract_spec(prompt)
+
+    # Step 2-3: 生成完整 HTML 并保存；同一规格的并发请求只构建、写盘一次
+    cid = spec.get("concept") or _slugify(prompt)
+    digest = spec_digest(spec)
+    if on_stage:
+        on_stage("spec", concept=cid, title=spec.get("title", cid), source=source, spec_hash=digest)
+    fname = render_spec(spec, digest)
+    if on_stage:
+        on_stage("saved", url=f"app/modules/ai_visualizer/generated/{fname}")
+
+    # Step 4: 写入注册表
+    cid, aliases = registry_ops.register_generated(
+        cid, prompt, spec.get("title", cid), f"app/modules/ai_visualizer/generated/{fname}", digest
+    )
+
+    return {"id": cid, "title": spec.get("title", cid), "url": f"app/modules/ai_visualizer/generated/{fname}", "aliases": aliases, "spec_hash": digest}
+
+
+def extract_spec(prompt: str) -> Tuple[Dict[str, Any], str]:
+    """抽取并校验规格，返回 (spec, source)；source 为 llm 或 local。"""
+    source = "llm"
     try:
         spec = _call_openai_for_spec(prompt)
     except Exception:
+        source = "local"
         spec = _local_spec_from_prompt(prompt)
         if spec is None:
             raise RuntimeError("无法抽取规格：请更换描述或配置 LLM")
     _validate_spec(spec)
+    return spec, source
 
-    # Step 2: 生成完整 HTML（模板驱动）并静态校验
-    html = _build_html_from_spec(spec)
 
-    # Step 4: 保存文件并写入注册表
-    os.makedirs(GEN_DIR, exist_ok=True)
-    cid = spec.get("concept") or _slugify(prompt)
-    fname = f"viz_{_slugify(cid)}_{_timestamp()}.html"
+def render_spec(spec: Dict[str, Any], digest: Optional[str] = None) -> str:
+    """按内容哈希构建并落盘，返回生成目录下的文件名；不写注册表。"""
+    digest = digest or spec_digest(spec)
+    return generation_flight.do(f"spec:{__name__}:{digest}", _render_to_file, spec, digest)
+
+
+def _render_to_file(spec: Dict[str, Any], digest: str) -> str:
+    # 文件名由规格 + 模板版本的哈希决定：已存在即为同一内容，直接复用，不再构建与写盘
+    fname = content_addressed_name(_slugify(str(spec.get("concept") or "viz")), digest)
     fpath = os.path.join(GEN_DIR, fname)
-    with open(fpath, "w", encoding="utf-8") as f:
-        f.write(html)
-
-    registry = _load_registry()
-    concepts = registry.get("concepts", [])
-    aliases = [prompt]
-    exists = any(c.get("id") == cid for c in concepts)
-    if not exists:
-        concepts.append({
-            "id": cid,
-            "aliases": aliases,
-            "module": "ai_visualizer",
-            "title": spec.get("title", cid),
-            "url": f"app/modules/ai_visualizer/generated/{fname}",
-            "type": "generated"
-        })
-        registry["concepts"] = concepts
-        _save_registry(registry)
-
-    return {"id": cid, "title": spec.get("title", cid), "url": f"app/modules/ai_visualizer/generated/{fname}", "aliases": aliases}
\ No newline at end of file
+    if os.path.exists(fpath):
+        return fname
+    # 生成完整 HTML（模板驱动）并静态校验
+    html = _build_html_from_spec(spec)
+    if write_if_absent(fpath, html):
+        precompress(fpath)
+    return fname
@@ -0,0 +1,71 @@
+from typing import Any, Dict, Union
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+
+from backend.app.services.job_queue import PRIORITIES, QueueFull, job_queue
+from backend.app.services.visualmind_service import get_visualmind_service
+from .resolve_or_generate import resolve_sync
+
+router = APIRouter()
+
+
+def _visualmind_job(prompt: str, on_stage=None) -> Dict[str, Any]:
+    prompt = prompt.strip()
+    if not prompt:
+        raise ValueError("prompt 不能为空")
+    return get_visualmind_service().generate(prompt, on_stage=on_stage)
+
+
+# 任务类型 → 处理函数（与同名同步端点共用同一实现）
+job_queue.register("generate", _visualmind_job)  # 对应 /api/v1/generate
+job_queue.register("resolve", resolve_sync)      # 对应 /api/resolve_or_generate
+
+
+class JobRequest(BaseModel):
+    kind: str = "generate"
+    prompt: str
+    vizType: str = "自动"
+    complexity: str = "中等"
+    # interactive / normal / batch，或直接给整数（越小越先执行）
+    priority: Union[int, str] = "normal"
+
+
+@router.post("/jobs", status_code=202)
+def submit_job(req: JobRequest):
+    """提交后台生成任务，立即返回任务 id；用 GET /api/jobs/{id} 轮询结果。"""
+    if isinstance(req.priority, str):
+        if req.priority not in PRIORITIES:
+            raise HTTPException(status_code=400, detail=f"priority 必须为 {'/'.join(PRIORITIES)} 或整数")
+        priority = PRIORITIES[req.priority]
+    else:
+        priority = req.priority
+    payload: Dict[str, Any] = {"prompt": req.prompt}
+    if req.kind == "resolve":
+        payload.update(vizType=req.vizType, complexity=req.complexity)
+    try:
+        job = job_queue.submit(req.kind, payload, priority)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"id": job.id, "status": job.status, "position": job_queue.position(job)}
+
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="任务不存在或结果已过期")
+    data = job.to_dict()
+    data["position"] = job_queue.position(job)
+    return data
+
+
+@router.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    """取消任务：排队中立即取消，运行中在下一个阶段边界停止。"""
+    job = job_queue.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="任务不存在或结果已过期")
+    return {"id": job.id, "status": job.status, "cancel_requested": job.cancel_requested}
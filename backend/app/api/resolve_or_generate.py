@@ -1,15 +1,18 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import Dict, Any, List
+from starlette.concurrency import run_in_threadpool
+from typing import Any, Dict
 import os
-import json
 
+from backend.api import registry_ops
+from backend.api.singleflight import generation_flight
+from backend.app.services.job_queue import defer_cancel
 from .generate_visualization import generate_from_prompt
+from .sse import stage_stream
 
 router = APIRouter()
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-REGISTRY_PATH = os.path.join(BASE_DIR, "app", "modules", "ai_visualizer", "registry", "registry.json")
 
 
 class ResolveRequest(BaseModel):
@@ -18,30 +21,6 @@ class ResolveRequest(BaseModel):
     complexity: str = "中等"
 
 
-def _load_registry() -> Dict[str, Any]:
-    if not os.path.exists(REGISTRY_PATH):
-        return {"concepts": []}
-    with open(REGISTRY_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-
-def _save_registry(data: Dict[str, Any]) -> None:
-    os.makedirs(os.path.dirname(REGISTRY_PATH), exist_ok=True)
-    with open(REGISTRY_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
-
-def _match_concept(prompt: str, concepts: List[Dict[str, Any]]):
-    p_low = prompt.lower()
-    for c in concepts:
-        aliases = [a.lower() for a in c.get("aliases", [])]
-        title = str(c.get("title", "")).lower()
-        cid = str(c.get("id", "")).lower()
-        if any(a in p_low for a in aliases) or (cid in p_low) or (title in p_low):
-            return c
-    return None
-
-
 @router.post("/resolve_or_generate")
 async def resolve_or_generate(req: ResolveRequest):
     """先查本地注册表，命中则返回现有页面，否则生成并更新注册表。"""
@@ -49,45 +28,93 @@ async def resolve_or_generate(req: ResolveRequest):
     if not prompt:
         raise HTTPException(status_code=400, detail="prompt 不能为空")
 
-    registry = _load_registry()
-    hit = _match_concept(prompt, registry.get("concepts", []))
+    hit = registry_ops.lookup(prompt)
     if hit:
-        url = hit.get("url", "")
-        # 如果是 .html.bak，复制为 .html 并返回 .html 以避免下载
-        if url.endswith(".html.bak"):
-            abs_bak = os.path.join(BASE_DIR, url)
-            html_url = url[:-4]  # 去掉 .bak
-            abs_html = os.path.join(BASE_DIR, html_url)
-            try:
-                if os.path.exists(abs_bak) and not os.path.exists(abs_html):
-                    os.makedirs(os.path.dirname(abs_html), exist_ok=True)
-                    with open(abs_bak, "r", encoding="utf-8") as fr, open(abs_html, "w", encoding="utf-8") as fw:
-                        fw.write(fr.read())
-                # 更新注册表为 .html
-                hit["url"] = html_url
-                _save_registry(registry)
-                url = html_url
-            except Exception as e:
-                raise HTTPException(status_code=500, detail=f"现有页面处理失败: {e}")
-        return {"kind": "existing", "url": url, "source": "registry"}
-
-    # 未命中 → 调用生成逻辑
+        return _existing_result(hit)
+
+    # 未命中 → 调用生成逻辑（放到线程池执行；同一提示词的并发请求共享一次生成）
     try:
-        gen = generate_from_prompt(prompt=prompt, viz_type=req.vizType, complexity=req.complexity)
-        # 将生成结果登记
-        concepts = registry.get("concepts", [])
-        concepts.append({
-            "id": gen["id"],
-            "aliases": gen.get("aliases", []),
-            "module": "ai_visualizer",
-            "title": gen.get("title", gen["id"]),
-            "url": gen["url"],
-            "type": "generated"
-        })
-        registry["concepts"] = concepts
-        _save_registry(registry)
-        return {"kind": "generated", "url": gen["url"], "source": "generator"}
+        return await _generate(prompt, req.vizType, req.complexity)
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/resolve_or_generate/stream")
+async def resolve_or_generate_stream(prompt: str, vizType: str = "自动", complexity: str = "中等"):
+    """SSE 版本：依次推送 registry / spec / saved / registered 阶段事件，最后以 done 事件给出 URL。
+
+    同一提示词已在生成时，本请求合并进去：先推送 joined，再补发已发生的阶段。
+    """
+    prompt = prompt.strip()
+    if not prompt:
+        raise HTTPException(status_code=400, detail="prompt 不能为空")
+
+    async def job(emit):
+        hit = registry_ops.lookup(prompt)
+        emit("registry", hit=bool(hit), id=hit.get("id") if hit else None)
+        if hit:
+            return _existing_result(hit)
+        return await _generate(prompt, vizType, complexity, emit)
+
+    return stage_stream(job)
+
+
+def _existing_result(hit: Dict[str, Any]) -> Dict[str, Any]:
+    url = hit.get("url", "")
+    # 如果是 .html.bak，复制为 .html 并返回 .html 以避免下载
+    if url.endswith(".html.bak"):
+        abs_bak = os.path.join(BASE_DIR, url)
+        html_url = url[:-4]  # 去掉 .bak
+        abs_html = os.path.join(BASE_DIR, html_url)
+        try:
+            if os.path.exists(abs_bak) and not os.path.exists(abs_html):
+                os.makedirs(os.path.dirname(abs_html), exist_ok=True)
+                with open(abs_bak, "r", encoding="utf-8") as fr, open(abs_html, "w", encoding="utf-8") as fw:
+                    fw.write(fr.read())
+            # 更新注册表为 .html
+            registry_ops.upsert({"id": hit.get("id"), "url": html_url})
+            url = html_url
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"现有页面处理失败: {e}")
+    return {"kind": "existing", "url": url, "source": "registry"}
+
+
+def _flight_key(prompt: str, viz_type: str, complexity: str) -> str:
+    return f"prompt:{registry_ops._normalize(prompt)}|{viz_type}|{complexity}"
+
+
+async def _generate(prompt: str, viz_type: str, complexity: str, on_stage=None) -> Dict[str, Any]:
+    # 阶段事件扇出给同一提示词的所有请求：合并进来的 SSE 连接同样能看到进度
+    return await run_in_threadpool(
+        generation_flight.do_with_stages, _flight_key(prompt, viz_type, complexity),
+        _generate_and_register, prompt, viz_type, complexity, on_stage=on_stage,
+    )
+
+
+def resolve_sync(prompt: str, vizType: str = "自动", complexity: str = "中等", on_stage=None) -> Dict[str, Any]:
+    """同步版本，供后台任务队列在工作线程中调用。"""
+    prompt = prompt.strip()
+    if not prompt:
+        raise ValueError("prompt 不能为空")
+    hit = registry_ops.lookup(prompt)
+    if on_stage:
+        on_stage("registry", hit=bool(hit), id=hit.get("id") if hit else None)
+    if hit:
+        return _existing_result(hit)
+    # 生成由同一提示词的并发请求共享：取消不在 flight 内抛出，返回后再响应
+    record, check_cancelled = defer_cancel(on_stage)
+    result = generation_flight.do_with_stages(
+        _flight_key(prompt, vizType, complexity), _generate_and_register, prompt, vizType, complexity, on_stage=record
+    )
+    check_cancelled()
+    return result
+
+
+def _generate_and_register(prompt: str, viz_type: str, complexity: str, on_stage=None):
+    # generate_from_prompt 已登记：手写条目不会被覆盖，同一规格只合并别名
+    gen = generate_from_prompt(prompt=prompt, viz_type=viz_type, complexity=complexity, on_stage=on_stage)
+    if on_stage:
+        on_stage("registered", id=gen["id"])
+    return {"kind": "generated", "url": gen["url"], "source": "generator"}
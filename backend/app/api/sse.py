@@ -0,0 +1,60 @@
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+# 阶段回调：on_stage("spec", concept=..., ...)；可在工作线程中调用
+StageCallback = Callable[..., None]
+
+HEARTBEAT_SECONDS = 15.0
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def stage_stream(job: Callable[[StageCallback], Awaitable[Any]]) -> StreamingResponse:
+    """把一次生成包装为 Server-Sent Events 流。
+
+    ``job(emit)`` 在事件循环中执行，阻塞部分自行放到线程池；``emit`` 线程安全，每次调用
+    推送一条 ``event: stage``。结束时推送 ``event: done``（返回值）或 ``event: error``。
+    空闲时每 15 秒发一行注释作为心跳，反向代理不会因连接长时间无数据而断开。
+    客户端中途断开不会取消生成，结果仍会落盘与登记。
+    """
+    async def events():
+        loop = asyncio.get_running_loop()
+        queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+        started = time.perf_counter()
+
+        def emit(stage: str, **data: Any) -> None:
+            event = {"stage": stage, "elapsed_ms": round((time.perf_counter() - started) * 1000, 1), **data}
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+        task = asyncio.ensure_future(job(emit))
+        # 完成信号与 emit 走同一队列，保证阶段事件先于结果送出
+        task.add_done_callback(lambda _: loop.call_soon(queue.put_nowait, None))
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if event is None:
+                break
+            yield sse_event("stage", event)
+
+        try:
+            yield sse_event("done", task.result())
+        except HTTPException as e:
+            yield sse_event("error", {"status": e.status_code, "detail": e.detail})
+        except Exception as e:
+            yield sse_event("error", {"status": 500, "detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,26 +1,59 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 # 这里按你的目录导入新端点（使用绝对包路径）
+# 各路由模块导入时只登记端点；numpy/scipy、LLM 客户端与沙箱进程在首次使用或后台预热时才加载
 from backend.app.api.endpoints.visualmind_generate import router as visualmind_router
 from backend.app.api.resolve_or_generate import router as ai_visualizer_router
+from backend.app.api.jobs import router as jobs_router
+from backend.app.api.batch import router as batch_router
+from backend.api.page_cache import page_cache
+from backend.api.static_assets import PrecompressedStaticFiles
+from backend.app.services.job_queue import job_queue
+from backend.app.services.generation_executor import generation_executor
+from backend.app.services.warmup import start_warmup, warmup_state
+from backend.config import STARTUP_WARMUP
 
-app = FastAPI()
 
-# 允许前端直接调用
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"], allow_credentials=True,
-    allow_methods=["*"], allow_headers=["*"],
-)
+def create_app(warmup: bool = STARTUP_WARMUP) -> FastAPI:
+    """应用工厂：``uvicorn --factory backend.app.main:create_app``，或直接使用模块级 ``app``。
 
-# 挂载静态目录，供浏览器直接访问现有与生成页面
-app.mount("/app", StaticFiles(directory="app", html=True), name="app")
+    ``warmup`` 为 True 时，服务开始监听后在后台线程预热重依赖（见 ``services/warmup.py``）。
+    """
+    app = FastAPI()
 
-# 挂载端点
-app.include_router(visualmind_router, prefix="/api/v1", tags=["visualmind"])  # 旧端点
-app.include_router(ai_visualizer_router, prefix="/api", tags=["ai_visualizer"])  # 新端点：/api/resolve_or_generate
+    # 允许前端直接调用
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"], allow_credentials=True,
+        allow_methods=["*"], allow_headers=["*"],
+    )
 
-@app.get("/healthz")
-def healthz():
-    return {"ok": True}
+    # 挂载静态目录，供浏览器直接访问现有与生成页面（按 Accept-Encoding 提供预压缩变体，支持 304）
+    app.mount("/app", PrecompressedStaticFiles(directory="app", html=True), name="app")
+
+    # 挂载端点
+    app.include_router(visualmind_router, prefix="/api/v1", tags=["visualmind"])  # 旧端点
+    app.include_router(ai_visualizer_router, prefix="/api", tags=["ai_visualizer"])  # 新端点：/api/resolve_or_generate
+    app.include_router(jobs_router, prefix="/api", tags=["jobs"])  # 后台任务：/api/jobs
+    app.include_router(batch_router, prefix="/api", tags=["batch"])  # 批量预生成：/api/batch_generate
+
+    if warmup:
+        @app.on_event("startup")
+        def _start_warmup():
+            # 不阻塞启动：沙箱进程、numpy/scipy 与提供方客户端在后台线程中就绪
+            start_warmup()
+
+    @app.get("/healthz")
+    def healthz():
+        return {
+            "ok": True,
+            "generation": generation_executor.stats(),
+            "jobs": job_queue.stats(),
+            "warmup": warmup_state,
+            "page_cache": page_cache.stats(),
+        }
+
+    return app
+
+
+app = create_app()
@@ -0,0 +1,260 @@
+"""批量生成：为整门课程的目录预生成可视化页面。
+
+条目可以是提示词或现成规格；先并发抽取规格，按规格哈希去重后并发构建页面，
+最后一次性写入注册表，并报告每个条目的耗时::
+
+    python -m backend.app.services.batch_generation --toc app/modules/probability_statistics/toc_probability.md -j 8
+    python -m backend.app.services.batch_generation 正态分布 泊松分布 --dry-run
+    python -m backend.app.services.batch_generation --file prompts.jsonl   # 每行一个提示词或 {"prompt"|"spec", "aliases"}
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+from backend.api import registry_ops
+from backend.app.api.generate_visualization import (
+    _slugify,
+    _validate_spec,
+    extract_spec,
+    render_spec,
+    spec_digest,
+)
+from backend.config import BATCH_PARALLELISM
+
+logger = logging.getLogger("app")
+
+GENERATED_URL = "app/modules/ai_visualizer/generated/"
+
+Item = Dict[str, Any]
+ItemCallback = Callable[[Dict[str, Any]], None]
+
+
+def parse_toc(path: str) -> List[Item]:
+    """解析模块目录文件：``id | 标题 | 简述 | 可选：viz | 可选：dataPath``，``#`` 开头为注释。"""
+    items: List[Item] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#") or "|" not in line:
+                continue
+            cols = [c.strip() for c in line.split("|")]
+            cid, title = cols[0], cols[1] if len(cols) > 1 else ""
+            desc = cols[2] if len(cols) > 2 else ""
+            if not title:
+                continue
+            items.append({
+                "prompt": f"{title}：{desc}" if desc else title,
+                "aliases": [a for a in (title, cid) if a],
+            })
+    return items
+
+
+def normalize_items(raw: Iterable[Union[str, Item]]) -> List[Item]:
+    """字符串视为提示词；字典需含 ``prompt`` 或 ``spec``，可附 ``aliases``。"""
+    items: List[Item] = []
+    for entry in raw:
+        if isinstance(entry, str):
+            entry = {"prompt": entry}
+        prompt = str(entry.get("prompt") or "").strip()
+        spec = entry.get("spec")
+        if not prompt and not spec:
+            raise ValueError("批量条目需包含 prompt 或 spec")
+        aliases = [str(a) for a in entry.get("aliases") or [] if a]
+        items.append({"prompt": prompt, "spec": spec, "aliases": aliases})
+    return items
+
+
+def _ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def run_batch(
+    raw_items: Iterable[Union[str, Item]],
+    parallelism: int = BATCH_PARALLELISM,
+    viz_type: str = "自动",
+    complexity: str = "中等",
+    skip_existing: bool = True,
+    dry_run: bool = False,
+    on_item: Optional[ItemCallback] = None,
+) -> Dict[str, Any]:
+    """执行一批生成，返回汇总与逐条结果。
+
+    - 提示词已在注册表命中（``skip_existing``）的条目记为 existing，不再生成；
+    - 规格哈希相同的条目只构建一次，其余记为 duplicate，提示词并入同一条目的别名；
+    - 注册表在全部构建完成后通过 ``upsert_many`` 一次写入；``dry_run`` 只抽取规格。
+
+    ``viz_type`` / ``complexity`` 目前不影响规格抽取，与单条端点保持一致。
+    """
+    items = normalize_items(raw_items)
+    started = time.perf_counter()
+    results: List[Dict[str, Any]] = [
+        {"index": i, "prompt": it["prompt"], "status": "pending", "timings": {}} for i, it in enumerate(items)
+    ]
+
+    def resolve(i: int) -> None:
+        item, res = items[i], results[i]
+        t0 = time.perf_counter()
+        try:
+            if skip_existing and item["prompt"] and not item["spec"]:
+                hit = registry_ops.lookup(item["prompt"])
+                if hit:
+                    res.update(status="existing", id=hit.get("id"), url=hit.get("url"))
+                    return
+            if item["spec"]:
+                spec, source = dict(item["spec"]), "given"
+                _validate_spec(spec)
+            else:
+                spec, source = extract_spec(item["prompt"])
+            res.update(spec=spec, source=source, spec_hash=spec_digest(spec))
+        except Exception as e:
+            res.update(status="failed", error=str(e))
+        finally:
+            res["timings"]["spec_ms"] = _ms(t0)
+
+    workers = max(1, parallelism)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as pool:
+        list(pool.map(resolve, range(len(items))))
+
+        # 按规格哈希去重：每个哈希由第一个条目负责构建
+        owners: Dict[str, Dict[str, Any]] = {}
+        for res in results:
+            if res["status"] != "pending":
+                continue
+            owner = owners.setdefault(res["spec_hash"], res)
+            if owner is not res:
+                res.update(status="duplicate", duplicate_of=owner["index"])
+
+        def render(res: Dict[str, Any]) -> None:
+            t0 = time.perf_counter()
+            try:
+                fname = render_spec(res["spec"], res["spec_hash"])
+                res.update(status="generated", url=GENERATED_URL + fname)
+            except Exception as e:
+                res.update(status="failed", error=str(e))
+            finally:
+                res["timings"]["render_ms"] = _ms(t0)
+
+        if not dry_run:
+            list(pool.map(render, owners.values()))
+
+    entries = [] if dry_run else _registry_entries(items, results, owners)
+    registered = registry_ops.upsert_many(entries) if entries else 0
+
+    for res in results:
+        owner = owners.get(res.get("spec_hash") or "")
+        if res["status"] == "duplicate" and owner is not None:
+            res.update(id=owner.get("id"), url=owner.get("url"))
+        res["timings"]["total_ms"] = round(sum(res["timings"].values()), 1)
+        res.pop("spec", None)
+        if on_item:
+            on_item(res)
+
+    summary: Dict[str, int] = {}
+    for res in results:
+        summary[res["status"]] = summary.get(res["status"], 0) + 1
+    logger.info("批量生成完成: %d 条, %d 个不同规格, 登记 %d 条, %s", len(items), len(owners), registered, summary)
+    return {
+        "total": len(items),
+        "unique_specs": len(owners),
+        "registered": registered,
+        "parallelism": workers,
+        "elapsed_ms": _ms(started),
+        "summary": summary,
+        "items": results,
+    }
+
+
+def _registry_entries(
+    items: List[Item], results: List[Dict[str, Any]], owners: Dict[str, Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """每个成功构建的规格对应一条注册表条目，别名为所有同哈希条目的提示词。"""
+    existing = {c.get("id"): c for c in registry_ops.load_registry().get("concepts", [])}
+    aliases: Dict[str, List[str]] = {}
+    for item, res in zip(items, results):
+        if res.get("spec_hash") in owners:
+            bucket = aliases.setdefault(res["spec_hash"], [])
+            for a in [item["prompt"], *item["aliases"]]:
+                if a and a not in bucket:
+                    bucket.append(a)
+
+    entries: List[Dict[str, Any]] = []
+    used: Dict[str, str] = {}
+    for digest, res in owners.items():
+        if res["status"] != "generated":
+            continue
+        spec = res["spec"]
+        cid = str(spec.get("concept") or _slugify(res["prompt"]))
+        prior = existing.get(cid)
+        # 同批次内同一 concept 的不同参数、已登记的其他规格或手写页面：加哈希后缀，不覆盖原条目
+        if used.get(cid, digest) != digest or registry_ops.id_taken(prior, digest):
+            cid = f"{cid}_{digest[:8]}"
+            prior = existing.get(cid)
+        used[cid] = digest
+        merged = list((prior or {}).get("aliases") or [])
+        merged += [a for a in aliases.get(digest, []) if a not in merged]
+        res["id"] = cid
+        entries.append({
+            "id": cid,
+            "aliases": merged,
+            "module": "ai_visualizer",
+            "title": spec.get("title", cid),
+            "url": res["url"],
+            "type": "generated",
+            "spec_hash": digest,
+        })
+    return entries
+
+
+def _read_items_file(path: str) -> List[Union[str, Item]]:
+    """每行一个提示词，或一个 JSON 对象；``#`` 开头为注释。"""
+    out: List[Union[str, Item]] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            out.append(json.loads(line) if line.startswith("{") else line)
+    return out
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="批量预生成概念可视化页面")
+    parser.add_argument("prompts", nargs="*", help="提示词")
+    parser.add_argument("--toc", action="append", default=[], help="模块目录文件（可重复）")
+    parser.add_argument("--file", action="append", default=[], help="条目文件：每行提示词或 JSON")
+    parser.add_argument("-j", "--parallelism", type=int, default=BATCH_PARALLELISM)
+    parser.add_argument("--viz-type", default="自动")
+    parser.add_argument("--complexity", default="中等")
+    parser.add_argument("--force", action="store_true", help="注册表已命中的提示词也重新生成")
+    parser.add_argument("--dry-run", action="store_true", help="只抽取规格并去重，不落盘、不写注册表")
+    args = parser.parse_args(argv)
+
+    raw: List[Union[str, Item]] = list(args.prompts)
+    for path in args.toc:
+        raw.extend(parse_toc(path))
+    for path in args.file:
+        raw.extend(_read_items_file(path))
+    if not raw:
+        parser.error("没有条目：请给出提示词、--toc 或 --file")
+
+    def progress(res: Dict[str, Any]) -> None:
+        print(f"[{res['status']}] {res['prompt']} {res['timings']}", file=sys.stderr)
+
+    report = run_batch(
+        raw,
+        parallelism=args.parallelism,
+        viz_type=args.viz_type,
+        complexity=args.complexity,
+        skip_existing=not args.force,
+        dry_run=args.dry_run,
+        on_item=progress,
+    )
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
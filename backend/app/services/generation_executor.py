@@ -0,0 +1,91 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from backend.config import GENERATION_MAX_QUEUE, GENERATION_WORKERS
+
+
+class ExecutorBusy(RuntimeError):
+    """排队任务数已达上限，调用方应返回 503 让客户端稍后重试。"""
+
+
+class BoundedExecutor:
+    """供 async 端点使用的有界线程池。
+
+    生成链路（LLM HTTP 请求、exec 用户代码、pio.to_html）都是阻塞调用，直接在
+    ``async def`` 中调用会卡住整个事件循环。这里把它们交给固定大小的线程池，端点只
+    ``await`` 结果；同时限制排队深度，超出 ``max_workers + max_queue`` 时立即拒绝，
+    避免慢请求无限堆积。
+    """
+
+    def __init__(self, max_workers: int = 4, max_queue: int = 16, name: str = "generation"):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.name = name
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._running = 0
+        self._pending = 0  # 已提交未完成（含正在执行）
+        self.rejected = 0
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+        return self._pool
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise ExecutorBusy("生成任务排队已满，请稍后重试")
+            self._pending += 1
+
+    def _release(self, _future: Any = None) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def _run(self, fn: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> Any:
+        with self._lock:
+            self._running += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """在线程池中执行 ``fn`` 并等待结果；队列已满时抛出 ExecutorBusy。
+
+        请求被取消（客户端断开）时已开始的任务仍会执行完，只是结果被丢弃。
+        """
+        self._acquire()
+        try:
+            future = self._get_pool().submit(self._run, fn, args, kwargs)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+
+# VisualMind 生成端点共用的实例
+generation_executor = BoundedExecutor(GENERATION_WORKERS, GENERATION_MAX_QUEUE)
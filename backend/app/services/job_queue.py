@@ -0,0 +1,224 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from backend.config import JOB_MAX_QUEUED, JOB_RESULT_TTL, JOB_WORKERS
+
+logger = logging.getLogger("app")
+
+# 数值越小越先执行；交互请求不会排在批量重生成之后
+PRIORITIES = {"interactive": 0, "normal": 5, "batch": 10}
+
+Handler = Callable[..., Any]
+
+
+class QueueFull(RuntimeError):
+    """排队任务数已达上限。"""
+
+
+class JobCancelled(BaseException):
+    """任务在阶段边界处被取消。
+
+    继承 BaseException：生成链路里大量 ``except Exception`` 兜底（如修复循环），
+    不能把取消当成普通失败吞掉。
+    """
+
+
+def defer_cancel(on_stage: Optional[Callable[..., None]]) -> Tuple[Optional[Callable[..., None]], Callable[[], None]]:
+    """包装阶段回调，供合并执行（``generation_flight``）的共享工作使用。
+
+    共享工作的异常会传给所有合并进来的调用者：领头的后台任务被取消时若直接抛出
+    ``JobCancelled``，同一提示词的交互请求也会随之失败。包装后的回调在共享工作内只记录进度、
+    不抛出；flight 返回后调用返回的 ``check()``，由任务自己响应取消。
+    """
+    if on_stage is None:
+        return None, lambda: None
+    cancelled = []
+
+    def record(stage: str, **data: Any) -> None:
+        try:
+            on_stage(stage, **data)
+        except JobCancelled:
+            cancelled.append(stage)
+
+    def check() -> None:
+        if cancelled:
+            raise JobCancelled()
+
+    return record, check
+
+
+class Job:
+    __slots__ = (
+        "id", "kind", "payload", "priority", "status", "created_at", "started_at",
+        "finished_at", "stages", "result", "error", "cancel_requested",
+    )
+
+    def __init__(self, kind: str, payload: Dict[str, Any], priority: int):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.payload = payload
+        self.priority = priority
+        self.status = "queued"  # queued / running / succeeded / failed / cancelled
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.stages: List[Dict[str, Any]] = []
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.cancel_requested = False
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed", "cancelled")
+
+    def on_stage(self, stage: str, **data: Any) -> None:
+        """传给生成函数的阶段回调：记录进度，并在此处响应取消。"""
+        if self.cancel_requested:
+            raise JobCancelled()
+        self.stages.append({"stage": stage, "at": time.time(), **data})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "priority": self.priority,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "stages": list(self.stages),
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    """进程内优先级任务队列。
+
+    - 独立的工作线程池（``workers``），与 Web 请求及同步生成端点的线程池分开扩缩；
+    - 按优先级、再按提交顺序出队；
+    - 取消：排队中的任务直接标记取消；运行中的任务在下一个阶段回调处中止；
+    - 完成（成功/失败/取消）的任务保留 ``result_ttl`` 秒供轮询，之后清除。
+    """
+
+    def __init__(self, workers: int = 2, result_ttl: float = 3600.0, max_queued: int = 1000):
+        self.workers = workers
+        self.result_ttl = result_ttl
+        self.max_queued = max_queued
+        self._handlers: Dict[str, Handler] = {}
+        self._jobs: Dict[str, Job] = {}
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._swept_at = 0.0
+        self._running = 0
+
+    def register(self, kind: str, handler: Handler) -> None:
+        """注册任务类型；``handler(**payload, on_stage=...)`` 在工作线程中执行。"""
+        self._handlers[kind] = handler
+
+    def _start(self) -> None:
+        if self._threads:
+            return
+        for i in range(self.workers):
+            t = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def _queued(self) -> int:
+        return sum(1 for _, _, job in self._heap if job.status == "queued")
+
+    def submit(self, kind: str, payload: Dict[str, Any], priority: int = PRIORITIES["normal"]) -> Job:
+        if kind not in self._handlers:
+            raise ValueError(f"未知的任务类型: {kind}")
+        job = Job(kind, payload, priority)
+        with self._cond:
+            self._sweep()
+            if self._queued() >= self.max_queued:
+                raise QueueFull("任务队列已满，请稍后重试")
+            self._start()
+            self._jobs[job.id] = job
+            heapq.heappush(self._heap, (priority, next(self._seq), job))
+            self._cond.notify()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._cond:
+            self._sweep()
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.done:
+                return job
+            if job.status == "queued":
+                # 留在堆里，出队时跳过
+                job.status = "cancelled"
+                job.finished_at = time.time()
+            else:
+                job.cancel_requested = True
+            return job
+
+    def position(self, job: Job) -> Optional[int]:
+        """排队中任务前面还有几个任务。"""
+        with self._cond:
+            if job.status != "queued":
+                return None
+            mine = next(((p, seq) for p, seq, j in self._heap if j is job), None)
+            return sum(1 for p, seq, j in self._heap if j.status == "queued" and (p, seq) < mine)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return {"workers": self.workers, "running": self._running, **counts}
+
+    def _sweep(self) -> None:
+        now = time.time()
+        if now - self._swept_at < 1.0:
+            return
+        self._swept_at = now
+        expired = [jid for jid, j in self._jobs.items() if j.done and j.finished_at < now - self.result_ttl]
+        for jid in expired:
+            del self._jobs[jid]
+
+    def _next(self) -> Job:
+        with self._cond:
+            while True:
+                while self._heap:
+                    _, _, job = heapq.heappop(self._heap)
+                    if job.status == "queued":
+                        job.status = "running"
+                        job.started_at = time.time()
+                        self._running += 1
+                        return job
+                self._cond.wait(timeout=5.0)
+                self._sweep()
+
+    def _work(self) -> None:
+        while True:
+            job = self._next()
+            try:
+                result = self._handlers[job.kind](**job.payload, on_stage=job.on_stage)
+                status, error = "succeeded", None
+            except JobCancelled:
+                result, status, error = None, "cancelled", None
+            except Exception as e:
+                logger.exception("后台任务失败: %s", job.id)
+                detail = getattr(e, "detail", None) or str(e)
+                result, status, error = None, "failed", str(detail)
+            with self._cond:
+                job.result, job.status, job.error = result, status, error
+                job.finished_at = time.time()
+                self._running -= 1
+
+
+job_queue = JobQueue(JOB_WORKERS, JOB_RESULT_TTL, JOB_MAX_QUEUED)
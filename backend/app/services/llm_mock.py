@@ -0,0 +1,136 @@
+"""本地回放型 LLM 提供方，用于离线、可复现地压测生成链路。
+
+设置 ``LLM_MOCK_FILE`` 后，``llm_providers.get_provider`` 对所有提供方名都返回
+``MockProvider``：按录制文件回放规格 JSON / Plotly 代码，不访问网络。录制文件为 JSONL，
+每行一条记录::
+
+    {"name": "spec_normal", "system": "输出一个 JSON", "match": "正态", "responses": ["{...}"]}
+
+- ``system`` / ``match``：正则，分别在 system 消息与其余消息文本中搜索，两者都命中（省略即视为
+  命中）时选中该记录；按文件顺序取第一条；
+- ``responses``（或单个 ``response``）：同一记录被多次命中时依次轮换，可用来录制
+  “先给出有问题的代码、修复提示后再给正确代码”的序列，从而覆盖修复循环。
+
+延迟与错误按分布注入（``LLM_MOCK_LATENCY``、``LLM_MOCK_ERROR_RATE``、``LLM_MOCK_SEED``）：
+注入的错误以 503 返回，走与真实提供方相同的重试/截止时间逻辑。
+"""
+import asyncio
+import json
+import math
+import random
+import re
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from backend.app.services.llm_providers import LLMError, LLMProvider, Messages
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """解析延迟分布：``fixed:s``、``uniform:a,b``、``normal:mu,sigma``、``lognormal:median,sigma``（单位秒）。"""
+    kind, _, args = (spec or "fixed:0").partition(":")
+    values = [float(v) for v in args.split(",") if v.strip()] or [0.0]
+    kind = kind.strip().lower()
+    if kind == "fixed":
+        return lambda rng: values[0]
+    if kind == "uniform":
+        lo, hi = values[0], values[1] if len(values) > 1 else values[0]
+        return lambda rng: rng.uniform(lo, hi)
+    if kind == "normal":
+        mu, sigma = values[0], values[1] if len(values) > 1 else 0.0
+        return lambda rng: max(0.0, rng.gauss(mu, sigma))
+    if kind == "lognormal":
+        median, sigma = values[0], values[1] if len(values) > 1 else 0.5
+        mu = math.log(median) if median > 0 else 0.0
+        return lambda rng: rng.lognormvariate(mu, sigma) if median > 0 else 0.0
+    raise ValueError(f"未知的延迟分布: {spec}")
+
+
+def load_recordings(path: str) -> List[Dict[str, Any]]:
+    records: List[Dict[str, Any]] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            rec = json.loads(line)
+            responses = rec.get("responses") or [rec.get("response", "")]
+            records.append({
+                "name": rec.get("name") or f"record_{lineno}",
+                "system": re.compile(rec["system"]) if rec.get("system") else None,
+                "match": re.compile(rec["match"]) if rec.get("match") else None,
+                "responses": [r if isinstance(r, str) else json.dumps(r, ensure_ascii=False) for r in responses],
+            })
+    return records
+
+
+class MockProvider(LLMProvider):
+    """回放录制响应的提供方；并发上限、截止时间与重试沿用 ``LLMProvider``。"""
+
+    default_model = "mock"
+
+    def __init__(
+        self,
+        name: str,
+        records: List[Dict[str, Any]],
+        latency: str = "fixed:0",
+        error_rate: float = 0.0,
+        seed: Optional[int] = None,
+        **kwargs: Any,
+    ):
+        super().__init__(api_key="mock", base_url="mock://", **kwargs)
+        self.name = name
+        self.records = records
+        self.error_rate = error_rate
+        self._latency = parse_latency(latency)
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._turns: Counter = Counter()
+        # 观测：各记录命中次数与注入的错误数，压测时据此统计修复循环的开销
+        self.calls: Counter = Counter()
+        self.injected_errors = 0
+
+    def _ensure_client(self) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return None
+
+    def _build_request(self, messages: Messages, model: str, temperature: float) -> Dict[str, Any]:
+        return {"messages": messages, "model": model}
+
+    def _parse_response(self, data: Dict[str, Any]) -> str:
+        return data["text"]
+
+    def _pick(self, messages: Messages) -> Dict[str, Any]:
+        system = "\n".join(m.get("content", "") for m in messages if m.get("role") == "system")
+        text = "\n".join(m.get("content", "") for m in messages if m.get("role") != "system")
+        for rec in self.records:
+            if rec["system"] is not None and not rec["system"].search(system):
+                continue
+            if rec["match"] is None or rec["match"].search(text):
+                return rec
+        raise LLMError(f"回放文件中没有与请求匹配的记录: {text[-80:]!r}")
+
+    async def _send(self, client: Any, request: Dict[str, Any], timeout: float) -> httpx.Response:
+        async with self._semaphore:
+            with self._rng_lock:
+                delay = self._latency(self._rng)
+                fail = self._rng.random() < self.error_rate
+            await asyncio.sleep(min(delay, timeout))
+            if delay > timeout:
+                raise httpx.ReadTimeout("mock 响应超时")
+            req = httpx.Request("POST", f"mock://{self.name}")
+            if fail:
+                self.injected_errors += 1
+                return httpx.Response(503, request=req)
+            rec = self._pick(request["messages"])
+            turn = self._turns[rec["name"]]
+            self._turns[rec["name"]] += 1
+            self.calls[rec["name"]] += 1
+            text = rec["responses"][turn % len(rec["responses"])]
+            return httpx.Response(200, json={"text": text}, request=req)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"calls": dict(self.calls), "injected_errors": self.injected_errors}
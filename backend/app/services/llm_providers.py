@@ -0,0 +1,279 @@
+"""共享的 LLM 调用层。
+
+此前每次调用都新建 ``OpenAI(...)`` 客户端、重新 ``genai.configure`` 并构造 ``GenerativeModel``，
+每个请求都要重新握手 TLS，且没有任何超时。这里为每个提供方维护一个长生命周期的
+``httpx.AsyncClient``（连接保活复用），并统一：
+
+- 每个提供方一个信号量，限制同时在途的请求数，慢提供方不会占满所有工作线程；
+- 单次请求超时 + 整体截止时间（含重试与等待信号量的时间）；
+- 对连接错误、429 与 5xx 做带抖动的指数退避重试。
+
+所有客户端运行在一个后台事件循环线程上，同步代码通过 ``chat()`` 调用，
+异步代码可直接 ``await achat()``。httpx 在第一次真正发请求时才导入，不计入服务启动时间。
+"""
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
+
+from backend.config import (
+    LLM_CONCURRENCY,
+    LLM_DEADLINE,
+    LLM_MAX_CONNECTIONS,
+    LLM_MAX_RETRIES,
+    LLM_MOCK_ERROR_RATE,
+    LLM_MOCK_FILE,
+    LLM_MOCK_LATENCY,
+    LLM_MOCK_SEED,
+    LLM_TIMEOUT,
+)
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger("app")
+
+Messages = List[Dict[str, str]]
+
+_RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class LLMError(RuntimeError):
+    """LLM 调用失败（未配置、超时或重试耗尽）。"""
+
+
+class LLMProvider:
+    """单个 LLM 提供方：一个保活的异步 HTTP 客户端 + 并发信号量 + 重试策略。"""
+
+    name = ""
+    default_model = ""
+
+    def __init__(
+        self,
+        api_key: Optional[str],
+        base_url: str,
+        concurrency: int = 4,
+        timeout: float = 30.0,
+        max_retries: int = 2,
+        max_connections: int = 10,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_connections = max_connections
+        # 以下对象绑定到后台事件循环，首次使用时在该循环内创建
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key)
+
+    def _ensure_client(self) -> "httpx.AsyncClient":
+        if self._client is None:
+            import httpx
+
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=60.0,
+                ),
+            )
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._client
+
+    # --- provider specifics ---
+
+    def _build_request(self, messages: Messages, model: str, temperature: float) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def _parse_response(self, data: Dict[str, Any]) -> str:
+        raise NotImplementedError
+
+    # --- call ---
+
+    async def _send(self, client: "httpx.AsyncClient", request: Dict[str, Any], timeout: float) -> "httpx.Response":
+        async with self._semaphore:
+            return await client.request(timeout=timeout, **request)
+
+    async def complete(
+        self,
+        messages: Messages,
+        model: Optional[str] = None,
+        temperature: float = 0.2,
+        deadline: Optional[float] = None,
+    ) -> str:
+        """发送一次对话补全请求并返回文本；``deadline`` 为整体时限（秒）。"""
+        if not self.configured:
+            raise LLMError(f"{self.name} 未配置 API Key")
+        import httpx
+
+        client = self._ensure_client()
+        request = self._build_request(messages, model or self.default_model, temperature)
+        expires = time.monotonic() + (deadline if deadline is not None else LLM_DEADLINE)
+        attempt = 0
+        while True:
+            remaining = expires - time.monotonic()
+            if remaining <= 0:
+                raise LLMError(f"{self.name} 调用超过截止时间")
+            try:
+                # 截止时间同时覆盖排队等待信号量的时间
+                rsp = await asyncio.wait_for(self._send(client, request, min(self.timeout, remaining)), remaining)
+                if rsp.status_code not in _RETRY_STATUS:
+                    rsp.raise_for_status()
+                    return self._parse_response(rsp.json())
+                error: Exception = LLMError(f"{self.name} 返回 {rsp.status_code}")
+            except (httpx.TransportError, asyncio.TimeoutError) as e:
+                error = e
+            except httpx.HTTPStatusError as e:
+                raise LLMError(f"{self.name} 请求失败: {e.response.status_code} {e.response.text[:200]}") from e
+            reason = str(error) or type(error).__name__
+            if attempt >= self.max_retries:
+                raise LLMError(f"{self.name} 调用失败（已重试 {attempt} 次）: {reason}") from error
+            # 指数退避 + 全抖动，避免多个请求同时重试
+            delay = random.uniform(0, min(8.0, 0.5 * 2 ** attempt))
+            attempt += 1
+            logger.warning("%s 调用失败，%.2fs 后第 %d 次重试: %s", self.name, delay, attempt, reason)
+            await asyncio.sleep(min(delay, max(0.0, expires - time.monotonic())))
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class OpenAIProvider(LLMProvider):
+    name = "openai"
+    default_model = "gpt-4o"
+
+    def _build_request(self, messages: Messages, model: str, temperature: float) -> Dict[str, Any]:
+        return {
+            "method": "POST",
+            "url": "/chat/completions",
+            "headers": {"Authorization": f"Bearer {self.api_key}"},
+            "json": {"model": model, "messages": messages, "temperature": temperature},
+        }
+
+    def _parse_response(self, data: Dict[str, Any]) -> str:
+        return data["choices"][0]["message"]["content"] or ""
+
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+    default_model = "gemini-2.5-flash"
+
+    def _build_request(self, messages: Messages, model: str, temperature: float) -> Dict[str, Any]:
+        system = "\n".join(m["content"] for m in messages if m["role"] == "system")
+        contents = [
+            {"role": "model" if m["role"] == "assistant" else "user", "parts": [{"text": m["content"]}]}
+            for m in messages if m["role"] != "system"
+        ]
+        body: Dict[str, Any] = {"contents": contents, "generationConfig": {"temperature": temperature}}
+        if system:
+            body["systemInstruction"] = {"parts": [{"text": system}]}
+        return {
+            "method": "POST",
+            "url": f"/models/{model}:generateContent",
+            "headers": {"x-goog-api-key": self.api_key},
+            "json": body,
+        }
+
+    def _parse_response(self, data: Dict[str, Any]) -> str:
+        candidates = data.get("candidates") or []
+        if not candidates:
+            return ""
+        parts = candidates[0].get("content", {}).get("parts") or []
+        return "".join(p.get("text", "") for p in parts)
+
+
+# --- 后台事件循环与提供方注册 ---
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_providers: Dict[str, LLMProvider] = {}
+_lock = threading.Lock()
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    if _loop is None:
+        with _lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="llm-loop", daemon=True).start()
+                _loop = loop
+    return _loop
+
+
+def _create_provider(name: str) -> LLMProvider:
+    common = dict(
+        concurrency=LLM_CONCURRENCY,
+        timeout=LLM_TIMEOUT,
+        max_retries=LLM_MAX_RETRIES,
+        max_connections=LLM_MAX_CONNECTIONS,
+    )
+    if LLM_MOCK_FILE:
+        # 离线压测：所有提供方都回放录制的响应
+        from backend.app.services.llm_mock import MockProvider, load_recordings
+
+        return MockProvider(
+            name,
+            load_recordings(LLM_MOCK_FILE),
+            latency=LLM_MOCK_LATENCY,
+            error_rate=LLM_MOCK_ERROR_RATE,
+            seed=LLM_MOCK_SEED,
+            **common,
+        )
+    if name == "openai":
+        provider: LLMProvider = OpenAIProvider(
+            os.getenv("OPENAI_API_KEY"), os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1"), **common
+        )
+        provider.default_model = os.getenv("OPENAI_MODEL", provider.default_model)
+        return provider
+    if name == "gemini":
+        return GeminiProvider(
+            os.getenv("GEMINI_API_KEY"),
+            os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta"),
+            **common,
+        )
+    raise LLMError(f"未知的 LLM 提供方: {name}")
+
+
+def get_provider(name: str) -> LLMProvider:
+    """进程内每个提供方一个实例（共享连接池与信号量）。"""
+    provider = _providers.get(name)
+    if provider is None:
+        with _lock:
+            provider = _providers.get(name)
+            if provider is None:
+                provider = _providers[name] = _create_provider(name)
+    return provider
+
+
+def register_provider(name: str, provider: LLMProvider) -> None:
+    """替换某个提供方（测试或接入其他兼容服务时使用）。"""
+    with _lock:
+        _providers[name] = provider
+
+
+def _resolve(provider: Union[str, LLMProvider]) -> LLMProvider:
+    return get_provider(provider) if isinstance(provider, str) else provider
+
+
+async def achat(provider: Union[str, LLMProvider], messages: Messages, **kwargs: Any) -> str:
+    """在调用方事件循环中使用：把请求转交后台循环执行并等待结果。"""
+    coro = _resolve(provider).complete(messages, **kwargs)
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, _get_loop()))
+
+
+def chat(provider: Union[str, LLMProvider], messages: Messages, **kwargs: Any) -> str:
+    """同步调用（工作线程中使用）；阻塞至结果返回或截止时间到达。"""
+    coro = _resolve(provider).complete(messages, **kwargs)
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
@@ -0,0 +1,373 @@
+"""LLM 生成代码的沙箱执行池。
+
+``VisualMindService`` 原先在 API 进程里直接 ``exec`` 生成的代码：没有超时、没有内存上限，
+一段死循环或超大数组就能拖死整个服务。这里改为一组预先启动的工作进程：
+
+- 每个进程启动时预先导入 numpy、plotly、scipy.stats，单次执行不再付导入开销；
+- 每个任务设 CPU 时间上限（RLIMIT_CPU，超限触发 SIGXCPU）与内存上限
+  （RLIMIT_AS 限制地址空间增量，执行后再检查常驻内存，超出即回收该进程）；
+- 父进程另设墙钟超时，卡在 C 扩展里的任务直接 kill 并补一个新进程；
+- 每个进程执行 ``max_jobs`` 个任务后回收，避免用户代码残留状态与内存碎片累积；
+- 结果以 HTML 片段或 figure JSON 返回，父进程不需要再持有 Figure 对象。
+
+``SANDBOX_WORKERS=0`` 时退化为进程内执行（开发调试用）。
+"""
+import atexit
+import logging
+import math
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+from typing import Any, Dict, Optional
+
+try:
+    import resource  # POSIX；Windows 下不设 CPU/内存上限，仅保留墙钟超时
+except ImportError:
+    resource = None
+
+from backend.config import (
+    FIGURE_DOWNSAMPLE,
+    FIGURE_ENCODING,
+    FIGURE_FLOAT32_RTOL,
+    FIGURE_LINE_METHOD,
+    FIGURE_MAX_LINE_POINTS,
+    FIGURE_MAX_SCATTER_POINTS,
+    FIGURE_MAX_SURFACE_CELLS,
+    FIGURE_TYPED_MIN_LENGTH,
+    SANDBOX_CPU_SECONDS,
+    SANDBOX_MAX_JOBS,
+    SANDBOX_MEMORY_MB,
+    SANDBOX_TIMEOUT,
+    SANDBOX_WORKERS,
+)
+
+logger = logging.getLogger("app")
+
+_STARTUP_TIMEOUT = 60.0
+
+
+class SandboxError(RuntimeError):
+    """生成代码在沙箱中执行失败（异常、超时或超出资源上限）。"""
+
+
+class _CpuLimitExceeded(Exception):
+    pass
+
+
+# --- 执行逻辑（工作进程与进程内模式共用） ---
+
+def figure_max_points(fig: Any) -> int:
+    """各 trace 中 x/y/z 最长的长度，供质量门槛判断图是否“有内容”。"""
+    max_points = 0
+    for t in getattr(fig, "data", []):
+        for key in ("x", "y", "z"):
+            arr = getattr(t, key, None)
+            if arr is not None:
+                try:
+                    max_points = max(max_points, len(arr))
+                except Exception:
+                    pass
+    return max_points
+
+
+def render_settings() -> str:
+    """``run_code`` 默认采用的序列化设置（类型化数组编码、降采样预算）；缓存渲染结果时须计入键。"""
+    encoding = FIGURE_ENCODING
+    if encoding == "typed":
+        encoding += f"(rtol={FIGURE_FLOAT32_RTOL},min={FIGURE_TYPED_MIN_LENGTH})"
+    downsample = "off"
+    if FIGURE_DOWNSAMPLE:
+        downsample = (
+            f"{FIGURE_LINE_METHOD}(line={FIGURE_MAX_LINE_POINTS},scatter={FIGURE_MAX_SCATTER_POINTS},"
+            f"surface={FIGURE_MAX_SURFACE_CELLS})"
+        )
+    return f"encoding={encoding};downsample={downsample}"
+
+
+def run_code(
+    code: str, output: str = "html", encoding: Optional[str] = None, downsample: Optional[bool] = None
+) -> Dict[str, Any]:
+    """执行生成的代码，取出 ``fig`` 并序列化。
+
+    ``output`` 为 ``"html"``（``<div>`` 片段，plotly.js 取自 /app/lib/runtime 的共享运行时）或 ``"json"``（figure JSON）。
+    ``encoding`` 默认取 ``FIGURE_ENCODING``：``"typed"`` 时数值数组写成收窄 dtype 的类型化数组，
+    并在结果的 ``encoding`` 中给出编码前后的字节数。
+    ``downsample`` 默认取 ``FIGURE_DOWNSAMPLE``：超出点数预算的 trace 先降采样，
+    记录见结果的 ``downsample``（``max_points`` 仍为降采样前的点数）。
+    """
+    import plotly.io as pio
+
+    env: Dict[str, Any] = {}
+    exec(code, env, env)
+    fig = env.get("fig")
+    if fig is None:
+        raise RuntimeError("代码未创建 fig")
+    result: Dict[str, Any] = {"max_points": figure_max_points(fig)}
+    if FIGURE_DOWNSAMPLE if downsample is None else downsample:
+        from backend.api.downsample import downsample_figure
+
+        fig, reduced = downsample_figure(fig)
+        if reduced:
+            result["downsample"] = reduced
+    if (encoding or FIGURE_ENCODING) == "typed":
+        from backend.api.typed_arrays import encode_figure
+
+        fig, result["encoding"] = encode_figure(fig)
+    if output == "json":
+        result["figure"] = pio.to_json(fig)
+    else:
+        from backend.api.runtime_bundle import script_tag
+
+        result["html"] = script_tag("plotly") + pio.to_html(fig, include_plotlyjs=False, full_html=False)
+    return result
+
+
+# --- 工作进程 ---
+
+def _vm_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _on_sigxcpu(signum, frame):
+    raise _CpuLimitExceeded()
+
+
+def _arm_cpu_limit(seconds: float) -> None:
+    if resource is None or seconds <= 0:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = usage.ru_utime + usage.ru_stime
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    resource.setrlimit(resource.RLIMIT_CPU, (math.ceil(used + seconds), hard))
+
+
+def _disarm_cpu_limit() -> None:
+    if resource is None:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+
+
+def _worker_main(conn, cpu_seconds: float, memory_mb: int) -> None:
+    # 预热：重依赖只在进程启动时导入一次
+    import numpy  # noqa: F401
+    import plotly.express  # noqa: F401
+    import plotly.graph_objects  # noqa: F401
+    import plotly.io  # noqa: F401
+    import backend.api.downsample  # noqa: F401
+    import backend.api.runtime_bundle  # noqa: F401
+    import backend.api.typed_arrays  # noqa: F401
+    try:
+        import scipy.stats  # noqa: F401
+    except ImportError:
+        pass
+
+    rss_limit = None
+    if memory_mb > 0:
+        base_rss = _rss_bytes()
+        rss_limit = base_rss + memory_mb * 2**20 if base_rss is not None else None
+        base_vm = _vm_bytes()
+        if resource is not None and base_vm is not None:
+            _, hard = resource.getrlimit(resource.RLIMIT_AS)
+            limit = base_vm + memory_mb * 2**20
+            if hard == resource.RLIM_INFINITY or limit < hard:
+                resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    if resource is not None:
+        signal.signal(signal.SIGXCPU, _on_sigxcpu)
+
+    conn.send(("ready", os.getpid()))
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            return
+        if job is None:
+            return
+        code, output = job
+        retire = False
+        try:
+            _arm_cpu_limit(cpu_seconds)
+            try:
+                reply = ("ok", run_code(code, output))
+            finally:
+                _disarm_cpu_limit()
+        except _CpuLimitExceeded:
+            reply, retire = ("error", f"CPU 时间超过 {cpu_seconds:g}s 上限"), True
+        except MemoryError:
+            reply, retire = ("error", f"内存超过 {memory_mb}MB 上限"), True
+        except BaseException as e:  # 包括用户代码里的 SystemExit
+            reply = ("error", f"{type(e).__name__}: {e}")
+        if rss_limit is not None and not retire:
+            rss = _rss_bytes()
+            retire = rss is not None and rss > rss_limit
+        try:
+            conn.send(reply + (retire,))
+        except Exception as e:  # 结果无法序列化
+            conn.send(("error", f"结果无法返回: {e}", retire))
+        if retire:
+            return
+
+
+class _Worker:
+    def __init__(self, ctx, cpu_seconds: float, memory_mb: int):
+        self.conn, child = ctx.Pipe()
+        self.proc = ctx.Process(
+            target=_worker_main, args=(child, cpu_seconds, memory_mb), daemon=True, name="sandbox-worker"
+        )
+        self.proc.start()
+        child.close()
+        self.ready = False
+        self.jobs = 0
+        self.retire = False
+
+    def wait_ready(self) -> None:
+        if self.ready:
+            return
+        if not self.conn.poll(_STARTUP_TIMEOUT):
+            raise SandboxError("沙箱进程启动超时")
+        self.conn.recv()
+        self.ready = True
+
+    def alive(self) -> bool:
+        return self.proc.is_alive() and not self.retire
+
+    def stop(self, graceful: bool = True) -> None:
+        if graceful and self.proc.is_alive():
+            try:
+                self.conn.send(None)
+                self.proc.join(1.0)
+            except Exception:
+                pass
+        if self.proc.is_alive():
+            self.proc.kill()
+            self.proc.join(1.0)
+        self.conn.close()
+
+
+class SandboxPool:
+    """预启动的工作进程池；``execute`` 借出一个空闲进程执行一段代码，用完归还或回收。"""
+
+    def __init__(
+        self,
+        size: int = 2,
+        max_jobs: int = 50,
+        cpu_seconds: float = 10.0,
+        memory_mb: int = 512,
+        timeout: float = 30.0,
+    ):
+        self.size = size
+        self.max_jobs = max_jobs
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.timeout = timeout
+        # spawn：API 进程通常有多个线程，fork 出的子进程可能继承被占用的锁
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = False
+        self._closed = False
+        self.recycled = 0
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self._ctx, self.cpu_seconds, self.memory_mb)
+
+    def start(self) -> "SandboxPool":
+        with self._lock:
+            if not self._started:
+                for _ in range(self.size):
+                    self._idle.put(self._spawn())
+                self._started = True
+        return self
+
+    def _checkin(self, worker: _Worker) -> None:
+        worker.jobs += 1
+        if self._closed:
+            worker.stop()
+            return
+        if not worker.alive() or worker.jobs >= self.max_jobs:
+            worker.stop(graceful=not worker.retire)
+            self.recycled += 1
+            worker = self._spawn()
+        self._idle.put(worker)
+
+    def execute(self, code: str, output: str = "html", timeout: Optional[float] = None) -> Dict[str, Any]:
+        """在沙箱进程中执行代码，返回 ``{"html"|"figure", "max_points"[, "downsample"][, "encoding"]}``；失败抛出 SandboxError。"""
+        if self._closed:
+            raise SandboxError("沙箱进程池已关闭")
+        self.start()
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            worker = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise SandboxError("沙箱进程全部繁忙")
+        try:
+            worker.wait_ready()
+            worker.conn.send((code, output))
+            if not worker.conn.poll(timeout):
+                worker.retire = True
+                raise SandboxError(f"执行超过 {timeout:g}s 墙钟上限")
+            status, payload, worker.retire = worker.conn.recv()
+        except (EOFError, OSError) as e:
+            worker.retire = True
+            raise SandboxError(f"沙箱进程异常退出: {e}") from e
+        except SandboxError:
+            worker.retire = True
+            raise
+        finally:
+            self._checkin(worker)
+        if status != "ok":
+            raise SandboxError(payload)
+        return payload
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                return
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": self.size, "idle": self._idle.qsize(), "recycled": self.recycled}
+
+
+_pool: Optional[SandboxPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_sandbox_pool() -> Optional[SandboxPool]:
+    """进程级单例；``SANDBOX_WORKERS<=0`` 时返回 None，调用方改为进程内执行。"""
+    global _pool
+    if SANDBOX_WORKERS <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = SandboxPool(
+                    SANDBOX_WORKERS,
+                    max_jobs=SANDBOX_MAX_JOBS,
+                    cpu_seconds=SANDBOX_CPU_SECONDS,
+                    memory_mb=SANDBOX_MEMORY_MB,
+                    timeout=SANDBOX_TIMEOUT,
+                )
+    return _pool
+
+
+@atexit.register
+def _close_pool() -> None:
+    if _pool is not None:
+        _pool.close()
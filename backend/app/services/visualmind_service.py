@@ -1,9 +1,20 @@
 import os
 import re
 import json
+import hashlib
 import importlib.util
-from typing import Dict, Any, Tuple
-import plotly.io as pio
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from backend.api.lru_cache import LRUCache
+from backend.api.registry_service import _normalize
+from backend.api.runtime_bundle import fingerprint as runtime_fingerprint
+from backend.app.services.llm_providers import chat, get_provider
+from backend.app.services.sandbox_pool import get_sandbox_pool, render_settings, run_code
+from backend.config import VISUALMIND_CACHE_DIR, VISUALMIND_CACHE_SIZE
+
+logger = logging.getLogger("app")
 
 # 兼容不同启动方式：优先绝对导入，缺失则提供占位配置
 try:
@@ -14,34 +25,17 @@ except Exception:
         MODEL_NAME = "gpt-4o"
     settings = _Settings()
 
-try:
-    from openai import OpenAI
-except Exception:
-    OpenAI = None  # 环境未安装 openai 时的兜底
-
 
 # === Gemini 适配开始 ===
-import os
-import google.generativeai as genai
-
 def call_gemini(messages, model_name="gemini-2.5-flash"):
     """
     messages: [{"role":"system","content":"..."},{"role":"user","content":"..."}]
-    返回：模型文本输出
+    返回：模型文本输出（经共享的 Gemini 提供方，连接复用、带超时与重试）
     """
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
+    provider = get_provider("gemini")
+    if not provider.configured:
         raise RuntimeError("GEMINI_API_KEY not set")
-
-    genai.configure(api_key=api_key)
-    # 把 OpenAI 风格 messages 拼成一条 prompt（Gemini 支持 system + user 但我们简单兼容）
-    sys_txt = "\n".join(m["content"] for m in messages if m["role"] == "system")
-    usr_txt = "\n".join(m["content"] for m in messages if m["role"] == "user")
-    prompt = (sys_txt + "\n\n" + usr_txt).strip()
-
-    model = genai.GenerativeModel(model_name)
-    resp = model.generate_content(prompt)
-    return resp.text or ""
+    return chat(provider, messages, model=model_name)
 # === Gemini 适配结束 ===
 
 
@@ -108,10 +102,11 @@ REPAIR_TEMPLATE = (
 FALLBACK_POISSON_CODE = '''\
 import numpy as np
 import plotly.graph_objects as go
+from backend.api.distributions import poisson_pmf
 
 lam = 4
 x = np.arange(0, 20)
-pmf = np.exp(-lam) * np.power(lam, x) / np.array([np.math.factorial(int(v)) for v in x])
+pmf = poisson_pmf(x, lam)
 
 fig = go.Figure()
 fig.add_bar(x=x, y=pmf, marker_color='teal', name='Poisson PMF')
@@ -121,14 +116,28 @@ fig.update_layout(title='环境未安装 scipy：暂以 Poisson 近似展示（
 '''
 
 
+def _sha(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# 两级生成缓存（各服务实例共享，磁盘层跨重启保留）：
+# - code_cache:   归一化提示词 → 通过质量门槛的代码，命中时省去 LLM 往返
+# - render_cache: (运行时, 序列化设置, 代码) 哈希 → {html, ok}，命中时省去执行与 pio.to_html
+code_cache = LRUCache(
+    VISUALMIND_CACHE_SIZE, VISUALMIND_CACHE_DIR and os.path.join(VISUALMIND_CACHE_DIR, "code"), suffix=".py"
+)
+render_cache = LRUCache(
+    VISUALMIND_CACHE_SIZE, VISUALMIND_CACHE_DIR and os.path.join(VISUALMIND_CACHE_DIR, "render"), suffix=".json"
+)
+
+
 class VisualMindService:
     def __init__(self):
-        self.client = None
-        if settings.OPENAI_API_KEY and OpenAI is not None:
-            try:
-                self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
-            except Exception:
-                self.client = None
+        # 共享的 OpenAI 提供方（长连接、并发上限、超时与重试）；未配置 Key 时为 None
+        provider = get_provider("openai")
+        if settings.OPENAI_API_KEY and not provider.configured:
+            provider.api_key = settings.OPENAI_API_KEY
+        self.client = provider if provider.configured else None
 
     def _llm_generate_code(self, system_prompt: str, user_prompt: str) -> str:
         if not self.client:
@@ -140,58 +149,69 @@ class VisualMindService:
                 "fig = px.line(x=x, y=y, title='Fallback Line Chart')\n"
             )
 
-        rsp = self.client.chat.completions.create(
-            model=settings.OPENAI_MODEL or "gpt-4o",
-            messages=[
+        content = chat(
+            self.client,
+            [
                 {"role": "system", "content": system_prompt},
                 {
                     "role": "user",
                     "content": f"请直接输出完整Python代码（必须创建 fig）。\n用户请求：{user_prompt}",
                 },
             ],
+            model=getattr(settings, "OPENAI_MODEL", None) or "gpt-4o",
             temperature=0,
         )
-        content = rsp.choices[0].message.content
         m = re.search(r"```python\n(.*?)\n```", content, re.S | re.I)
         return (m.group(1) if m else content).strip()
 
-    def _execute_to_html(self, code: str) -> Tuple[str, Any]:
-        env: Dict[str, Any] = {}
-        exec(code, env, env)
-        fig = env.get("fig")
-        if fig is None:
-            raise RuntimeError("代码未创建 fig")
-        html = pio.to_html(fig, include_plotlyjs="cdn", full_html=False)
-        return html, fig
+    def _execute_to_html(self, code: str) -> Tuple[str, Dict[str, Any]]:
+        # 在预热的沙箱进程中执行（CPU/内存/墙钟均有上限）；未启用进程池时进程内执行
+        pool = get_sandbox_pool()
+        result = pool.execute(code, output="html") if pool is not None else run_code(code, output="html")
+        for record in result.get("downsample") or []:
+            logger.info(
+                "figure 降采样 %s (%s, %s): %d -> %d 点",
+                record["trace"], record["kind"], record["method"], record["points_before"], record["points_after"],
+            )
+        stats = result.get("encoding")
+        if stats:
+            logger.info(
+                "figure 类型化数组编码: %d -> %d 字节 (节省 %d, %.1f%%) %s",
+                stats["bytes_before"], stats["bytes_after"], stats["bytes_saved"],
+                100 * (1 - stats["ratio"]), stats["arrays"],
+            )
+        return result["html"], result
 
-    def _quality_gate(self, code: str, fig: Any) -> bool:
+    def _quality_gate(self, code: str, fig: Dict[str, Any]) -> bool:
         if "import plotly" not in code:
             return False
-        try:
-            traces = getattr(fig, "data", [])
-            max_points = 0
-            for t in traces:
-                # 尝试取 x/y/z 长度
-                for key in ("x", "y", "z"):
-                    arr = getattr(t, key, None)
-                    if arr is not None:
-                        try:
-                            max_points = max(max_points, len(arr))
-                        except Exception:
-                            pass
-            return max_points > 3
-        except Exception:
-            return False
-
-    def generate(self, prompt: str) -> Dict[str, Any]:
+        return fig.get("max_points", 0) > 3
+
+    def _render(self, code: str) -> Tuple[str, bool]:
+        """执行代码并给出质量门槛结论；结果按代码哈希缓存（执行异常不缓存）。"""
+        # 片段引用的运行时、编码与降采样设置变更后不再复用旧结果
+        key = _sha(f"{runtime_fingerprint()}\n{render_settings()}\n{code}")
+        cached = render_cache.get(key)
+        if cached is not None:
+            entry = json.loads(cached)
+            return entry["html"], entry["ok"]
+        html, fig = self._execute_to_html(code)
+        ok = self._quality_gate(code, fig)
+        render_cache.put(key, json.dumps({"html": html, "ok": ok}, ensure_ascii=False))
+        return html, ok
+
+    def generate(self, prompt: str, on_stage: Optional[Callable[..., None]] = None) -> Dict[str, Any]:
+        """``on_stage(stage, **data)`` 在 code / executed / repair / fallback 各阶段调用（供 SSE 推送进度）。"""
         kind = classify_kind(prompt)
+        emit = on_stage or (lambda stage, **data: None)
 
         # 依赖缺失回退（scipy）
         if (not scipy_available()) and any(k in prompt.lower() for k in ["超几何", "hypergeometric"]):
             code = FALLBACK_POISSON_CODE
+            emit("code", source="fallback")
             try:
-                html, fig = self._execute_to_html(code)
-                ok = self._quality_gate(code, fig)
+                html, ok = self._render(code)
+                emit("executed", ok=ok)
                 if not ok:
                     raise RuntimeError("质量门槛未通过")
                 return {"status": 200, "html": html, "code": code, "kind": kind}
@@ -203,12 +223,18 @@ class VisualMindService:
                     "y = x\n"
                     "fig = px.line(x=x, y=y, title='Fallback Chart')\n"
                 )
-                html, _ = self._execute_to_html(fallback)
+                emit("fallback")
+                html, _ = self._render(fallback)
                 return {"status": 200, "html": html, "code": fallback, "kind": kind}
 
-        # 常规路径：LLM生成
+        # 常规路径：LLM生成（同一提示词优先复用上次通过质量门槛的代码）
         system_prompt = build_system_prompt()
-        code = self._llm_generate_code(system_prompt, prompt)
+        prompt_key = _sha(_normalize(prompt))
+        code = code_cache.get(prompt_key)
+        source = "cache" if code else "llm"
+        if not code:
+            code = self._llm_generate_code(system_prompt, prompt)
+        emit("code", source=source)
 
         # 安全检查
         if not is_safe(code):
@@ -222,15 +248,22 @@ class VisualMindService:
 
         # 执行并质量门槛
         try:
-            html, fig = self._execute_to_html(code)
-            if not self._quality_gate(code, fig):
+            html, ok = self._render(code)
+            emit("executed", ok=ok)
+            if not ok:
                 raise RuntimeError("质量门槛未通过：需包含plotly导入且点数>3")
+            if self.client:  # 无 LLM 时的兜底代码不入缓存
+                code_cache.put(prompt_key, code)
             return {"status": 200, "html": html, "code": code, "kind": kind}
         except Exception as e:
             # 自愈：带错误与原始代码再次生成
+            emit("repair", error=str(e)[:200])
             repair_prompt = REPAIR_TEMPLATE.format(error_text=str(e), bad_code=code)
             repaired = self._llm_generate_code(system_prompt, repair_prompt)
+            emit("code", source="repair")
+            cacheable = bool(self.client)  # 兜底代码不入缓存
             if not is_safe(repaired):
+                cacheable = False
                 repaired = (
                     "import numpy as np\nimport plotly.express as px\n"
                     "x = np.arange(0, 20)\n"
@@ -238,9 +271,12 @@ class VisualMindService:
                     "fig = px.line(x=x, y=y, title='Safe Fallback')\n"
                 )
             try:
-                html, fig = self._execute_to_html(repaired)
-                if not self._quality_gate(repaired, fig):
+                html, ok = self._render(repaired)
+                emit("executed", ok=ok)
+                if not ok:
                     raise RuntimeError("修复后质量门槛未通过")
+                if cacheable:
+                    code_cache.put(prompt_key, repaired)
                 return {"status": 200, "html": html, "code": repaired, "kind": kind}
             except Exception:
                 # 二次仍失败，最终兜底
@@ -250,5 +286,20 @@ class VisualMindService:
                     "y = x\n"
                     "fig = px.line(x=x, y=y, title='Fallback Chart')\n"
                 )
-                html, _ = self._execute_to_html(fallback)
+                emit("fallback")
+                html, _ = self._render(fallback)
                 return {"status": 200, "html": html, "code": fallback, "kind": kind}
+
+
+_service: Optional[VisualMindService] = None
+_service_lock = threading.Lock()
+
+
+def get_visualmind_service() -> VisualMindService:
+    """进程级单例，首次调用时创建；路由模块导入时不再实例化，启动期不建立提供方。"""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = VisualMindService()
+    return _service
@@ -0,0 +1,77 @@
+"""启动后的后台预热。
+
+路由与服务模块只在导入时登记、不做重活：numpy/scipy、httpx、提供方客户端与沙箱进程
+都推迟到第一次使用。为了不让第一个请求替所有人付这笔开销，服务开始监听后由一个
+后台线程按顺序预热；各步骤耗时记入 ``warmup_state``，在 ``/healthz`` 中可见。
+"""
+import importlib
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("app")
+
+
+def _import(name: str) -> Callable[[], Any]:
+    return lambda: importlib.import_module(name)
+
+
+def _visualmind_service() -> None:
+    from backend.app.services.visualmind_service import get_visualmind_service
+
+    get_visualmind_service()
+
+
+def _sandbox_pool() -> None:
+    from backend.app.services.sandbox_pool import get_sandbox_pool
+
+    pool = get_sandbox_pool()
+    if pool is not None:
+        pool.start()
+
+
+def _registry() -> None:
+    from backend.api.registry_service import get_registry_service
+
+    get_registry_service().snapshot()
+
+
+# (名称, 步骤)：按首个请求最可能用到的顺序排列
+WARMUP_STEPS: List[Tuple[str, Callable[[], Any]]] = [
+    ("sandbox_pool", _sandbox_pool),  # 先拉起进程，子进程的导入与后续步骤并行
+    ("registry", _registry),
+    ("precompute", _import("backend.api.precompute")),  # numpy + scipy.special
+    ("httpx", _import("httpx")),
+    ("visualmind_service", _visualmind_service),
+]
+
+warmup_state: Dict[str, Any] = {"status": "pending", "steps": {}}
+_thread: Optional[threading.Thread] = None
+
+
+def warmup() -> Dict[str, Any]:
+    """依次执行预热步骤；单步失败只记日志，不影响服务。"""
+    warmup_state["status"] = "running"
+    started = time.perf_counter()
+    for name, step in WARMUP_STEPS:
+        t0 = time.perf_counter()
+        try:
+            step()
+            warmup_state["steps"][name] = round((time.perf_counter() - t0) * 1000, 1)
+        except Exception as e:
+            warmup_state["steps"][name] = f"error: {e}"
+            logger.warning("预热 %s 失败: %s", name, e)
+    warmup_state["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    warmup_state["status"] = "done"
+    logger.info("后台预热完成: %s", warmup_state)
+    return warmup_state
+
+
+def start_warmup() -> threading.Thread:
+    """在后台线程中预热（只启动一次）。"""
+    global _thread
+    if _thread is None:
+        _thread = threading.Thread(target=warmup, name="warmup", daemon=True)
+        _thread.start()
+    return _thread
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, HTTPException
 from typing import Dict, Any
-from .services.visualmind_service import VisualMindService
+from .services.visualmind_service import get_visualmind_service
+from .services.generation_executor import ExecutorBusy, generation_executor
+from .api.sse import stage_stream
 
 router = APIRouter()
-service = VisualMindService()
 
 @router.post("/generate")
 async def visualmind_generate(payload: Dict[str, Any]):
@@ -12,9 +13,28 @@ async def visualmind_generate(payload: Dict[str, Any]):
         prompt = str(payload.get("prompt", "")).strip()
         if not prompt:
             raise HTTPException(status_code=400, detail="prompt 不能为空")
-        result = service.generate(prompt)
+        # 生成过程全是阻塞调用，放到有界线程池里执行，事件循环保持可响应
+        result = await generation_executor.run(get_visualmind_service().generate, prompt)
         return result
     except HTTPException:
         raise
+    except ExecutorBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/generate/stream")
+async def generate_stream(prompt: str):
+    """SSE 版本：推送 code / executed / repair 等阶段事件，最后以 done 事件返回 {status, html, code, kind}"""
+    prompt = prompt.strip()
+    if not prompt:
+        raise HTTPException(status_code=400, detail="prompt 不能为空")
+
+    async def job(emit):
+        try:
+            return await generation_executor.run(get_visualmind_service().generate, prompt, on_stage=emit)
+        except ExecutorBusy as e:
+            raise HTTPException(status_code=503, detail=str(e))
+
+    return stage_stream(job)
@@ -0,0 +1,135 @@
+"""生成链路压测：吞吐、尾延迟与修复循环开销。
+
+默认在进程内加载 ``backend.app.main:app``，并用 ``LLM_MOCK_FILE`` 指向的录制文件
+（未设置时使用同目录下的 llm_recordings.jsonl）回放 LLM 响应，无需真实 Key::
+
+    python -m backend.bench.generation -n 200 -c 16 --latency lognormal:0.8,0.5 --error-rate 0.05
+    python -m backend.bench.generation --endpoint /api/resolve_or_generate --prompts 正态分布 泊松分布
+    python -m backend.bench.generation --url http://127.0.0.1:8000   # 压测已启动的服务
+
+注意：``/api/resolve_or_generate`` 会写注册表与生成目录。
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PROMPTS = ["正态分布的概率密度", "泊松分布 λ 变化", "画一条正弦曲线", "修复测试：二次函数"]
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+async def _run(args: argparse.Namespace) -> Dict[str, Any]:
+    import httpx
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+    else:
+        from backend.app.main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=args.timeout)
+
+    prompts = args.prompts or DEFAULT_PROMPTS
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    queue: "asyncio.Queue[int]" = asyncio.Queue()
+    for i in range(args.requests):
+        queue.put_nowait(i)
+
+    async def one(i: int, record: bool = True) -> None:
+        prompt = prompts[i % len(prompts)]
+        if args.unique:
+            # 附加序号，避开提示词缓存与 singleflight 合并，测的是完整链路
+            prompt = f"{prompt} #{i}"
+        started = time.perf_counter()
+        try:
+            rsp = await client.post(args.endpoint, json={"prompt": prompt})
+            status = rsp.status_code
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        if record:
+            latencies.append(time.perf_counter() - started)
+            statuses[status] += 1
+
+    async def worker() -> None:
+        while True:
+            try:
+                i = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await one(i)
+
+    async with client:
+        for i in range(args.warmup):
+            await one(-1 - i, record=False)
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(args.requests / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 50) * 1000, 1),
+            "p90": round(_percentile(latencies, 90) * 1000, 1),
+            "p99": round(_percentile(latencies, 99) * 1000, 1),
+            "max": round(max(latencies, default=0.0) * 1000, 1),
+            "mean": round(statistics.fmean(latencies) * 1000, 1) if latencies else 0.0,
+        },
+        "status": {str(k): v for k, v in statuses.items()},
+    }
+
+
+def _mock_stats() -> Optional[Dict[str, Any]]:
+    from backend.app.services import llm_providers
+
+    stats = {name: p.stats() for name, p in llm_providers._providers.items() if hasattr(p, "stats")}
+    for s in stats.values():
+        # 每次修复都会多一次 LLM 往返与一次执行
+        s["repairs"] = s["calls"].get("code_repair", 0)
+    return stats or None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="生成链路压测（默认回放录制的 LLM 响应）")
+    parser.add_argument("--endpoint", default="/api/v1/generate")
+    parser.add_argument("--url", default="", help="压测已启动的服务；省略时进程内加载应用")
+    parser.add_argument("-n", "--requests", type=int, default=100)
+    parser.add_argument("-c", "--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--prompts", nargs="*")
+    parser.add_argument("--no-unique", dest="unique", action="store_false", help="允许重复提示词命中缓存")
+    parser.add_argument("--recordings", default=os.environ.get("LLM_MOCK_FILE") or os.path.join(HERE, "llm_recordings.jsonl"))
+    parser.add_argument("--latency", default=os.environ.get("LLM_MOCK_LATENCY", "fixed:0"), help="如 lognormal:0.8,0.5")
+    parser.add_argument("--error-rate", default=os.environ.get("LLM_MOCK_ERROR_RATE", "0"))
+    parser.add_argument("--seed", default=os.environ.get("LLM_MOCK_SEED", "0"))
+    args = parser.parse_args(argv)
+
+    if not args.url:
+        # 须在导入 backend.config 之前设置
+        os.environ["LLM_MOCK_FILE"] = args.recordings
+        os.environ["LLM_MOCK_LATENCY"] = args.latency
+        os.environ["LLM_MOCK_ERROR_RATE"] = str(args.error_rate)
+        os.environ["LLM_MOCK_SEED"] = str(args.seed)
+
+    report = asyncio.run(_run(args))
+    if not args.url:
+        report["mock"] = _mock_stats()
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""冷启动基准：应用导入与创建耗时，以及逐模块的导入开销。
+
+每轮在新的子进程中用 ``python -X importtime`` 导入目标模块并调用工厂，解析 stderr
+得到每个模块的自身耗时与累计耗时（取多轮中位数）::
+
+    python -m backend.bench.startup                       # backend.app.main:create_app
+    python -m backend.bench.startup -r 7 --top 30
+    python -m backend.bench.startup --target backend.main:app
+    python -m backend.bench.startup --warmup              # 另外测量后台预热各步骤（即首次使用的开销）
+
+第一轮只用来生成 .pyc，不计入结果。``--warmup`` 的预热另起一个子进程测量，不混入导入统计。
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)$")
+
+_CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+import importlib
+mod = importlib.import_module({module!r})
+t1 = time.perf_counter()
+obj = getattr(mod, {attr!r})
+if {call!r} and callable(obj):
+    obj(warmup=False) if {is_factory!r} else obj()
+t2 = time.perf_counter()
+result = {{"import_ms": (t1 - t0) * 1000, "create_ms": (t2 - t1) * 1000}}
+if {warmup!r}:
+    from backend.app.services.warmup import warmup
+    result["warmup"] = warmup()
+sys.stdout.write(json.dumps(result))
+"""
+
+
+def _parse_importtime(stderr: str) -> Dict[str, Dict[str, Any]]:
+    """``-X importtime`` 输出 → {模块: {self_ms, cumulative_ms}}（同名模块只记第一次）。"""
+    modules: Dict[str, Dict[str, Any]] = {}
+    for line in stderr.splitlines():
+        m = _LINE.match(line)
+        if not m or m.group(3) in modules:
+            continue
+        modules[m.group(3)] = {
+            "self_ms": int(m.group(1)) / 1000,
+            "cumulative_ms": int(m.group(2)) / 1000,
+        }
+    return modules
+
+
+def _run_once(target: str, warmup: bool) -> Dict[str, Any]:
+    module, _, attr = target.partition(":")
+    attr = attr or "app"
+    code = _CHILD.format(
+        module=module,
+        attr=attr,
+        call=attr != "app",
+        is_factory=attr == "create_app",
+        warmup=warmup,
+    )
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    # 预热会拉起沙箱子进程（同样继承 -X importtime），因此预热单独跑一轮，不统计导入
+    flags = [] if warmup else ["-X", "importtime"]
+    proc = subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=False,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"子进程失败: {proc.stderr.strip().splitlines()[-1:]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["modules"] = _parse_importtime(proc.stderr)
+    return result
+
+
+def _median(values: List[float]) -> float:
+    return round(statistics.median(values), 1) if values else 0.0
+
+
+def run(target: str, repeat: int, top: int, warmup: bool) -> Dict[str, Any]:
+    _run_once(target, False)  # 生成 .pyc
+    runs = [_run_once(target, False) for _ in range(repeat)]
+
+    names = set().union(*(r["modules"] for r in runs))
+    per_module: Dict[str, Dict[str, Any]] = {}
+    for name in names:
+        samples = [r["modules"][name] for r in runs if name in r["modules"]]
+        per_module[name] = {
+            "self_ms": _median([s["self_ms"] for s in samples]),
+            "cumulative_ms": _median([s["cumulative_ms"] for s in samples]),
+        }
+
+    def ranked(items: Dict[str, Dict[str, Any]], key: str) -> List[Dict[str, Any]]:
+        rows = sorted(items.items(), key=lambda kv: kv[1][key], reverse=True)[:top]
+        return [{"module": k, **v} for k, v in rows]
+
+    # 顶层包汇总：外部依赖各自占多少
+    packages: Dict[str, float] = {}
+    for name, row in per_module.items():
+        pkg = name.split(".")[0]
+        packages[pkg] = packages.get(pkg, 0.0) + row["self_ms"]
+
+    report: Dict[str, Any] = {
+        "target": target,
+        "runs": repeat,
+        "import_ms": _median([r["import_ms"] for r in runs]),
+        "create_ms": _median([r["create_ms"] for r in runs]),
+        "modules_loaded": len(per_module),
+        "heavy_deps_loaded": sorted(
+            p for p in ("numpy", "scipy", "plotly", "httpx", "openai", "google", "pandas") if p in packages
+        ),
+        "packages_self_ms": dict(sorted(((k, round(v, 1)) for k, v in packages.items()), key=lambda kv: -kv[1])[:top]),
+        "top_cumulative": ranked(per_module, "cumulative_ms"),
+        "backend_modules": ranked({k: v for k, v in per_module.items() if k.startswith("backend")}, "cumulative_ms"),
+    }
+    if warmup:
+        report["warmup"] = _run_once(target, True)["warmup"]
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="冷启动耗时与逐模块导入开销")
+    parser.add_argument("--target", default="backend.app.main:create_app", help="模块:属性，属性为 app 时只导入")
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--warmup", action="store_true", help="同时执行后台预热并报告各步骤耗时")
+    args = parser.parse_args(argv)
+    report = run(args.target, max(1, args.repeat), args.top, args.warmup)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
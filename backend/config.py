@@ -9,16 +9,96 @@ STATIC_APP_DIR = os.path.join(PROJECT_ROOT, "app")
 
 # Registry path
 REGISTRY_PATH = os.path.join(BASE_DIR, "registry", "registry.json")
+# Minimum seconds between registry mtime/size checks in the in-memory index
+REGISTRY_STAT_INTERVAL = float(os.environ.get("REGISTRY_STAT_INTERVAL", "1.0"))
+# Registry write-ahead log: seconds to coalesce upserts, and max entries before forcing a flush
+REGISTRY_FLUSH_DELAY = float(os.environ.get("REGISTRY_FLUSH_DELAY", "0.5"))
+REGISTRY_MAX_PENDING = int(os.environ.get("REGISTRY_MAX_PENDING", "256"))
+# Registry backend: "json" (default) or "sqlite" (FTS5 search, see backend/api/registry_sqlite.py)
+REGISTRY_BACKEND = os.environ.get("REGISTRY_BACKEND", "json").lower()
+REGISTRY_DB_PATH = os.environ.get("REGISTRY_DB_PATH", os.path.join(BASE_DIR, "registry", "registry.db"))
+REGISTRY_DB_POOL_SIZE = int(os.environ.get("REGISTRY_DB_POOL_SIZE", "4"))
+
+# Static /app mount: min file size for precompressed .gz/.br variants, and max-age for content-hashed files
+STATIC_PRECOMPRESS_MIN_BYTES = int(os.environ.get("STATIC_PRECOMPRESS_MIN_BYTES", "1024"))
+STATIC_IMMUTABLE_MAX_AGE = int(os.environ.get("STATIC_IMMUTABLE_MAX_AGE", "31536000"))
+# In-memory page cache in front of the /app mount: total bytes (0 disables), max bytes per page,
+# and min seconds between mtime checks of a cached page
+STATIC_CACHE_BYTES = int(os.environ.get("STATIC_CACHE_BYTES", str(32 * 2**20)))
+STATIC_CACHE_MAX_ENTRY_BYTES = int(os.environ.get("STATIC_CACHE_MAX_ENTRY_BYTES", str(2 * 2**20)))
+STATIC_CACHE_STAT_INTERVAL = float(os.environ.get("STATIC_CACHE_STAT_INTERVAL", "1.0"))
+
+# Shared front-end runtimes served from /app/lib/runtime (python -m backend.api.runtime_bundle build)
+PLOTLY_JS_VERSION = os.environ.get("PLOTLY_JS_VERSION", "2.35.2")
+THREE_JS_VERSION = os.environ.get("THREE_JS_VERSION", "0.158.0")
 
 # Generated output directory (relative to app)
 GENERATED_DIR = os.path.join(PROJECT_ROOT, "app", "modules", "ai_visualizer", "generated")
 
+# Bounded executor for blocking generation work in async endpoints: worker threads, and extra queued jobs before 503
+GENERATION_WORKERS = int(os.environ.get("GENERATION_WORKERS", "4"))
+GENERATION_MAX_QUEUE = int(os.environ.get("GENERATION_MAX_QUEUE", "16"))
+
+# Sandbox worker processes for LLM-generated code (0 = exec in-process): pool size, jobs before recycling,
+# per-job CPU seconds, memory headroom in MB, and wall-clock timeout in seconds
+SANDBOX_WORKERS = int(os.environ.get("SANDBOX_WORKERS", "2"))
+SANDBOX_MAX_JOBS = int(os.environ.get("SANDBOX_MAX_JOBS", "50"))
+SANDBOX_CPU_SECONDS = float(os.environ.get("SANDBOX_CPU_SECONDS", "10"))
+SANDBOX_MEMORY_MB = int(os.environ.get("SANDBOX_MEMORY_MB", "512"))
+SANDBOX_TIMEOUT = float(os.environ.get("SANDBOX_TIMEOUT", "30"))
+
+# VisualMind generation cache (prompt -> code, code hash -> HTML + quality verdict): LRU bound per level,
+# and on-disk tier directory ("" disables)
+VISUALMIND_CACHE_SIZE = int(os.environ.get("VISUALMIND_CACHE_SIZE", "256"))
+VISUALMIND_CACHE_DIR = os.environ.get("VISUALMIND_CACHE_DIR", os.path.join(BASE_DIR, "cache", "visualmind"))
+
+# Shared LLM provider layer: per-request timeout and overall deadline (seconds), retries,
+# in-flight requests per provider, and keep-alive connection pool size
+LLM_TIMEOUT = float(os.environ.get("LLM_TIMEOUT", "30"))
+LLM_DEADLINE = float(os.environ.get("LLM_DEADLINE", "60"))
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "2"))
+LLM_CONCURRENCY = int(os.environ.get("LLM_CONCURRENCY", "4"))
+LLM_MAX_CONNECTIONS = int(os.environ.get("LLM_MAX_CONNECTIONS", "10"))
+# Offline replay provider for load tests (see backend/app/services/llm_mock.py): recordings JSONL ("" disables),
+# latency distribution, injected error rate, and RNG seed
+LLM_MOCK_FILE = os.environ.get("LLM_MOCK_FILE", "")
+LLM_MOCK_LATENCY = os.environ.get("LLM_MOCK_LATENCY", "fixed:0")
+LLM_MOCK_ERROR_RATE = float(os.environ.get("LLM_MOCK_ERROR_RATE", "0"))
+LLM_MOCK_SEED = int(os.environ.get("LLM_MOCK_SEED", "0"))
+
+# Background job queue (/api/jobs): worker threads, seconds finished jobs stay pollable, max queued jobs
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+JOB_RESULT_TTL = float(os.environ.get("JOB_RESULT_TTL", "3600"))
+JOB_MAX_QUEUED = int(os.environ.get("JOB_MAX_QUEUED", "1000"))
+
+# Batch generation (/api/batch_generate and python -m backend.app.services.batch_generation):
+# default parallelism, and max items per API request
+BATCH_PARALLELISM = int(os.environ.get("BATCH_PARALLELISM", "4"))
+BATCH_MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", "500"))
+
+# Figure serialization for generated code: "typed" (numeric arrays as base64 typed arrays, narrowed dtypes)
+# or "plotly" (plotly.io defaults); float64 -> float32 max relative error, and min array length to encode
+FIGURE_ENCODING = os.environ.get("FIGURE_ENCODING", "typed").lower()
+FIGURE_FLOAT32_RTOL = float(os.environ.get("FIGURE_FLOAT32_RTOL", "1e-6"))
+FIGURE_TYPED_MIN_LENGTH = int(os.environ.get("FIGURE_TYPED_MIN_LENGTH", "16"))
+
+# Post-execution downsampling of generated figures ("0" disables): per-trace budgets for line points,
+# scatter points and surface/heatmap cells, and the line decimation method ("lttb" or "minmax")
+FIGURE_DOWNSAMPLE = os.environ.get("FIGURE_DOWNSAMPLE", "1") != "0"
+FIGURE_MAX_LINE_POINTS = int(os.environ.get("FIGURE_MAX_LINE_POINTS", "5000"))
+FIGURE_MAX_SCATTER_POINTS = int(os.environ.get("FIGURE_MAX_SCATTER_POINTS", "20000"))
+FIGURE_MAX_SURFACE_CELLS = int(os.environ.get("FIGURE_MAX_SURFACE_CELLS", "40000"))
+FIGURE_LINE_METHOD = os.environ.get("FIGURE_LINE_METHOD", "lttb").lower()
+
+# Background warmup after the server starts listening (numpy/scipy, LLM clients, sandbox pool): "0" disables
+STARTUP_WARMUP = os.environ.get("STARTUP_WARMUP", "1") != "0"
+
 # Logging
 LOG_DIR = os.path.join(BASE_DIR, "logs")
 LOG_FILE = os.path.join(LOG_DIR, "app.log")
 
 # Allowed spec values
-ALLOWED_CHARTS: Set[str] = {"pdf", "cdf", "hist", "line", "scatter", "surface3d"}
+ALLOWED_CHARTS: Set[str] = {"pdf", "pmf", "cdf", "hist", "line", "scatter", "surface3d"}
 ALLOWED_LIBS: Set[str] = {"plotly", "threejs"}
 
 # CORS origins for local dev
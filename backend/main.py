@@ -5,11 +5,12 @@ from typing import Dict
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 
 from backend.config import STATIC_APP_DIR, CORS_ORIGINS, LOG_DIR, LOG_FILE
 from backend.api.resolve_or_generate import router as resolve_router
 from backend.api.registry_ops import load_registry
+from backend.api.page_cache import page_cache
+from backend.api.static_assets import PrecompressedStaticFiles
 
 # Ensure log dir
 os.makedirs(LOG_DIR, exist_ok=True)
@@ -32,10 +33,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Static mount for front-end pages under /app
+# Static mount for front-end pages under /app (precompressed variants, content ETags, 304)
 if not os.path.isdir(STATIC_APP_DIR):
     raise RuntimeError(f"未找到前端目录: {STATIC_APP_DIR}")
-app.mount("/app", StaticFiles(directory=STATIC_APP_DIR, html=True), name="app")
+app.mount("/app", PrecompressedStaticFiles(directory=STATIC_APP_DIR, html=True), name="app")
 
 # Routers
 app.include_router(resolve_router)
@@ -43,7 +44,7 @@ app.include_router(resolve_router)
 
 @app.get("/api/health")
 def health() -> Dict[str, object]:
-    return {"ok": True, "ts": __import__('time').time()}
+    return {"ok": True, "ts": __import__('time').time(), "page_cache": page_cache.stats()}
 
 
 @app.get("/api/preview")
@@ -0,0 +1,84 @@
+import random
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from backend.api.alias_matcher import (
+    PRIORITY_ALIAS,
+    PRIORITY_ID,
+    PRIORITY_TITLE,
+    AliasMatcher,
+    build_concept_matcher,
+    concept_patterns,
+)
+from backend.api.registry_service import RegistrySnapshot, _normalize
+
+
+def _baseline_hits(prompt: str, concepts: List[Dict[str, Any]]) -> List[int]:
+    """改造前逐条扫描的判定（非空模式）：命中的全部条目下标。"""
+    p = _normalize(prompt)
+    hits = []
+    for i, c in enumerate(concepts):
+        fields = [*(c.get("aliases") or []), c.get("title", ""), c.get("id", "")]
+        if any(f and _normalize(str(f)) in p for f in fields):
+            hits.append(i)
+    return hits
+
+
+def _brute_best(prompt: str, concepts: List[Dict[str, Any]]) -> Optional[int]:
+    p = _normalize(prompt)
+    best = None
+    for order, (pattern, idx, prio) in enumerate(concept_patterns(concepts, _normalize)):
+        if pattern and pattern in p:
+            key = (len(pattern), prio, -order)
+            if best is None or key > best[0]:
+                best = (key, idx)
+    return best[1] if best else None
+
+
+def _random_registry(rng: random.Random, n: int) -> List[Dict[str, Any]]:
+    word = lambda: "".join(rng.choice("abc正态") for _ in range(rng.randint(1, 4)))  # noqa: E731
+    return [
+        {"id": f"{word()}{i}", "title": word(), "aliases": [word() for _ in range(rng.randint(0, 3))]}
+        for i in range(n)
+    ]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_bruteforce_and_baseline_without_ties(seed):
+    rng = random.Random(seed)
+    concepts = _random_registry(rng, 12)
+    matcher = build_concept_matcher(concepts, _normalize)
+    for _ in range(50):
+        prompt = "".join(rng.choice("abc正态 x") for _ in range(rng.randint(1, 12)))
+        best = matcher.best(_normalize(prompt))
+        assert best == _brute_best(prompt, concepts)
+        hits = _baseline_hits(prompt, concepts)
+        if len(hits) == 1:
+            # 只有一条命中时与改造前的结果一致
+            assert best == hits[0]
+        assert (best is None) == (not hits)
+
+
+def test_tie_breaks():
+    concepts = [
+        {"id": "a", "title": "分布", "aliases": ["正态"]},
+        {"id": "b", "title": "正态分布", "aliases": []},
+        {"id": "c", "title": "x", "aliases": ["正态分布"]},
+    ]
+    snap = RegistrySnapshot(concepts)
+    # 最长匹配优先；同长度时别名 > 标题；改造前按注册表顺序会返回 a
+    assert snap.lookup("画一个正态分布")["id"] == "c"
+    assert snap.lookup("正态")["id"] == "a"
+    # 同一模式多条目：别名 > 标题 > id，再按注册表顺序
+    m = AliasMatcher([("k", "id", PRIORITY_ID), ("k", "title", PRIORITY_TITLE), ("k", "first", PRIORITY_ALIAS),
+                      ("k", "second", PRIORITY_ALIAS)])
+    assert m.best("xkx") == "first"
+
+
+def test_empty_fields_never_match_and_fragment_fallback():
+    concepts = [{"id": "", "title": "", "aliases": []}, {"id": "n", "title": "标准正态分布", "aliases": ["高斯分布"]}]
+    snap = RegistrySnapshot(concepts)
+    assert snap.lookup("完全无关") is None
+    # 自动机未命中时，提示词是别名/标题的片段也算命中（保留改造前的行为）
+    assert snap.lookup("高斯")["id"] == "n"
@@ -0,0 +1,93 @@
+import numpy as np
+import plotly.graph_objects as go
+import pytest
+
+from backend.api.downsample import density_bins, downsample_figure, grid_shape, lttb, minmax
+from backend.api.typed_arrays import decode_array, encode_figure
+
+
+def test_lttb_keeps_endpoints_and_peak():
+    x = np.arange(10_000, dtype=float)
+    y = np.sin(x / 500)
+    y[4321] = 50.0
+    idx = lttb(x, y, 500)
+    assert len(idx) == 500
+    assert idx[0] == 0 and idx[-1] == len(x) - 1
+    assert np.all(np.diff(idx) > 0)
+    assert 4321 in idx
+
+
+@pytest.mark.parametrize("n_out", [5000, 5001, 7, 4])
+def test_minmax_within_budget_keeps_extremes_and_gaps(n_out):
+    y = np.random.default_rng(1).normal(size=100_003)
+    y[[10, 50_000]] = [99.0, -99.0]
+    y[70_000:70_100] = np.nan
+    idx = minmax(y, n_out)
+    assert len(idx) <= n_out
+    assert {0, len(y) - 1, 10, 50_000} <= set(idx.tolist())
+    if n_out > 1000:
+        assert np.isnan(y[idx]).any()  # 折线断点保留
+
+
+def test_density_bins_budget_outliers_and_proportions():
+    rng = np.random.default_rng(2)
+    dense = rng.normal(0, 1, size=(200_000, 2))
+    sparse = rng.uniform(8, 10, size=(2_000, 2))
+    outlier = np.array([[-50.0, 50.0]])
+    pts = np.vstack([dense, sparse, outlier])
+    budget = 20_000
+    idx, g = density_bins(pts[:, 0], pts[:, 1], budget)
+    assert len(idx) <= budget
+    assert len(pts) - 1 in idx  # 离群点保留
+    kept_dense = np.count_nonzero(idx < len(dense))
+    kept_sparse = np.count_nonzero((idx >= len(dense)) & (idx < len(dense) + len(sparse)))
+    # 相对密度基本不变：每个格子只留一个点时两者会接近
+    assert kept_dense / kept_sparse == pytest.approx(len(dense) / len(sparse), rel=0.3)
+    # 固定种子，结果可复现
+    assert np.array_equal(idx, density_bins(pts[:, 0], pts[:, 1], budget)[0])
+
+
+@pytest.mark.parametrize("shape", [(1000, 1000), (10, 100_000), (30_000, 3), (300, 200)])
+def test_grid_shape_within_budget(shape):
+    r, c = grid_shape(*shape, 40_000)
+    assert r * c <= 40_000
+    assert 2 <= r <= shape[0] and 2 <= c <= shape[1]
+
+
+def test_downsample_figure_traces_and_meta():
+    n = 50_000
+    x = np.arange(n, dtype=float)
+    fig = go.Figure([
+        go.Scatter(x=x, y=np.sin(x / 100), mode="lines", text=[str(i) for i in range(n)]),
+        go.Scatter(x=x, y=np.cos(x), mode="markers", marker={"color": x}),
+        go.Surface(z=np.ones((400, 300)), x=np.arange(300), y=np.arange(400)),
+        go.Bar(x=x[:10], y=x[:10]),
+    ])
+    out, records = downsample_figure(fig, line_points=1000, scatter_points=2000, surface_cells=10_000)
+    line, scatter, surface, bar = out["data"]
+    assert len(line["x"]) == len(line["y"]) == len(line["text"]) == 1000
+    assert [int(t) for t in line["text"]] == list(np.asarray(line["x"]).astype(int))
+    assert len(scatter["x"]) <= 2000 and len(scatter["marker"]["color"]) == len(scatter["x"])
+    z = np.asarray(surface["z"])
+    assert z.size <= 10_000 and len(surface["x"]) == z.shape[1] and len(surface["y"]) == z.shape[0]
+    assert np.array_equal(decode_array(bar["y"]), x[:10])
+    assert [r["kind"] for r in records] == ["line", "scatter", "surface"]
+    assert out["layout"]["meta"]["downsample"] == records
+
+
+def test_downsample_then_typed_round_trip():
+    n = 30_000
+    x = np.linspace(0, 10, n)
+    typed, _ = encode_figure(go.Figure(go.Scatter(x=x, y=x ** 2)))
+    out, records = downsample_figure(typed, line_points=500)
+    assert records[0]["points_after"] == 500
+    encoded, _ = encode_figure(out)
+    xs, ys = decode_array(encoded["data"][0]["x"]), decode_array(encoded["data"][0]["y"])
+    assert len(xs) == len(ys) == 500
+    assert np.allclose(ys, xs.astype(float) ** 2, rtol=1e-5)
+
+
+def test_small_figures_untouched():
+    fig = go.Figure(go.Scatter(y=[1, 2, 3]))
+    out, records = downsample_figure(fig)
+    assert records == [] and "meta" not in out["layout"]
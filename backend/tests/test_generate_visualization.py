@@ -0,0 +1,21 @@
+import pytest
+
+from backend.api import precompute
+from backend.api.generate_visualization import _build_html_from_spec, _local_spec_from_prompt, _validate_spec
+
+
+@pytest.mark.parametrize("prompt, sliders", [("泊松分布", "['lambda']"), ("二项分布", "['n', 'p']")])
+def test_discrete_prompts_render_their_pmf(prompt, sliders):
+    spec = _local_spec_from_prompt(prompt)
+    _validate_spec(spec)
+    html = _build_html_from_spec(spec)
+    assert f"bindSliders({sliders}" in html
+    assert "[0,1,0,1]" not in html
+
+
+def test_binomial_pmf_padded_to_slider_range():
+    data = precompute.binomial_pmf(20, 0.4, 50)
+    assert data["n"] == 51
+    assert sum(data["y"]) == pytest.approx(1.0, abs=1e-5)
+    assert data["y"][8] == pytest.approx(0.179706, rel=1e-5)
+    assert data["y"][21:] == [0.0] * 30
@@ -0,0 +1,147 @@
+import threading
+import time
+
+import pytest
+
+from backend.api.singleflight import SingleFlight
+from backend.app.services.job_queue import PRIORITIES, JobCancelled, JobQueue, QueueFull, defer_cancel
+
+
+def _wait(job, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not job.done:
+        assert time.monotonic() < deadline, f"任务未结束: {job.status}"
+        time.sleep(0.01)
+    return job
+
+
+def _running(job, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while job.status == "queued":
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    return job
+
+
+def _queue(**kwargs):
+    queue = JobQueue(workers=1, **kwargs)
+    gate = threading.Event()
+    order = []
+    queue.register("gate", lambda on_stage: gate.wait(5))
+    queue.register("record", lambda name, on_stage: order.append(name))
+    return queue, gate, order
+
+
+def test_priority_then_submission_order():
+    queue, gate, order = _queue()
+    blocker = _running(queue.submit("gate", {}))
+    jobs = [
+        queue.submit("record", {"name": "batch"}, PRIORITIES["batch"]),
+        queue.submit("record", {"name": "normal-1"}),
+        queue.submit("record", {"name": "interactive"}, PRIORITIES["interactive"]),
+        queue.submit("record", {"name": "normal-2"}),
+    ]
+    assert queue.position(jobs[0]) == 3
+    gate.set()
+    for job in [blocker, *jobs]:
+        _wait(job)
+    assert order == ["interactive", "normal-1", "normal-2", "batch"]
+
+
+def test_cancel_queued_job_never_runs():
+    queue, gate, order = _queue()
+    blocker = queue.submit("gate", {})
+    job = queue.submit("record", {"name": "x"})
+    assert queue.cancel(job.id).status == "cancelled"
+    gate.set()
+    _wait(blocker)
+    time.sleep(0.05)
+    assert order == [] and job.status == "cancelled"
+
+
+def test_cancel_running_job_at_next_stage():
+    queue = JobQueue(workers=1)
+    started = threading.Event()
+
+    def slow(on_stage):
+        on_stage("start")
+        started.set()
+        for i in range(500):
+            time.sleep(0.01)
+            on_stage("step", i=i)
+        return "finished"
+
+    queue.register("slow", slow)
+    job = queue.submit("slow", {})
+    assert started.wait(5)
+    queue.cancel(job.id)
+    _wait(job)
+    assert job.status == "cancelled" and job.result is None
+    assert job.stages[0]["stage"] == "start"
+
+
+def test_failures_are_recorded():
+    queue = JobQueue(workers=1)
+
+    def boom(on_stage):
+        raise ValueError("坏了")
+
+    queue.register("boom", boom)
+    job = _wait(queue.submit("boom", {}))
+    assert job.status == "failed" and job.error == "坏了"
+
+
+def test_finished_jobs_expire_after_ttl():
+    queue, gate, _ = _queue(result_ttl=0.0)
+    gate.set()
+    job = _wait(queue.submit("record", {"name": "x"}))
+    assert job.status == "succeeded"
+    time.sleep(0.01)
+    queue._swept_at = 0.0  # 跳过 1 秒的清理节流
+    assert queue.get(job.id) is None
+
+
+def test_queue_full_and_unknown_kind():
+    queue, gate, _ = _queue(max_queued=1)
+    _running(queue.submit("gate", {}))
+    queue.submit("record", {"name": "a"})
+    with pytest.raises(QueueFull):
+        queue.submit("record", {"name": "b"})
+    with pytest.raises(ValueError):
+        queue.submit("nope", {})
+    gate.set()
+
+
+def test_cancelled_leader_does_not_fail_flight_followers():
+    flight = SingleFlight()
+    entered, release = threading.Event(), threading.Event()
+
+    def work(on_stage):
+        entered.set()
+        release.wait(5)
+        on_stage("saved")
+        return "page.html"
+
+    def cancelled_stage(stage, **data):
+        raise JobCancelled()
+
+    record, check = defer_cancel(cancelled_stage)
+    leader = {}
+
+    def run_leader():
+        leader["result"] = flight.do("k", work, record)
+
+    t = threading.Thread(target=run_leader)
+    t.start()
+    assert entered.wait(5)
+    follower = {}
+    f = threading.Thread(target=lambda: follower.setdefault("result", flight.do("k", work, None)))
+    f.start()
+    while flight.shared == 0:
+        time.sleep(0.005)
+    release.set()
+    t.join(5)
+    f.join(5)
+    assert leader["result"] == follower["result"] == "page.html"
+    with pytest.raises(JobCancelled):
+        check()
@@ -0,0 +1,91 @@
+from backend.api.registry_service import RegistryService
+from backend.api.registry_store import RegistryStore
+
+
+def _entry(cid, alias):
+    return {"id": cid, "aliases": [alias], "title": cid, "url": f"/{cid}.html"}
+
+
+def _stores(tmp_path):
+    path = str(tmp_path / "registry.json")
+    # 同一文件上的两个存储实例，模拟两个进程
+    return (RegistryStore(path, flush_delay=60, max_pending=1000),
+            RegistryStore(path, flush_delay=60, max_pending=1000))
+
+
+def test_write_does_not_mask_concurrent_append(tmp_path):
+    mine, other = _stores(tmp_path)
+    service = RegistryService(mine, stat_interval=0)
+    service.upsert(_entry("x1", "第一个条目"))
+
+    upsert = mine.upsert
+
+    def racing_upsert(entry):
+        # 另一进程恰好在取基准快照与本次写入之间追加了条目
+        other.upsert(_entry("other", "from other process"))
+        return upsert(entry)
+
+    mine.upsert = racing_upsert
+    service.upsert(_entry("x2", "第二个条目"))
+    mine.upsert = upsert
+
+    assert [c["id"] for c in mine.load()["concepts"]] == ["x1", "other", "x2"]
+    assert [c["id"] for c in service.registry()["concepts"]] == ["x1", "other", "x2"]
+    assert service.lookup("from other process")["id"] == "other"
+
+
+def test_upsert_many_and_save_reload_after_foreign_write(tmp_path):
+    mine, other = _stores(tmp_path)
+    service = RegistryService(mine, stat_interval=0)
+    service.upsert_many([_entry("a", "甲"), _entry("b", "乙")])
+    other.upsert(_entry("c", "丙"))
+    assert service.lookup("丙")["id"] == "c"
+
+    service.save({"concepts": [_entry("d", "丁")]})
+    other.upsert(_entry("e", "戊"))
+    assert [c["id"] for c in service.registry()["concepts"]] == ["d", "e"]
+
+
+def test_own_write_visible_before_reload(tmp_path):
+    mine, _ = _stores(tmp_path)
+    service = RegistryService(mine, stat_interval=3600)
+    service.snapshot()
+    service.upsert(_entry("x", "某个概念"))
+    assert service.lookup("某个概念")["id"] == "x"
+
+
+def test_merge_aliases_concurrent_registrations_keep_every_alias(tmp_path):
+    import threading
+
+    mine, _ = _stores(tmp_path)
+    service = RegistryService(mine, stat_interval=0)
+    page = {"module": "ai_visualizer", "title": "t", "url": "/t.html", "type": "generated"}
+    prompts = [f"提示词{i}" for i in range(32)]
+    threads = [threading.Thread(target=service.merge_aliases, args=("c", "d1", p, page)) for p in prompts]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(service.lookup("提示词0")["aliases"]) == sorted(prompts)
+
+
+def test_merge_aliases_never_overwrites_other_pages(tmp_path):
+    mine, _ = _stores(tmp_path)
+    service = RegistryService(mine, stat_interval=0)
+    service.upsert({**_entry("c", "手写页面"), "type": "existing"})
+    page = {"module": "ai_visualizer", "title": "t", "url": "/g.html", "type": "generated"}
+    assert service.merge_aliases("c", "abcdef0123", "生成", page) == ("c_abcdef01", ["生成"])
+    assert service.merge_aliases("c", "abcdef0123", "再生成", page) == ("c_abcdef01", ["生成", "再生成"])
+    assert service.snapshot().get("c")["url"] == "/c.html"
+
+
+def test_reads_share_entries_and_writes_leave_them_untouched(tmp_path):
+    mine, _ = _stores(tmp_path)
+    service = RegistryService(mine, stat_interval=3600)
+    service.upsert(_entry("x", "某个概念"))
+    hit = service.lookup("某个概念")
+    assert hit is service.registry()["concepts"][0]
+
+    service.upsert({"id": "x", "url": "/new.html"})
+    assert hit["url"] == "/x.html"
+    assert service.lookup("某个概念")["url"] == "/new.html"
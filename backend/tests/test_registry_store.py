@@ -0,0 +1,62 @@
+import json
+import multiprocessing
+
+from backend.api.registry_store import RegistryStore, apply_op
+
+
+def _writer(path: str, worker: int, count: int) -> None:
+    # 很小的 max_pending 让各进程频繁压实，与其他进程的追加交错
+    store = RegistryStore(path, flush_delay=0.01, max_pending=3)
+    for i in range(count):
+        store.upsert({"id": f"w{worker}_{i}", "aliases": [f"{worker}-{i}"]})
+    store.flush()
+
+
+def test_concurrent_processes_lose_no_updates(tmp_path):
+    path = str(tmp_path / "registry.json")
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_writer, args=(path, w, 40)) for w in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(60)
+        assert p.exitcode == 0
+
+    ids = {c["id"] for c in RegistryStore(path).load()["concepts"]}
+    assert ids == {f"w{w}_{i}" for w in range(4) for i in range(40)}
+    with open(path, encoding="utf-8") as f:
+        assert len(json.load(f)["concepts"]) == 160
+
+
+def test_wal_replay_and_compaction(tmp_path):
+    path = str(tmp_path / "registry.json")
+    store = RegistryStore(path, flush_delay=60, max_pending=1000)
+    store.save({"concepts": [{"id": "a", "title": "旧"}]})
+    store.upsert({"id": "a", "title": "新"})
+    store.add({"id": "a", "title": "不会覆盖"})
+    store.add({"id": "b"})
+    expected = [{"id": "a", "title": "新"}, {"id": "b"}]
+    assert store.load()["concepts"] == expected
+
+    store.flush()
+    assert not (tmp_path / "registry.json.wal").exists()
+    assert RegistryStore(path).load()["concepts"] == expected
+
+
+def test_torn_wal_line_is_skipped(tmp_path):
+    path = str(tmp_path / "registry.json")
+    store = RegistryStore(path, flush_delay=60, max_pending=1000)
+    store.upsert({"id": "a"})
+    with open(store.wal_path, "a", encoding="utf-8") as f:
+        f.write('{"op": "upsert", "entry": {"id": "trunc')
+    # 崩溃留下的半行被忽略，之后的追加另起一行
+    store.upsert({"id": "b"})
+    assert [c["id"] for c in store.load()["concepts"]] == ["a", "b"]
+
+
+def test_apply_op_semantics():
+    registry = {"concepts": [{"id": "a", "x": 1}]}
+    apply_op(registry, "upsert", {"id": "a", "y": 2})
+    apply_op(registry, "add", {"id": "a", "x": 9})
+    apply_op(registry, "append", {"id": "a"})
+    assert registry["concepts"] == [{"id": "a", "x": 1, "y": 2}, {"id": "a"}]
@@ -0,0 +1,112 @@
+import threading
+import time
+
+import pytest
+
+from backend.api.singleflight import SingleFlight
+
+
+def _start_followers(flight, n, target):
+    threads = [threading.Thread(target=target) for _ in range(n)]
+    for t in threads:
+        t.start()
+    deadline = time.monotonic() + 5
+    while flight.shared < n:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+    return threads
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        release.wait(5)
+        return object()
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("k", work)))
+    leader.start()
+    while not calls:
+        time.sleep(0.005)
+    followers = _start_followers(flight, 5, lambda: results.append(flight.do("k", work)))
+    release.set()
+    for t in [leader, *followers]:
+        t.join(5)
+    assert len(calls) == 1 and len(results) == 6
+    assert all(r is results[0] for r in results)
+    assert flight.in_flight() == 0
+    # 完成后不缓存，下一次重新执行
+    flight.do("k", work)
+    assert len(calls) == 2
+
+
+def test_leader_error_reaches_every_waiter():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def work():
+        release.wait(5)
+        raise ValueError("失败")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("k", work)
+        except ValueError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    followers = _start_followers(flight, 3, call)
+    release.set()
+    for t in [leader, *followers]:
+        t.join(5)
+    assert len(errors) == 4 and all(e is errors[0] for e in errors)
+
+
+def test_stages_fan_out_to_followers_with_replay():
+    flight = SingleFlight()
+    first_done, release = threading.Event(), threading.Event()
+
+    def work(emit):
+        emit("spec", concept="c")
+        first_done.set()
+        release.wait(5)
+        emit("saved", url="u")
+        return "ok"
+
+    seen = {"leader": [], "follower": []}
+    stage = lambda who: lambda s, **d: seen[who].append((s, d))  # noqa: E731
+    leader = threading.Thread(target=lambda: flight.do_with_stages("k", work, on_stage=stage("leader")))
+    leader.start()
+    assert first_done.wait(5)
+    followers = _start_followers(flight, 1, lambda: flight.do_with_stages("k", work, on_stage=stage("follower")))
+    release.set()
+    for t in [leader, *followers]:
+        t.join(5)
+    assert seen["leader"] == [("spec", {"concept": "c"}), ("saved", {"url": "u"})]
+    assert seen["follower"] == [("joined", {"replayed": 1}), *seen["leader"]]
+
+
+def test_failing_listener_does_not_break_the_flight():
+    flight = SingleFlight()
+
+    def bad(stage, **data):
+        raise RuntimeError("客户端已断开")
+
+    def work(emit):
+        emit("spec")
+        return 42
+
+    assert flight.do_with_stages("k", work, on_stage=bad) == 42
+
+
+@pytest.mark.parametrize("on_stage", [None, lambda s, **d: None])
+def test_do_with_stages_passes_emit_last(on_stage):
+    flight = SingleFlight()
+    assert flight.do_with_stages("k", lambda a, b, emit: (a, b, callable(emit)), 1, 2, on_stage=on_stage) == (1, 2, True)
@@ -0,0 +1,54 @@
+import os
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.api.page_cache import PageCache
+from backend.api.static_assets import PrecompressedStaticFiles, _encoders, precompress
+
+
+def _client(root, cache):
+    app = FastAPI()
+    app.mount("/app", PrecompressedStaticFiles(directory=str(root), cache=cache), name="app")
+    return TestClient(app)
+
+
+def test_cached_page_upgrades_when_variant_appears(tmp_path):
+    page = tmp_path / "page.html"
+    page.write_text("<html>" + "正态分布 " * 2000 + "</html>", encoding="utf-8")
+    cache = PageCache(max_bytes=1 << 20, stat_interval=0)
+    client = _client(tmp_path, cache)
+    best = _encoders()[0][0]
+    headers = {"accept-encoding": "br, gzip"}
+
+    first = client.get("/app/page.html", headers=headers)
+    assert first.status_code == 200 and "content-encoding" not in first.headers
+    assert client.get("/app/page.html", headers=headers).headers.get("content-encoding") is None
+    assert cache.hits == 1
+
+    precompress(str(page))
+    upgraded = client.get("/app/page.html", headers=headers)
+    assert upgraded.headers["content-encoding"] == best
+    assert upgraded.text == first.text
+    assert cache.invalidations == 1
+
+    # 新条目按变体缓存后照常命中
+    client.get("/app/page.html", headers=headers)
+    assert cache.hits == 2
+
+
+def test_source_change_invalidates_compressed_entry(tmp_path):
+    page = tmp_path / "page.html"
+    page.write_text("<html>" + "a" * 5000 + "</html>", encoding="utf-8")
+    precompress(str(page))
+    cache = PageCache(max_bytes=1 << 20, stat_interval=0)
+    client = _client(tmp_path, cache)
+    headers = {"accept-encoding": "gzip"}
+    assert client.get("/app/page.html", headers=headers).headers["content-encoding"] == "gzip"
+
+    page.write_text("<html>" + "b" * 5000 + "</html>", encoding="utf-8")
+    st = os.stat(page)
+    os.utime(page, ns=(st.st_atime_ns, st.st_mtime_ns + 10_000_000))
+    # 变体已过期：退回原文件，且不是缓存中的旧内容
+    rsp = client.get("/app/page.html", headers=headers)
+    assert "content-encoding" not in rsp.headers and "b" * 100 in rsp.text
@@ -0,0 +1,71 @@
+import json
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+import pytest
+
+from backend.api.typed_arrays import decode_array, encode_array, encode_figure, narrow
+
+
+@pytest.mark.parametrize("values, dtype", [
+    ([0, 1, 255], "u1"),
+    ([-1, 0, 127], "i1"),
+    ([0, 65535], "u2"),
+    ([-40000, 40000], "i4"),
+    ([0.0, 2.0, 3.0], "u1"),  # 全为整数的浮点数组按整型存
+    ([0, 2 ** 40], "f8"),
+])
+def test_narrow_picks_smallest_exact_dtype(values, dtype):
+    arr = narrow(np.array(values))
+    assert arr.dtype.str[1:] == dtype
+    assert np.array_equal(decode_array(encode_array(arr)), np.array(values))
+
+
+def test_float_round_trip_within_rtol():
+    x = np.random.default_rng(0).normal(size=1000) * 1e3
+    x[0] = 1e-80  # 低于 float32 最小正规数，不阻止收窄
+    spec = encode_array(narrow(x, rtol=1e-6))
+    assert spec["dtype"] == "f4"
+    back = decode_array(spec).astype(float)
+    assert np.all(np.abs(back[1:] - x[1:]) <= 1e-6 * np.abs(x[1:]))
+
+    strict = encode_array(narrow(x, rtol=1e-12))
+    assert strict["dtype"] == "f8"
+    assert np.array_equal(decode_array(strict), x)
+
+
+def test_non_finite_and_2d_shape():
+    z = np.arange(12, dtype=float).reshape(3, 4) / 7
+    z[1, 2] = np.nan
+    spec = encode_array(narrow(z))
+    assert spec["shape"] == "3, 4"
+    back = decode_array(spec)
+    assert back.shape == (3, 4)
+    assert np.isnan(back[1, 2])
+    assert np.allclose(back[~np.isnan(z)], z[~np.isnan(z)], rtol=1e-6)
+
+
+def test_non_numeric_arrays_untouched():
+    for arr in (np.array([True, False]), np.array(["a", "b"]), np.array([], dtype=float)):
+        assert narrow(arr) is None
+
+
+def test_encode_figure_round_trip():
+    x = np.linspace(0, 1, 200)
+    fig = go.Figure(
+        [go.Scatter(x=x, y=np.sin(x), text=[str(i) for i in range(200)]), go.Bar(x=[1, 2], y=[3, 4])],
+        layout={"title": {"text": "t"}, "xaxis": {"range": [0.0, 1.0]}},
+        frames=[go.Frame(data=[go.Scatter(y=np.cos(x))])],
+    )
+    out, stats = encode_figure(fig, min_length=16)
+    trace = out["data"][0]
+    assert trace["x"]["dtype"] == "f4" and np.allclose(decode_array(trace["x"]), x, rtol=1e-6)
+    assert trace["text"] == [str(i) for i in range(200)]
+    assert out["data"][1]["y"] == [3, 4]  # 短于 min_length 的数组保持原样
+    assert out["layout"]["xaxis"]["range"] == [0.0, 1.0]
+    assert np.allclose(decode_array(out["frames"][0]["data"][0]["y"]), np.cos(x), rtol=1e-6)
+    assert stats["bytes_after"] < stats["bytes_before"]
+    # 编码结果是 plotly 可读的 figure JSON
+    rebuilt = pio.from_json(json.dumps(out), skip_invalid=False)
+    assert len(rebuilt.data) == 2
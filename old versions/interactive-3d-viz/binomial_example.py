@@ -2,25 +2,30 @@
 """
 二项分布B(n,p)可视化示例
 演示固定n变化p，以及固定p变化n的效果
+
+依赖仓库根目录下的 backend 包，在本目录运行::
+
+    PYTHONPATH=../.. python binomial_example.py
 """
 
 import plotly.graph_objects as go
 import plotly.subplots as sp
 from plotly.subplots import make_subplots
 import numpy as np
-from scipy.stats import binom
-import math
 
-def binomial_pmf(k, n, p):
-    """计算二项分布的概率质量函数"""
-    return binom.pmf(k, n, p)
+# 共享的向量化分布模块
+from backend.api.distributions import binom_pmf, moments
+
+def binomial_pmf_grid(k_values, n_values, p_values):
+    """一次广播计算整组参数的PMF：每行对应一组(n, p)，超出n的k概率为0"""
+    n = np.asarray(n_values)[:, None] if np.ndim(n_values) else n_values
+    p = np.asarray(p_values)[:, None] if np.ndim(p_values) else p_values
+    return binom_pmf(k_values, n, p)
 
 def binomial_stats(n, p):
     """计算二项分布的统计量"""
-    mean = n * p
-    variance = n * p * (1 - p)
-    std = math.sqrt(variance)
-    return mean, variance, std
+    m = moments('binom', n=n, p=p)
+    return float(m['mean']), float(m['var']), float(m['std'])
 
 def create_fixed_n_varying_p():
     """固定n=20，变化p的可视化"""
@@ -29,10 +34,11 @@ def create_fixed_n_varying_p():
     colors = ['red', 'orange', 'green', 'blue', 'purple']
     
     fig = go.Figure()
+    k_values = np.arange(0, n + 1)
+    pmf_grid = binomial_pmf_grid(k_values, n, p_values)
     
     for i, p in enumerate(p_values):
-        k_values = np.arange(0, n + 1)
-        probabilities = [binomial_pmf(k, n, p) for k in k_values]
+        probabilities = pmf_grid[i]
         
         mean, variance, std = binomial_stats(n, p)
         
@@ -73,10 +79,11 @@ def create_fixed_p_varying_n():
     colors = ['red', 'orange', 'green', 'blue', 'purple']
     
     fig = go.Figure()
+    pmf_grid = binomial_pmf_grid(np.arange(0, max(n_values) + 1), n_values, p)
     
     for i, n in enumerate(n_values):
         k_values = np.arange(0, n + 1)
-        probabilities = [binomial_pmf(k, n, p) for k in k_values]
+        probabilities = pmf_grid[i, :n + 1]
         
         mean, variance, std = binomial_stats(n, p)
         
@@ -118,8 +125,9 @@ def create_3d_parameter_surface():
     N, P = np.meshgrid(n_range, p_range)
     
     # 计算期望值和方差
-    Mean = N * P
-    Variance = N * P * (1 - P)
+    stats = moments('binom', n=N, p=P)
+    Mean = stats['mean']
+    Variance = stats['var']
     
     # 创建子图
     fig = make_subplots(
@@ -192,9 +200,11 @@ def create_comprehensive_analysis():
     p_values = [0.1, 0.3, 0.5, 0.7, 0.9]
     colors = ['red', 'orange', 'green', 'blue', 'purple']
     
+    k_values = np.arange(0, n + 1)
+    pmf_grid = binomial_pmf_grid(k_values, n, p_values)
+    
     for i, p in enumerate(p_values):
-        k_values = np.arange(0, n + 1)
-        probabilities = [binomial_pmf(k, n, p) for k in k_values]
+        probabilities = pmf_grid[i]
         
         fig.add_trace(
             go.Scatter(
@@ -213,9 +223,11 @@ def create_comprehensive_analysis():
     p = 0.3
     n_values = [5, 10, 20, 30]
     
+    pmf_grid = binomial_pmf_grid(np.arange(0, max(n_values) + 1), n_values, p)
+    
     for i, n in enumerate(n_values):
         k_values = np.arange(0, n + 1)
-        probabilities = [binomial_pmf(k, n, p) for k in k_values]
+        probabilities = pmf_grid[i, :n + 1]
         
         fig.add_trace(
             go.Scatter(
@@ -9,15 +9,21 @@ Binomial Distribution Interactive Visualization
 2. 实时PMF和CDF显示
 3. 统计特性动态更新
 4. 教育性注释和说明
+
+依赖仓库根目录下的 backend 包，在本目录运行::
+
+    PYTHONPATH=../.. python binomial_interactive_viz.py
 """
 
 import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import plotly.offline as pyo
-from scipy.stats import binom
 import math
 
+# 共享的向量化分布模块与参数网格滑块
+from backend.api.distributions import binom_cdf, binom_pmf, moments
+from backend.api.frames import FRAME_SLIDER_SCRIPT, FrameSlider
+
 def calculate_binomial_stats(n, p):
     """计算二项分布的统计特性"""
     mean = n * p
@@ -41,8 +47,8 @@ def create_binomial_visualization():
     
     # 计算初始数据
     x_values = np.arange(0, initial_n + 1)
-    pmf_values = binom.pmf(x_values, initial_n, initial_p)
-    cdf_values = binom.cdf(x_values, initial_n, initial_p)
+    pmf_values = binom_pmf(x_values, initial_n, initial_p)
+    cdf_values = binom_cdf(x_values, initial_n, initial_p)
     
     # 计算统计特性
     stats = calculate_binomial_stats(initial_n, initial_p)
@@ -201,65 +207,64 @@ def create_binomial_visualization():
     fig.update_yaxes(title_text="", row=2, col=2, showticklabels=False)
     
     # 添加滑块控件
-    # 模式1：固定n=20，变化p
-    p_steps = []
-    for p_val in np.arange(0.05, 1.0, 0.05):
-        x_vals = np.arange(0, initial_n + 1)
-        pmf_vals = binom.pmf(x_vals, initial_n, p_val)
-        cdf_vals = binom.cdf(x_vals, initial_n, p_val)
-        stats_new = calculate_binomial_stats(initial_n, p_val)
+    # 模式1：固定n=20，变化p —— 所有p一次算成 (p个数 × k个数) 网格，滑块按下标切换
+    p_values = np.arange(0.05, 1.0, 0.05)
+    x_vals = np.arange(0, initial_n + 1)
+    pmf_grid = binom_pmf(x_vals, initial_n, p_values[:, None])
+    cdf_grid = binom_cdf(x_vals, initial_n, p_values[:, None])
+    m = moments('binom', n=initial_n, p=p_values)
+    
+    stats_text_frames = []
+    shape_info_frames = []
+    for i, p_val in enumerate(p_values):
+        stats_text_frames.append([
+            f"期望值 E[X] = np = {m['mean'][i]:.3f}",
+            f"方差 Var[X] = np(1-p) = {m['var'][i]:.3f}",
+            f"标准差 σ = {m['std'][i]:.3f}",
+            f"偏度 = {m['skew'][i]:.3f}"
+        ])
         
         # 形状特征更新
         shape_info_new = []
-        if abs(stats_new['skewness']) < 0.5:
+        if abs(m['skew'][i]) < 0.5:
             shape_info_new.append("分布形状：近似对称")
-        elif stats_new['skewness'] > 0.5:
+        elif m['skew'][i] > 0.5:
             shape_info_new.append("分布形状：右偏")
         else:
             shape_info_new.append("分布形状：左偏")
         
-        if p_val == 0.5:
+        if np.isclose(p_val, 0.5):
             shape_info_new.append("p=0.5时分布最对称")
         elif p_val < 0.5:
             shape_info_new.append("p<0.5时分布右偏")
         else:
             shape_info_new.append("p>0.5时分布左偏")
-        
-        step = dict(
-            method="restyle",
-            args=[{
-                "x": [x_vals, x_vals, [stats_new['mean'], stats_new['mean']], 
-                      [0.1, 0.1, 0.1, 0.1], [0.1, 0.1]],
-                "y": [pmf_vals, cdf_vals, [0, max(pmf_vals) * 1.1],
-                      [0.8, 0.6, 0.4, 0.2], [0.7, 0.3]],
-                "text": [None, None, None,
-                        [f"期望值 E[X] = np = {stats_new['mean']:.3f}",
-                         f"方差 Var[X] = np(1-p) = {stats_new['variance']:.3f}",
-                         f"标准差 σ = {stats_new['std']:.3f}",
-                         f"偏度 = {stats_new['skewness']:.3f}"],
-                        shape_info_new],
-                "name": [None, None, f'期望值 E[X]={stats_new["mean"]:.2f}', None, None]
-            }, {
-                "title": f'🎲 二项分布 B({initial_n},{p_val:.2f}) 交互式可视化<br><sub>模式：固定n={initial_n}变化p | 当前p={p_val:.2f}</sub>'
-            }],
-            label=f"p={p_val:.2f}"
-        )
-        p_steps.append(step)
+        shape_info_frames.append(shape_info_new)
+    
+    slider = FrameSlider([f"p={p_val:.2f}" for p_val in p_values])
+    slider.grid(0, pmf_grid).grid(1, cdf_grid)
+    slider.values(2, 'x', [[mean, mean] for mean in m['mean']])
+    slider.values(2, 'y', [[0, peak * 1.1] for peak in pmf_grid.max(axis=1)])
+    slider.values(2, 'name', [f'期望值 E[X]={mean:.2f}' for mean in m['mean']])
+    slider.values(3, 'text', stats_text_frames)
+    slider.values(4, 'text', shape_info_frames)
+    slider.layout([
+        {"title": f'🎲 二项分布 B({initial_n},{p_val:.2f}) 交互式可视化<br><sub>模式：固定n={initial_n}变化p | 当前p={p_val:.2f}</sub>'}
+        for p_val in p_values
+    ])
     
     # 添加滑块
-    sliders = [dict(
+    slider.attach(
+        fig,
         active=9,  # 默认p=0.5
         currentvalue={"prefix": "概率参数 p = "},
         pad={"t": 50},
-        steps=p_steps,
         x=0.1,
         y=0,
         len=0.8,
         ticklen=0,
         tickcolor="white"
-    )]
-    
-    fig.update_layout(sliders=sliders)
+    )
     
     return fig
 
@@ -273,8 +278,8 @@ def create_binomial_fixed_p_visualization():
     
     # 计算初始数据
     x_values = np.arange(0, initial_n + 1)
-    pmf_values = binom.pmf(x_values, initial_n, initial_p)
-    cdf_values = binom.cdf(x_values, initial_n, initial_p)
+    pmf_values = binom_pmf(x_values, initial_n, initial_p)
+    cdf_values = binom_cdf(x_values, initial_n, initial_p)
     
     # 计算统计特性
     stats = calculate_binomial_stats(initial_n, initial_p)
@@ -426,58 +431,58 @@ def create_binomial_fixed_p_visualization():
     fig.update_yaxes(title_text="", row=2, col=2, showticklabels=False)
     
     # 添加滑块控件 - 固定p变化n
-    n_steps = []
-    for n_val in range(5, max_n + 1, 2):
-        x_vals = np.arange(0, n_val + 1)
-        pmf_vals = binom.pmf(x_vals, n_val, initial_p)
-        cdf_vals = binom.cdf(x_vals, n_val, initial_p)
-        stats_new = calculate_binomial_stats(n_val, initial_p)
+    # 所有n一次算成网格：支撑集取到max_n，超出n的k概率为0，前端按每帧的n截取
+    n_values = np.arange(5, max_n + 1, 2)
+    x_all = np.arange(0, max_n + 1)
+    pmf_grid = binom_pmf(x_all, n_values[:, None], initial_p)
+    cdf_grid = binom_cdf(x_all, n_values[:, None], initial_p)
+    m = moments('binom', n=n_values, p=initial_p)
+    
+    stats_text_frames = []
+    shape_info_frames = []
+    for i, n_val in enumerate(n_values):
+        stats_text_frames.append([
+            f"期望值 E[X] = np = {m['mean'][i]:.3f}",
+            f"方差 Var[X] = np(1-p) = {m['var'][i]:.3f}",
+            f"标准差 σ = {m['std'][i]:.3f}",
+            f"变异系数 CV = {m['std'][i]/m['mean'][i]:.3f}"
+        ])
         
         # 正态近似判断
         normal_approx = "是" if (n_val * initial_p >= 5 and n_val * (1 - initial_p) >= 5) else "否"
         
-        shape_info_new = [
+        shape_info_frames.append([
             f"试验次数 n = {n_val}",
             f"成功概率 p = {initial_p:.2f}",
             f"可用正态近似：{normal_approx}",
-            f"np = {stats_new['mean']:.1f}, np(1-p) = {stats_new['variance']:.1f}"
-        ]
-        
-        step = dict(
-            method="restyle",
-            args=[{
-                "x": [x_vals, x_vals, [stats_new['mean'], stats_new['mean']], 
-                      [0.1, 0.1, 0.1, 0.1], [0.1, 0.1, 0.1, 0.1]],
-                "y": [pmf_vals, cdf_vals, [0, max(pmf_vals) * 1.1],
-                      [0.8, 0.6, 0.4, 0.2], [0.8, 0.6, 0.4, 0.2]],
-                "text": [None, None, None,
-                        [f"期望值 E[X] = np = {stats_new['mean']:.3f}",
-                         f"方差 Var[X] = np(1-p) = {stats_new['variance']:.3f}",
-                         f"标准差 σ = {stats_new['std']:.3f}",
-                         f"变异系数 CV = {stats_new['std']/stats_new['mean']:.3f}"],
-                        shape_info_new],
-                "name": [None, None, f'期望值 E[X]={stats_new["mean"]:.2f}', None, None]
-            }, {
-                "title": f'🎲 二项分布 B({n_val},{initial_p:.2f}) 交互式可视化<br><sub>模式：固定p={initial_p:.2f}变化n | 当前n={n_val}</sub>'
-            }],
-            label=f"n={n_val}"
-        )
-        n_steps.append(step)
+            f"np = {m['mean'][i]:.1f}, np(1-p) = {m['var'][i]:.1f}"
+        ])
+    
+    slider = FrameSlider([f"n={n_val}" for n_val in n_values])
+    slider.grid(0, pmf_grid, x=x_all, lengths=n_values + 1)
+    slider.grid(1, cdf_grid, x=x_all, lengths=n_values + 1)
+    slider.values(2, 'x', [[mean, mean] for mean in m['mean']])
+    slider.values(2, 'y', [[0, peak * 1.1] for peak in pmf_grid.max(axis=1)])
+    slider.values(2, 'name', [f'期望值 E[X]={mean:.2f}' for mean in m['mean']])
+    slider.values(3, 'text', stats_text_frames)
+    slider.values(4, 'text', shape_info_frames)
+    slider.layout([
+        {"title": f'🎲 二项分布 B({n_val},{initial_p:.2f}) 交互式可视化<br><sub>模式：固定p={initial_p:.2f}变化n | 当前n={n_val}</sub>'}
+        for n_val in n_values
+    ])
     
     # 添加滑块
-    sliders = [dict(
+    slider.attach(
+        fig,
         active=2,  # 默认n=10
         currentvalue={"prefix": "试验次数 n = "},
         pad={"t": 50},
-        steps=n_steps,
         x=0.1,
         y=0,
         len=0.8,
         ticklen=0,
         tickcolor="white"
-    )]
-    
-    fig.update_layout(sliders=sliders)
+    )
     
     return fig
 
@@ -492,7 +497,7 @@ def main():
     
     # 保存第一个可视化
     html_file1 = "binomial_fixed_n_interactive.html"
-    pyo.plot(fig1, filename=html_file1, auto_open=False)
+    fig1.write_html(html_file1, post_script=FRAME_SLIDER_SCRIPT)
     print(f"✅ 模式1可视化已保存为: {html_file1}")
     
     # 生成固定p变化n的可视化
@@ -501,7 +506,7 @@ def main():
     
     # 保存第二个可视化
     html_file2 = "binomial_fixed_p_interactive.html"
-    pyo.plot(fig2, filename=html_file2, auto_open=False)
+    fig2.write_html(html_file2, post_script=FRAME_SLIDER_SCRIPT)
     print(f"✅ 模式2可视化已保存为: {html_file2}")
     
     print("\n🎉 二项分布交互式可视化创建完成！")
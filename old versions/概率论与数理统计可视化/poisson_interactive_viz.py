@@ -2,19 +2,19 @@
 泊松分布交互式可视化
 根据交互式3D可视化应用详细执行任务清单v1014创建
 展示参数λ变化时泊松分布的动态效果，使用进度条控制参数
+
+依赖仓库根目录下的 backend 包，在本目录运行::
+
+    PYTHONPATH=../.. python poisson_interactive_viz.py
 """
 
 import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import math
 
-def poisson_pmf(k, lam):
-    """
-    计算泊松分布的概率质量函数
-    P(X = k) = (λ^k * e^(-λ)) / k!
-    """
-    return (lam ** k) * np.exp(-lam) / math.factorial(k)
+# 共享的向量化分布模块
+from backend.api.distributions import poisson_cdf, poisson_pmf
+from backend.api.frames import FRAME_SLIDER_SCRIPT, FrameSlider
 
 def create_poisson_visualization():
     """
@@ -45,9 +45,13 @@ def create_poisson_visualization():
     # 初始λ值
     initial_lambda = 3.0
     
+    # 一次广播计算所有λ帧的PMF和CDF（对数空间，形状 λ个数 × k个数）
+    pmf_grid = poisson_pmf(k_values, lambda_values[:, None])
+    cdf_grid = poisson_cdf(k_values, lambda_values[:, None])
+    
     # 计算初始PMF和CDF
-    initial_pmf = [poisson_pmf(k, initial_lambda) for k in k_values]
-    initial_cdf = np.cumsum(initial_pmf)
+    initial_pmf = poisson_pmf(k_values, initial_lambda)
+    initial_cdf = poisson_cdf(k_values, initial_lambda)
     
     # 主图：PMF柱状图
     fig.add_trace(
@@ -117,39 +121,14 @@ def create_poisson_visualization():
         row=2, col=2
     )
     
-    # 创建滑块步骤 - 使用简化的更新方式
-    steps = []
-    for lam in lambda_values:
-        # 计算当前λ的PMF和CDF
-        pmf = [poisson_pmf(k, lam) for k in k_values]
-        cdf = np.cumsum(pmf)
-        
-        step = dict(
-            method="restyle",
-            args=[
-                {
-                    "y": [pmf, cdf, lambda_range, lambda_range, [lam]],
-                    "name": [f'PMF (λ={lam:.1f})', f'CDF (λ={lam:.1f})', 
-                            '期望值 E[X] = λ', '方差 Var[X] = λ', f'当前 λ = {lam:.1f}']
-                }
-            ],
-            label=f"{lam:.1f}"
-        )
-        steps.append(step)
-    
-    # 配置滑块
-    sliders = [dict(
-        active=int((initial_lambda - lambda_min) / lambda_step),
-        currentvalue={"prefix": "λ参数: "},
-        pad={"t": 50},
-        steps=steps,
-        len=0.9,
-        x=0.05,
-        y=0,
-        ticklen=5,
-        tickcolor="lightgray",
-        tickwidth=2
-    )]
+    # 滑块：λ 网格整体只编码一次，按下标切换 PMF/CDF 行，不再每步复制整条 trace
+    slider = FrameSlider([f"{lam:.1f}" for lam in lambda_values])
+    slider.grid(0, pmf_grid).grid(1, cdf_grid)
+    slider.values(0, 'name', [f'PMF (λ={lam:.1f})' for lam in lambda_values])
+    slider.values(1, 'name', [f'CDF (λ={lam:.1f})' for lam in lambda_values])
+    slider.values(4, 'x', [[lam] for lam in lambda_values])
+    slider.values(4, 'y', [[lam] for lam in lambda_values])
+    slider.values(4, 'name', [f'当前 λ = {lam:.1f}' for lam in lambda_values])
     
     # 更新布局
     fig.update_layout(
@@ -158,7 +137,6 @@ def create_poisson_visualization():
             x=0.5,
             font=dict(size=20, color='darkblue')
         ),
-        sliders=sliders,
         showlegend=True,
         height=800,
         width=1200,
@@ -167,6 +145,20 @@ def create_poisson_visualization():
         margin=dict(l=80, r=80, t=100, b=120)
     )
     
+    # 配置滑块
+    slider.attach(
+        fig,
+        active=int(round((initial_lambda - lambda_min) / lambda_step)),
+        currentvalue={"prefix": "λ参数: "},
+        pad={"t": 50},
+        len=0.9,
+        x=0.05,
+        y=0,
+        ticklen=5,
+        tickcolor="lightgray",
+        tickwidth=2
+    )
+    
     # 更新各子图的坐标轴
     fig.update_xaxes(title_text="事件发生次数 k", row=1, col=1)
     fig.update_yaxes(title_text="概率 P(X = k)", row=1, col=1)
@@ -200,10 +192,10 @@ if __name__ == "__main__":
     fig = create_poisson_visualization()
     
     # 显示图表
-    fig.show()
+    fig.show(post_script=FRAME_SLIDER_SCRIPT)
     
     # 可选：保存为HTML文件
-    fig.write_html("poisson_interactive_visualization.html")
+    fig.write_html("poisson_interactive_visualization.html", post_script=FRAME_SLIDER_SCRIPT)
     print("泊松分布交互式可视化已创建完成！")
     print("- 使用底部滑块调整λ参数 (0.5 - 15.0)")
     print("- 观察PMF、CDF和统计特性的变化")